@@ -1,4 +1,5 @@
 import json
+import os
 import time
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -11,8 +12,18 @@ class ActionLogger:
     """
     Comprehensive logging system for all application actions
     Logs API calls, Claude prompts, processing steps, and system events
+
+    Every process (the API and any worker.py processes) has its own logger
+    instance; entries are also appended to logs/actions.jsonl so the getters
+    see what all of them logged. Once that file grows past SHARED_LOG_ROTATE_BYTES
+    it is renamed to actions.1.jsonl (replacing the previous one) and a new file
+    is started, so the logs take at most about twice that on disk.
     """
     
+    SHARED_LOG_ROTATE_BYTES = 5 * 1024 * 1024
+    # How often a process checks the shared file's size and whether another process rotated it
+    SHARED_LOG_CHECK_SECONDS = 1.0
+
     def __init__(self, max_logs: int = 1000):
         self.max_logs = max_logs
         self.logs = deque(maxlen=max_logs)
@@ -22,6 +33,10 @@ class ActionLogger:
         # Create logs directory
         self.logs_dir = Path("logs")
         self.logs_dir.mkdir(exist_ok=True)
+        self.shared_log_path = self.logs_dir / "actions.jsonl"
+        self.previous_log_path = self.logs_dir / "actions.1.jsonl"
+        self._shared_fd = None  # Append-only descriptor, kept open between entries
+        self._next_shared_check = 0.0
         
         # Log system startup
         self.log_system_event("SYSTEM_STARTUP", "Action logger initialized", {"session_id": self.session_id})
@@ -157,6 +172,74 @@ class ActionLogger:
         """Add log entry to the queue"""
         with self.lock:
             self.logs.append(log_entry)
+            try:
+                line = json.dumps(log_entry, default=str) + "\n"
+                if self._shared_fd is None or time.monotonic() >= self._next_shared_check:
+                    self._check_shared_log()
+                # A single O_APPEND write keeps lines from different processes whole
+                os.write(self._shared_fd, line.encode())
+            except (OSError, TypeError, ValueError):
+                pass
+    
+    def _check_shared_log(self):
+        """Rotate the shared file once it is too large, and follow rotations by other processes"""
+        self._next_shared_check = time.monotonic() + self.SHARED_LOG_CHECK_SECONDS
+        if self._shared_fd is not None:
+            try:
+                current = os.stat(self.shared_log_path)
+                still_open = os.path.samestat(current, os.fstat(self._shared_fd))
+            except FileNotFoundError:
+                still_open = False
+            if still_open and current.st_size <= self.SHARED_LOG_ROTATE_BYTES:
+                return
+            if still_open:
+                os.replace(self.shared_log_path, self.previous_log_path)
+            os.close(self._shared_fd)
+            self._shared_fd = None
+        self._shared_fd = os.open(self.shared_log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if os.fstat(self._shared_fd).st_size > self.SHARED_LOG_ROTATE_BYTES:
+            # Already too large when opened (e.g. at startup)
+            self._check_shared_log()
+    
+    def _shared_logs(self) -> List[Dict]:
+        """The last max_logs entries written by any process; this process's own if the file can't be read"""
+        try:
+            lines = self._tail_lines(self.shared_log_path, self.max_logs)
+        except OSError:
+            with self.lock:
+                return list(self.logs)
+        if len(lines) < self.max_logs:
+            try:
+                lines = self._tail_lines(self.previous_log_path, self.max_logs - len(lines)) + lines
+            except OSError:
+                pass
+
+        logs = []
+        for line in lines:
+            try:
+                logs.append(json.loads(line))
+            except ValueError:
+                # A torn write
+                continue
+        return logs
+    
+    @staticmethod
+    def _tail_lines(path: Path, count: int) -> List[bytes]:
+        """The last `count` lines of a file, read backwards in blocks until enough are in hand"""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= count:
+                block = min(64 * 1024, position)
+                position -= block
+                f.seek(position)
+                data = f.read(block) + data
+        lines = data.splitlines()
+        if position > 0:
+            # The first line is cut off where the last block started
+            lines = lines[1:]
+        return lines[-count:] if count > 0 else []
     
     def _sanitize_data(self, data: Optional[Dict]) -> Optional[Dict]:
         """Sanitize sensitive data from logs"""
@@ -181,8 +264,7 @@ class ActionLogger:
     
     def get_logs(self, limit: Optional[int] = None, log_type: Optional[str] = None) -> List[Dict]:
         """Get logs with optional filtering"""
-        with self.lock:
-            logs = list(self.logs)
+        logs = self._shared_logs()
         
         # Filter by type if specified
         if log_type:
@@ -196,8 +278,7 @@ class ActionLogger:
     
     def get_logs_for_video(self, video_id: str) -> List[Dict]:
         """Get logs for a specific video"""
-        with self.lock:
-            logs = [log for log in self.logs if log.get('video_id') == video_id]
+        logs = [log for log in self._shared_logs() if log.get('video_id') == video_id]
         
         return logs
     
@@ -205,12 +286,11 @@ class ActionLogger:
         """Get logs from the last N minutes"""
         cutoff_time = datetime.now().timestamp() - (minutes * 60)
         
-        with self.lock:
-            logs = []
-            for log in self.logs:
-                log_time = datetime.fromisoformat(log['timestamp']).timestamp()
-                if log_time >= cutoff_time:
-                    logs.append(log)
+        logs = []
+        for log in self._shared_logs():
+            log_time = datetime.fromisoformat(log['timestamp']).timestamp()
+            if log_time >= cutoff_time:
+                logs.append(log)
         
         return logs
     
@@ -218,38 +298,44 @@ class ActionLogger:
         """Clear all logs"""
         with self.lock:
             self.logs.clear()
+            try:
+                open(self.shared_log_path, 'w').close()
+                if self.previous_log_path.exists():
+                    self.previous_log_path.unlink()
+            except OSError:
+                pass
     
     def export_logs(self, file_path: Optional[str] = None) -> str:
         """Export logs to JSON file"""
         if not file_path:
             file_path = self.logs_dir / f"logs_{self.session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        with self.lock:
-            logs_data = {
-                "session_id": self.session_id,
-                "export_timestamp": datetime.now().isoformat(),
-                "total_logs": len(self.logs),
-                "logs": list(self.logs)
-            }
+        logs = self._shared_logs()
+        logs_data = {
+            "session_id": self.session_id,
+            "export_timestamp": datetime.now().isoformat(),
+            "total_logs": len(logs),
+            "logs": logs
+        }
         
         with open(file_path, 'w') as f:
-            json.dump(logs_data, f, indent=2)
+            json.dump(logs_data, f, indent=2, default=str)
         
         return str(file_path)
     
     def get_log_stats(self) -> Dict:
         """Get logging statistics"""
-        with self.lock:
-            total_logs = len(self.logs)
-            log_types = {}
-            log_levels = {}
+        logs = self._shared_logs()
+        total_logs = len(logs)
+        log_types = {}
+        log_levels = {}
+        
+        for log in logs:
+            log_type = log.get('type', 'unknown')
+            log_level = log.get('level', 'unknown')
             
-            for log in self.logs:
-                log_type = log.get('type', 'unknown')
-                log_level = log.get('level', 'unknown')
-                
-                log_types[log_type] = log_types.get(log_type, 0) + 1
-                log_levels[log_level] = log_levels.get(log_level, 0) + 1
+            log_types[log_type] = log_types.get(log_type, 0) + 1
+            log_levels[log_level] = log_levels.get(log_level, 0) + 1
         
         return {
             "total_logs": total_logs,
@@ -0,0 +1,156 @@
+"""
+Joint angle registry
+
+Every angle the processor measures is declared once here, with its landmarks,
+side, description and health range. compile_registry() turns the definitions
+into weight matrices over the 33 landmarks, so AngleCalculator evaluates all
+of them together in one vectorized pass; registering another angle adds a row
+to those matrices, not per-frame Python work.
+
+Angles are measured in the image plane (normalized x, y; y points down).
+
+spine_angle and head_angle are deviations from vertical: 0 deg when upright,
+roughly 0-15 deg in normal posture, matching their health ranges. Angle data
+files written before this registry hold values around 80-108 deg for these
+keys (3D coordinates, head measured against the downward axis), so the two
+are not comparable across that change. The registry also adds these and the
+ankle angles to every frame, which shifts the total-angle sum
+SimpleProcessor uses for its general most-extended/compressed key frames.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from landmark_store import LANDMARK_COUNT, LANDMARK_NAMES
+
+# Reference directions for vector angles, in image coordinates
+UP = (0.0, -1.0)
+DOWN = (0.0, 1.0)
+
+# A landmark index, or several whose midpoint is used
+Point = Union[int, Sequence[int]]
+
+
+class AngleDefinition:
+    """
+    One registered angle, either a joint triplet or a vector pair
+
+    joint=(first, vertex, second) measures the angle at the vertex between the
+    other two points. vector=(origin, target) with reference=(dx, dy) measures
+    the angle between the origin->target vector and a fixed direction. Points
+    are landmark indices, or tuples of indices standing for their midpoint.
+    """
+
+    def __init__(self, name: str, description: str, health_range: Dict,
+                 side: Optional[str] = None,
+                 joint: Optional[Tuple[Point, Point, Point]] = None,
+                 vector: Optional[Tuple[Point, Point]] = None,
+                 reference: Optional[Tuple[float, float]] = None):
+        if (joint is None) == (vector is None):
+            raise ValueError(f"Angle {name} needs either a joint triplet or a vector pair")
+        if vector is not None and reference is None:
+            raise ValueError(f"Vector angle {name} needs a reference direction")
+        self.name = name
+        self.description = description
+        self.health_range = health_range
+        self.side = side
+        self.joint = joint
+        self.vector = vector
+        self.reference = reference
+
+    def landmarks(self) -> List[int]:
+        """Indices of every landmark the angle depends on"""
+        points = self.joint if self.joint is not None else self.vector
+        return sorted({index for point in points for index in _indices(point)})
+
+
+ANGLE_REGISTRY = [
+    AngleDefinition('left_knee_angle', 'Left knee joint angle (hip-knee-ankle)',
+                    {'min': 160, 'max': 180, 'optimal': 170}, side='left', joint=(23, 25, 27)),
+    AngleDefinition('right_knee_angle', 'Right knee joint angle (hip-knee-ankle)',
+                    {'min': 160, 'max': 180, 'optimal': 170}, side='right', joint=(24, 26, 28)),
+    AngleDefinition('left_elbow_angle', 'Left elbow joint angle (shoulder-elbow-wrist)',
+                    {'min': 140, 'max': 180, 'optimal': 160}, side='left', joint=(11, 13, 15)),
+    AngleDefinition('right_elbow_angle', 'Right elbow joint angle (shoulder-elbow-wrist)',
+                    {'min': 140, 'max': 180, 'optimal': 160}, side='right', joint=(12, 14, 16)),
+    AngleDefinition('left_hip_angle', 'Left hip joint angle (shoulder-hip-knee)',
+                    {'min': 160, 'max': 180, 'optimal': 170}, side='left', joint=(11, 23, 25)),
+    AngleDefinition('right_hip_angle', 'Right hip joint angle (shoulder-hip-knee)',
+                    {'min': 160, 'max': 180, 'optimal': 170}, side='right', joint=(12, 24, 26)),
+    # Measured at the opposite shoulder, between the shoulder line and the upper arm's elbow
+    AngleDefinition('left_shoulder_angle', 'Left shoulder joint angle',
+                    {'min': 160, 'max': 180, 'optimal': 170}, side='left', joint=(11, 12, 13)),
+    AngleDefinition('right_shoulder_angle', 'Right shoulder joint angle',
+                    {'min': 160, 'max': 180, 'optimal': 170}, side='right', joint=(12, 11, 14)),
+    AngleDefinition('spine_angle', 'Spine alignment (hip midpoint to shoulder midpoint vs. vertical)',
+                    {'min': 0, 'max': 15, 'optimal': 5}, vector=((23, 24), (11, 12)), reference=UP),
+    AngleDefinition('head_angle', 'Head alignment (shoulder midpoint to nose vs. vertical)',
+                    {'min': 0, 'max': 20, 'optimal': 10}, vector=((11, 12), 0), reference=UP),
+    AngleDefinition('left_ankle_angle', 'Left ankle joint angle (knee-ankle-foot)',
+                    {'min': 80, 'max': 100, 'optimal': 90}, side='left', joint=(25, 27, 31)),
+    AngleDefinition('right_ankle_angle', 'Right ankle joint angle (knee-ankle-foot)',
+                    {'min': 80, 'max': 100, 'optimal': 90}, side='right', joint=(26, 28, 32)),
+]
+
+
+class CompiledRegistry:
+    """
+    Angle definitions as arrays: every angle is the angle between two vectors
+    u = first_weights @ points + first_offset and v = second_weights @ points + second_offset,
+    and counts only where all landmarks in its `uses` row are visible enough
+    """
+
+    def __init__(self, definitions: List[AngleDefinition]):
+        count = len(definitions)
+        self.names = [definition.name for definition in definitions]
+        self.first_weights = np.zeros((count, LANDMARK_COUNT))
+        self.second_weights = np.zeros((count, LANDMARK_COUNT))
+        self.first_offset = np.zeros((count, 2))
+        self.second_offset = np.zeros((count, 2))
+        self.uses = np.zeros((count, LANDMARK_COUNT), dtype=bool)
+
+        for row, definition in enumerate(definitions):
+            if definition.joint is not None:
+                first, vertex, second = definition.joint
+                _add_point(self.first_weights[row], first, 1.0)
+                _add_point(self.first_weights[row], vertex, -1.0)
+                _add_point(self.second_weights[row], second, 1.0)
+                _add_point(self.second_weights[row], vertex, -1.0)
+            else:
+                origin, target = definition.vector
+                _add_point(self.first_weights[row], target, 1.0)
+                _add_point(self.first_weights[row], origin, -1.0)
+                self.second_offset[row] = definition.reference
+            self.uses[row, definition.landmarks()] = True
+
+
+def compile_registry(definitions: Optional[List[AngleDefinition]] = None) -> CompiledRegistry:
+    """Compile the given definitions (the default registry if None) for AngleCalculator"""
+    definitions = ANGLE_REGISTRY if definitions is None else definitions
+    names = [definition.name for definition in definitions]
+    if len(set(names)) != len(names):
+        raise ValueError("Angle names in the registry must be unique")
+    return CompiledRegistry(definitions)
+
+
+def angle_descriptions(definitions: Optional[List[AngleDefinition]] = None) -> Dict[str, str]:
+    return {definition.name: definition.description
+            for definition in (ANGLE_REGISTRY if definitions is None else definitions)}
+
+
+def health_ranges(definitions: Optional[List[AngleDefinition]] = None) -> Dict[str, Dict]:
+    return {definition.name: dict(definition.health_range)
+            for definition in (ANGLE_REGISTRY if definitions is None else definitions)}
+
+
+def _indices(point: Point) -> List[int]:
+    indices = [point] if isinstance(point, int) else list(point)
+    for index in indices:
+        if not 0 <= index < LANDMARK_COUNT:
+            raise ValueError(f"Unknown landmark index {index}; there are {len(LANDMARK_NAMES)}")
+    return indices
+
+
+def _add_point(weights: np.ndarray, point: Point, sign: float):
+    """Add +/- the point (a landmark or the midpoint of several) to a weight row"""
+    indices = _indices(point)
+    for index in indices:
+        weights[index] += sign / len(indices)
@@ -0,0 +1,123 @@
+"""
+Streaming angle summary statistics
+
+RunningAngleStats keeps count, mean and variance (Welford's algorithm, with
+Chan's formula to fold in whole batches), min, max and a histogram per angle,
+so the summary of a timeline is ready as soon as its last frames are added
+and never needs another scan over angle_data.
+"""
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+# Percentiles reported in the summary, read from the histogram
+SUMMARY_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class RunningAngleStats:
+    """
+    Per-angle accumulators fed with (frames, angles) batches, NaN where an angle
+    was not measured. Percentiles come from histogram_bins equal bins over
+    value_range, so they are accurate to a bin width (1 degree by default).
+    """
+
+    def __init__(self, names: Sequence[str], histogram_bins: int = 180,
+                 value_range: tuple = (0.0, 180.0)):
+        self.names = list(names)
+        count = len(self.names)
+        self.count = np.zeros(count, dtype=np.int64)
+        self.mean = np.zeros(count)
+        self.m2 = np.zeros(count)  # Sum of squared differences from the mean
+        self.min = np.full(count, np.inf)
+        self.max = np.full(count, -np.inf)
+        self.value_range = value_range
+        self.histogram = np.zeros((count, histogram_bins), dtype=np.int64)
+
+    def update(self, values: np.ndarray):
+        """Add a batch of frames, shape (frames, angles) in the order of names"""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.names))
+        measured = ~np.isnan(values)
+        batch_count = measured.sum(axis=0)
+        if not batch_count.any():
+            return
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            batch_mean = np.where(measured, values, 0.0).sum(axis=0) / batch_count
+            batch_m2 = np.where(measured, (values - batch_mean) ** 2, 0.0).sum(axis=0)
+        self._combine(batch_count, np.nan_to_num(batch_mean), batch_m2)
+
+        self.min = np.minimum(self.min, np.where(measured, values, np.inf).min(axis=0))
+        self.max = np.maximum(self.max, np.where(measured, values, -np.inf).max(axis=0))
+
+        # One bincount over (angle, bin) pairs fills every histogram at once
+        bins = self.histogram.shape[1]
+        low, high = self.value_range
+        rows, columns = np.nonzero(measured)
+        bin_index = np.clip(((values[rows, columns] - low) / (high - low) * bins).astype(np.int64), 0, bins - 1)
+        self.histogram += np.bincount(columns * bins + bin_index,
+                                      minlength=self.histogram.size).reshape(self.histogram.shape)
+
+    def merge(self, other: 'RunningAngleStats'):
+        """Fold in the accumulators of another part of the same timeline (same names and bins)"""
+        self._combine(other.count, other.mean, other.m2)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.histogram += other.histogram
+
+    def percentile(self, q: float) -> np.ndarray:
+        """Approximate q-th percentile of every angle, interpolated inside the histogram bin"""
+        bins = self.histogram.shape[1]
+        low, high = self.value_range
+        width = (high - low) / bins
+        cumulative = np.cumsum(self.histogram, axis=1)
+        target = q / 100.0 * self.count
+        result = np.full(len(self.names), np.nan)
+        for i in np.flatnonzero(self.count):
+            index = min(int(np.searchsorted(cumulative[i], target[i])), bins - 1)
+            before = cumulative[i, index - 1] if index else 0
+            inside = self.histogram[i, index]
+            fraction = (target[i] - before) / inside if inside else 0.0
+            # Clamped to the observed values, which the bin edges may overshoot
+            result[i] = min(max(low + (index + fraction) * width, self.min[i]), self.max[i])
+        return result
+
+    def summary(self, percentiles: Optional[Sequence[int]] = SUMMARY_PERCENTILES) -> Dict[str, Dict]:
+        """{angle: {mean, std, min, max, count, range, p10, ...}} for every angle that was measured"""
+        percentile_values = {q: self.percentile(q) for q in (percentiles or ())}
+        summary = {}
+        for i, name in enumerate(self.names):
+            if not self.count[i]:
+                continue
+            summary[name] = {
+                'mean': float(self.mean[i]),
+                'std': float(np.sqrt(self.m2[i] / self.count[i])),
+                'min': float(self.min[i]),
+                'max': float(self.max[i]),
+                'count': int(self.count[i]),
+                'range': float(self.max[i] - self.min[i]),
+                **{f'p{q}': float(values[i]) for q, values in percentile_values.items()}
+            }
+        return summary
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray):
+        # Chan et al.: merge two (count, mean, M2) sets without revisiting their values
+        total = self.count + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean - self.mean
+            self.mean = np.where(total > 0, self.mean + delta * count / total, 0.0)
+            self.m2 = np.where(total > 0, self.m2 + m2 + delta ** 2 * self.count * count / total, 0.0)
+        self.count = total
+
+
+def summarize_angle_data(angle_data: List[Dict]) -> Dict[str, Dict]:
+    """Summary of an angle_data list in one scan, for timelines without a stored summary"""
+    names = sorted({name for frame_data in angle_data for name in frame_data.get('angles', {})})
+    if not names:
+        return {}
+    column = {name: i for i, name in enumerate(names)}
+    values = np.full((len(angle_data), len(names)), np.nan)
+    for row, frame_data in enumerate(angle_data):
+        for name, value in frame_data.get('angles', {}).items():
+            values[row, column[name]] = value
+    stats = RunningAngleStats(names)
+    stats.update(values)
+    return stats.summary()
@@ -0,0 +1,112 @@
+import queue
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# Marks the end of the frame stream as it moves through the stage queues
+_END_OF_STREAM = object()
+
+
+class FramePipeline:
+    """
+    Run a frame source and a chain of processing stages on separate threads
+
+    Stages are connected by bounded queues, so at most `queue_size` items wait
+    between any two stages and memory stays fixed no matter how long the video
+    is. Items keep their order because every stage runs on exactly one thread.
+
+    Each stage is `(name, func)` or `(name, func, flush)`. `func` returns the item
+    to pass on, None to drop it, or a list to pass on several; the optional
+    `flush()` is called at the end of the stream and returns a list of items
+    the stage was still holding back.
+    """
+
+    def __init__(self, source: Iterable, stages: List[Tuple], queue_size: int = 8):
+        self.source = source
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_stage: Optional[str] = None
+        self._error_lock = threading.Lock()
+
+    def run(self):
+        """Run the pipeline to completion, re-raising the first stage error"""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+
+        threads = [threading.Thread(
+            target=self._run_source, args=(queues[0],), name="pipeline-source", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            name, func = stage[0], stage[1]
+            flush = stage[2] if len(stage) > 2 else None
+            outbox = queues[i + 1] if i + 1 < len(queues) else None
+            threads.append(threading.Thread(
+                target=self._run_stage, args=(name, func, flush, queues[i], outbox),
+                name=f"pipeline-{name}", daemon=True))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise RuntimeError(
+                f"Pipeline stage '{self._error_stage}' failed: {self._error}") from self._error
+
+    def _run_source(self, outbox: queue.Queue):
+        try:
+            for item in self.source:
+                if not self._put(outbox, item):
+                    return
+        except BaseException as e:
+            self._fail("source", e)
+        finally:
+            self._put(outbox, _END_OF_STREAM, force=True)
+
+    def _run_stage(self, name: str, func: Callable, flush: Optional[Callable],
+                   inbox: queue.Queue, outbox: Optional[queue.Queue]):
+        ended = False
+        try:
+            while True:
+                item = inbox.get()
+                if item is _END_OF_STREAM:
+                    ended = True
+                    break
+                if self._stop.is_set():
+                    # Keep draining so the upstream stage never blocks on a full queue
+                    continue
+                self._emit(outbox, func(item))
+            if flush is not None and not self._stop.is_set():
+                self._emit(outbox, flush())
+        except BaseException as e:
+            self._fail(name, e)
+            # Drain until the end marker arrives so upstream threads can exit
+            while not ended:
+                ended = inbox.get() is _END_OF_STREAM
+        finally:
+            if outbox is not None:
+                self._put(outbox, _END_OF_STREAM, force=True)
+
+    def _emit(self, outbox: Optional[queue.Queue], result):
+        if outbox is None or result is None:
+            return
+        for item in (result if isinstance(result, list) else [result]):
+            if not self._put(outbox, item):
+                return
+
+    def _put(self, outbox: queue.Queue, item, force: bool = False) -> bool:
+        """Block until there is room downstream; give up early once stopped unless forced"""
+        while True:
+            if self._stop.is_set() and not force:
+                return False
+            try:
+                outbox.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+    def _fail(self, stage: str, error: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+                self._error_stage = stage
+        self._stop.set()
@@ -0,0 +1,340 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    message TEXT,
+    progress TEXT,
+    exclusive_key TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_at REAL NOT NULL,
+    lease_until REAL,
+    worker_id TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, run_at);
+CREATE INDEX IF NOT EXISTS jobs_video ON jobs (video_id, created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_key ON jobs (idempotency_key)
+    WHERE state IN ('queued', 'running', 'completed');
+"""
+
+# Created after the column migrations, since older databases lack exclusive_key
+_EXCLUSIVE_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_exclusive ON jobs (exclusive_key)
+    WHERE state IN ('queued', 'running') AND exclusive_key IS NOT NULL;
+"""
+
+
+class JobQueue:
+    """
+    Durable job queue stored in SQLite
+
+    Jobs survive restarts and can be shared by every process on the machine.
+    Submitting the same kind/video/parameters again returns the existing job
+    instead of queueing a duplicate, and jobs given the same exclusive key
+    (e.g. everything that writes one video's outputs) never run at the same
+    time. A worker claims a job with a lease that a
+    heartbeat keeps extending; if the worker dies the lease runs out and the
+    job is picked up again. Failed jobs are retried with exponential backoff
+    up to max_attempts, and finished jobs are deleted after the TTL.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 3, retry_backoff_seconds: float = 10.0,
+                 lease_seconds: float = 60.0, finished_ttl_seconds: float = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self._handlers: Dict[str, Callable] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            columns = [row["name"] for row in db.execute("PRAGMA table_info(jobs)")]
+            if "progress" not in columns:
+                # Databases created before progress reporting
+                db.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+            if "exclusive_key" not in columns:
+                db.execute("ALTER TABLE jobs ADD COLUMN exclusive_key TEXT")
+            db.executescript(_EXCLUSIVE_INDEX)
+
+    def register(self, kind: str, handler: Callable):
+        """
+        handler(job, progress) runs the job and returns a JSON-serializable result dict;
+        raising retries it. progress(update) records a progress dict on the job.
+        """
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, video_id: str, params: Dict, payload: Optional[Dict] = None,
+               exclusive_key: Optional[str] = None) -> Dict:
+        """
+        Queue a job unless one with the same kind, video_id and params is already
+        queued, running or completed. `params` identify the job; `payload` carries
+        extra data for the handler (e.g. a signed URL) that doesn't change its identity.
+        While another job with the same `exclusive_key` is queued or running, that
+        job is returned instead of queueing a new one.
+        """
+        key = self._idempotency_key(kind, video_id, params)
+        now = time.time()
+        job_id = str(uuid.uuid4())
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "INSERT OR IGNORE INTO jobs (id, idempotency_key, kind, video_id, state, payload,"
+                " exclusive_key, max_attempts, run_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, key, kind, video_id, QUEUED, json.dumps({**params, **(payload or {})}),
+                 exclusive_key, self.max_attempts, now, now, now))
+            row = db.execute(
+                "SELECT * FROM jobs WHERE idempotency_key = ? AND state IN (?, ?, ?)",
+                (key, QUEUED, RUNNING, COMPLETED)).fetchone()
+            if row is None:
+                # Blocked by a different job holding the exclusive key
+                row = db.execute(
+                    "SELECT * FROM jobs WHERE exclusive_key = ? AND state IN (?, ?)",
+                    (exclusive_key, QUEUED, RUNNING)).fetchone()
+        job = self._to_dict(row)
+        job["created"] = job["id"] == job_id
+        return job
+
+    def expire(self, job_id: str):
+        """
+        Forget a completed job, e.g. when the file it produced has been deleted since,
+        so submitting the same kind/video/params queues a fresh run
+        """
+        with self._connect() as db:
+            db.execute("DELETE FROM jobs WHERE id = ? AND state = ?", (job_id, COMPLETED))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def latest_for_video(self, video_id: str, kinds: Optional[List[str]] = None) -> Optional[Dict]:
+        """Most recently submitted job for a video, optionally only of the given kinds"""
+        query = "SELECT * FROM jobs WHERE video_id = ?"
+        args = [video_id]
+        if kinds:
+            query += f" AND kind IN ({','.join('?' * len(kinds))})"
+            args.extend(kinds)
+        with self._connect() as db:
+            row = db.execute(query + " ORDER BY created_at DESC LIMIT 1", args).fetchone()
+        return self._to_dict(row) if row else None
+
+    def start(self, workers: int, worker_name: str = "job-worker"):
+        """Start worker threads that claim and run jobs from the queue"""
+        self._stop.clear()
+        for i in range(workers):
+            thread = threading.Thread(
+                target=self._work, args=(f"{worker_name}-{uuid.uuid4().hex[:8]}",),
+                name=f"{worker_name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop claiming jobs and wait for running ones to finish"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Take the next due job, including running jobs whose worker lost its lease"""
+        now = time.time()
+        kinds = list(self._handlers)
+        if not kinds:
+            return None
+        placeholders = ",".join("?" * len(kinds))
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            while True:
+                row = db.execute(
+                    f"SELECT id, state, attempts, max_attempts FROM jobs WHERE kind IN ({placeholders}) AND"
+                    " ((state = ? AND run_at <= ?) OR (state = ? AND lease_until < ?))"
+                    " ORDER BY run_at LIMIT 1",
+                    (*kinds, QUEUED, now, RUNNING, now)).fetchone()
+                if row is None:
+                    return None
+                if row["state"] == RUNNING and row["attempts"] >= row["max_attempts"]:
+                    # The job keeps taking its worker down with it; stop retrying
+                    db.execute(
+                        "UPDATE jobs SET state = ?, message = ?, lease_until = NULL,"
+                        " finished_at = ?, updated_at = ? WHERE id = ?",
+                        (FAILED, "Worker stopped responding", now, now, row["id"]))
+                    continue
+                break
+            db.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_until = ?, worker_id = ?,"
+                " progress = NULL, started_at = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, now + self.lease_seconds, worker_id, now, now, row["id"]))
+            claimed = db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return self._to_dict(claimed)
+
+    def complete(self, job: Dict, result: Optional[Dict] = None):
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET state = ?, result = ?, message = ?, lease_until = NULL,"
+                " finished_at = ?, updated_at = ? WHERE id = ? AND worker_id = ?",
+                (COMPLETED, json.dumps(result or {}), (result or {}).get("message"),
+                 now, now, job["id"], job["worker_id"]))
+
+    def fail(self, job: Dict, error: str):
+        """Schedule a retry with exponential backoff, or mark the job failed for good"""
+        now = time.time()
+        with self._connect() as db:
+            if job["attempts"] < job["max_attempts"]:
+                delay = self.retry_backoff_seconds * (2 ** (job["attempts"] - 1))
+                db.execute(
+                    "UPDATE jobs SET state = ?, message = ?, run_at = ?, lease_until = NULL,"
+                    " updated_at = ? WHERE id = ? AND worker_id = ?",
+                    (QUEUED, f"Attempt {job['attempts']} failed, retrying: {error}",
+                     now + delay, now, job["id"], job["worker_id"]))
+            else:
+                db.execute(
+                    "UPDATE jobs SET state = ?, message = ?, lease_until = NULL,"
+                    " finished_at = ?, updated_at = ? WHERE id = ? AND worker_id = ?",
+                    (FAILED, error, now, now, job["id"], job["worker_id"]))
+
+    def update_message(self, job: Dict, message: str):
+        """Record a progress message on a running job"""
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET message = ?, updated_at = ? WHERE id = ?",
+                       (message, time.time(), job["id"]))
+
+    def update_progress(self, job: Dict, progress: Dict):
+        """Record structured progress (stage, frame counts, ETA) on a running job"""
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ? AND worker_id = ? AND state = ?",
+                (json.dumps(progress), time.time(), job["id"], job["worker_id"], RUNNING))
+
+    def cleanup(self) -> int:
+        """Delete finished jobs older than the TTL; returns how many were removed"""
+        cutoff = time.time() - self.finished_ttl_seconds
+        with self._connect() as db:
+            cursor = db.execute(
+                "DELETE FROM jobs WHERE state IN (?, ?) AND finished_at < ?",
+                (COMPLETED, FAILED, cutoff))
+        return cursor.rowcount
+
+    def _work(self, worker_id: str):
+        last_cleanup = 0.0
+        while not self._stop.is_set():
+            if time.time() - last_cleanup > 3600:
+                last_cleanup = time.time()
+                try:
+                    removed = self.cleanup()
+                    if removed:
+                        print(f"Job queue: removed {removed} expired jobs")
+                except sqlite3.Error as e:
+                    print(f"Job queue cleanup failed: {e}")
+
+            try:
+                job = self.claim(worker_id)
+            except sqlite3.Error as e:
+                print(f"Job queue claim failed: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(1.0)
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict):
+        handler = self._handlers[job["kind"]]
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job, heartbeat_stop), daemon=True)
+        heartbeat.start()
+        try:
+            print(f"Job {job['id']} ({job['kind']} for {job['video_id']}) attempt {job['attempts']}")
+            result = handler(job, lambda progress: self._report_progress(job, progress))
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            self.fail(job, str(e))
+        else:
+            self.complete(job, result)
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+
+    def _report_progress(self, job: Dict, progress: Dict):
+        try:
+            self.update_progress(job, progress)
+        except sqlite3.Error as e:
+            # A busy database shouldn't fail the job over a progress update
+            print(f"Job {job['id']} progress update failed: {e}")
+
+    def _heartbeat(self, job: Dict, stop: threading.Event):
+        """Keep extending the lease while the handler runs"""
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                with self._connect() as db:
+                    db.execute(
+                        "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker_id = ? AND state = ?",
+                        (time.time() + self.lease_seconds, job["id"], job["worker_id"], RUNNING))
+            except sqlite3.Error as e:
+                print(f"Job {job['id']} heartbeat failed: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return _AutoClosing(db)
+
+    @staticmethod
+    def _idempotency_key(kind: str, video_id: str, params: Dict) -> str:
+        encoded = json.dumps(params, sort_keys=True, default=str)
+        return f"{kind}:{video_id}:{hashlib.sha256(encoded.encode()).hexdigest()[:16]}"
+
+    @staticmethod
+    def _to_dict(row) -> Dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["progress"] = json.loads(job["progress"]) if job["progress"] else None
+        return job
+
+
+class _AutoClosing:
+    """Connection wrapper whose `with` block commits an open transaction and closes the connection"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self._db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self._db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._db.in_transaction:
+                if exc_type is None:
+                    self._db.commit()
+                else:
+                    self._db.rollback()
+        finally:
+            self._db.close()
@@ -0,0 +1,375 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+from dotenv import load_dotenv
+from action_logger import action_logger
+from job_queue import JobQueue
+from key_frame_extractor import KeyFrameExtractor
+from landmark_store import landmarks_path, load_video_landmarks
+from progressive_download import ProgressiveDownload, ProgressiveVideoCapture
+from simple_processor import SimpleProcessor
+from supabase_storage import create_storage_from_env
+from two_stage_claude_analyzer import TwoStageClaudeAnalyzer
+
+# Load environment variables before any configuration below is read
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Shared by the API and the worker processes
+UPLOAD_DIR = Path("uploads")
+OUTPUT_DIR = Path("outputs")
+UPLOAD_DIR.mkdir(exist_ok=True)
+OUTPUT_DIR.mkdir(exist_ok=True)
+
+# Videos processed at the same time per worker process; also the number of warm Pose graphs kept ready
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", "2"))
+
+# KEY_FRAME_SELECTION: 'motion' picks the key frames from the angle timeline, 'uniform' at fixed
+# positions; the pose pass captures the frames (or motion candidates) so analysis needn't decode again
+KEY_FRAME_BUDGET = int(os.getenv("KEY_FRAME_BUDGET", "5"))
+KEY_FRAME_SELECTION = os.getenv("KEY_FRAME_SELECTION", "motion")
+
+# SEGMENT_WORKERS caps the worker processes used to split long videos (defaults to the CPU count)
+# VIDEO_ENCODER selects 'ffmpeg' (single-pass libx264) or 'opencv' (mp4v + MoviePy re-encode)
+processor = SimpleProcessor(
+    segment_workers=int(os.getenv("SEGMENT_WORKERS")) if os.getenv("SEGMENT_WORKERS") else None,
+    encoder=os.getenv("VIDEO_ENCODER", "ffmpeg"),
+    x264_preset=os.getenv("X264_PRESET", "veryfast"),
+    x264_crf=int(os.getenv("X264_CRF", "23")),
+    encoder_threads=int(os.getenv("ENCODER_THREADS", "0")),
+    # Pose inference runs on a copy downscaled to this long edge (0 = full resolution)
+    inference_long_edge=int(os.getenv("INFERENCE_LONG_EDGE", "640")),
+    # Run pose inference on every Nth frame and interpolate the rest (1 = every frame)
+    inference_stride=int(os.getenv("INFERENCE_STRIDE", "1")),
+    stride_motion_threshold=float(os.getenv("STRIDE_MOTION_THRESHOLD", "0.05")),
+    pose_pool_size=PROCESSING_WORKERS,
+    key_frame_budget=KEY_FRAME_BUDGET,
+    key_frame_selection=KEY_FRAME_SELECTION)
+
+key_frame_extractor = KeyFrameExtractor(
+    max_frames=KEY_FRAME_BUDGET,
+    selection=KEY_FRAME_SELECTION)
+# KEY_FRAME_CONTACT_SHEET=1 attaches the key frames to the structured analysis as one tiled image of
+# CONTACT_SHEET_LONG_EDGE pixels (about 1,600 input tokens per analysis at the default); off by
+# default, in which case the analysis is sent without images
+two_stage_claude_analyzer = TwoStageClaudeAnalyzer(
+    contact_sheet=os.getenv("KEY_FRAME_CONTACT_SHEET", "0") == "1",
+    contact_sheet_columns=int(os.getenv("CONTACT_SHEET_COLUMNS", "3")),
+    contact_sheet_long_edge=int(os.getenv("CONTACT_SHEET_LONG_EDGE", "1568")))
+
+# Shared Supabase Storage client (None without credentials); keeps its connections alive across jobs
+supabase_storage = create_storage_from_env()
+
+
+def create_job_queue() -> JobQueue:
+    """The durable job queue every API and worker process on this machine shares"""
+    return JobQueue(
+        os.getenv("JOB_DB_PATH", "jobs.db"),
+        max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+        retry_backoff_seconds=float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "10")),
+        finished_ttl_seconds=float(os.getenv("JOB_TTL_HOURS", "168")) * 3600)
+
+
+def register_handlers(job_queue: JobQueue):
+    """Let job_queue run every job kind on this process"""
+    job_queue.register("process_video", run_process_video_job)
+    job_queue.register("process_supabase_video", run_supabase_video_job)
+    job_queue.register("render_overlay", run_render_overlay_job)
+    job_queue.register("two_stage_analysis", run_two_stage_analysis_job)
+
+
+def run_process_video_job(job: dict, progress) -> dict:
+    """Run MediaPipe processing for an uploaded video"""
+    video_id = job["video_id"]
+    analysis_only = job["payload"].get("analysis_only", False)
+    video_path = UPLOAD_DIR / f"{video_id}.mp4"
+
+    logger.info(f"Starting processing for video {video_id}")
+    action_logger.log_processing_step(
+        "VIDEO_PROCESSING", video_id, "started")
+
+    try:
+        # Process video
+        output_file_path = OUTPUT_DIR / f"{video_id}_output.mp4"
+        success, actual_output_path = processor.process_video(
+            str(video_path), str(output_file_path),
+            render_overlay=not analysis_only, progress=progress)
+        if not success:
+            raise RuntimeError("Processing failed")
+        if analysis_only:
+            # An overlay from an earlier run no longer matches the new landmarks; it is
+            # rendered again on demand
+            output_file_path.unlink(missing_ok=True)
+    except Exception as e:
+        logger.error(f"Error processing video {video_id}: {e}")
+        action_logger.log_error("VIDEO_PROCESSING_FAILED", str(e), {
+                                "video_id": video_id})
+        raise
+
+    action_logger.log_processing_step(
+        "VIDEO_PROCESSING", video_id, "completed")
+    logger.info(f"Processing completed for video {video_id}")
+
+    return {
+        "message": "Processing completed successfully",
+        "output_path": actual_output_path or None,
+        "analysis_only": analysis_only
+    }
+
+
+def run_render_overlay_job(job: dict, progress) -> dict:
+    """Render the overlay video of an analysis-only job from its stored landmarks"""
+    video_id = job["video_id"]
+    video_path = UPLOAD_DIR / f"{video_id}.mp4"
+    processed_path = OUTPUT_DIR / f"{video_id}_output.mp4"
+    angle_file = OUTPUT_DIR / f"{video_id}_output_angles.json"
+
+    logger.info(f"Rendering overlay video on demand for {video_id}")
+    action_logger.log_processing_step(
+        "OVERLAY_RENDER", video_id, "started")
+    success, output_path = processor.render_overlay_video(
+        str(video_path), str(processed_path), str(angle_file), progress=progress)
+    if not success:
+        action_logger.log_error("OVERLAY_RENDER_FAILED", "Overlay render failed", {
+                                "video_id": video_id})
+        raise RuntimeError("Overlay render failed")
+
+    return {"message": "Overlay video rendered", "output_path": output_path}
+
+
+def run_two_stage_analysis_job(job: dict, progress) -> dict:
+    """Extract key frames and run the two-stage Claude analysis, saving the result next to the angle data"""
+    video_id = job["video_id"]
+    video_path = UPLOAD_DIR / f"{video_id}.mp4"
+    angle_file = OUTPUT_DIR / f"{video_id}_output_angles.json"
+
+    # Log file operations
+    action_logger.log_file_operation(
+        "READ", angle_file, True, angle_file.stat().st_size)
+
+    # Create key frames directory
+    key_frames_dir = OUTPUT_DIR / f"{video_id}_key_frames"
+    key_frames_dir.mkdir(exist_ok=True)
+    action_logger.log_file_operation("CREATE_DIR", key_frames_dir, True)
+
+    # Load angle data
+    with open(angle_file, 'r') as f:
+        angle_data_raw = json.load(f)
+
+    angle_data = angle_data_raw.get('angle_data', [])
+
+    # Extract key frames with pose data
+    progress({"stage": "extracting_key_frames"})
+    action_logger.log_processing_step(
+        "KEY_FRAME_EXTRACTION", video_id, "started")
+    analysis_package = key_frame_extractor.create_analysis_package(
+        str(video_path),
+        angle_data,
+        str(key_frames_dir),
+        load_video_landmarks(angle_file, angle_data_raw)[0],
+        # Summarized while the angles were computed, so the timeline isn't scanned again
+        angle_data_raw.get('angle_summary')
+    )
+    action_logger.log_processing_step(
+        "KEY_FRAME_EXTRACTION", video_id, "completed")
+
+    if analysis_package.get('error'):
+        action_logger.log_error(
+            "KEY_FRAME_EXTRACTION_FAILED", analysis_package['error'], {"video_id": video_id})
+        raise RuntimeError(f"Key frame extraction failed: {analysis_package['error']}")
+
+    # Perform two-stage analysis
+    progress({"stage": "analyzing"})
+    analysis_result = two_stage_claude_analyzer.analyze_video_comprehensive(
+        analysis_package
+    )
+
+    # The analyzer reports failures (e.g. a rejected API key) in the result; raising
+    # lets the queue retry, and keeps the error from being saved as the analysis
+    if analysis_result.get('error'):
+        raise RuntimeError(f"Two-stage analysis failed: {analysis_result['error']}")
+
+    # Save analysis result; written to a temporary name first so readers never see a partial file
+    analysis_file = OUTPUT_DIR / f"{video_id}_two_stage_analysis.json"
+    partial_file = analysis_file.with_name(analysis_file.name + ".part")
+    with open(partial_file, 'w') as f:
+        json.dump(analysis_result, f, indent=2)
+    os.replace(partial_file, analysis_file)
+
+    action_logger.log_file_operation(
+        "WRITE", analysis_file, True, analysis_file.stat().st_size)
+
+    return {
+        "message": "Two-stage analysis completed successfully",
+        "key_frames_count": len(analysis_package.get('key_frames', []))
+    }
+
+
+def processed_storage_prefix(storage_path: Optional[str], session_id: Optional[str]) -> str:
+    """Bucket folder for a session's processed artifacts, next to the user's original upload"""
+    # Extract user_id from original storage_path if available
+    user_id = storage_path.split('/')[0] if storage_path else 'unknown'
+    return f"{user_id}/processed/{session_id}"
+
+
+def processed_artifact_uploads(video_id: str, prefix: str, processed_video_path: Optional[Path]) -> list:
+    """(local_path, remote_path) pairs for the processed video, angle data and key frames"""
+    uploads = []
+    if processed_video_path is not None and processed_video_path.exists():
+        uploads.append(
+            (processed_video_path, f"{prefix}/{video_id}_processed.mp4"))
+
+    angle_file = OUTPUT_DIR / f"{video_id}_output_angles.json"
+    if angle_file.exists():
+        uploads.append((angle_file, f"{prefix}/{video_id}_angles.json"))
+
+    landmark_file = landmarks_path(angle_file)
+    if landmark_file.exists():
+        uploads.append((landmark_file, f"{prefix}/{landmark_file.name}"))
+
+    key_frames_dir = OUTPUT_DIR / f"{video_id}_key_frames"
+    if key_frames_dir.is_dir():
+        for image_path in sorted(key_frames_dir.glob("*.jpg")):
+            uploads.append(
+                (image_path, f"{prefix}/{video_id}_key_frames/{image_path.name}"))
+    return uploads
+
+
+def run_supabase_video_job(job: dict, progress) -> dict:
+    """Download a video from Supabase, process it, and upload results back to Supabase"""
+    video_id = job["video_id"]
+    payload = job["payload"]
+    video_url = payload["video_url"]  # Signed URL from Supabase
+    storage_path = payload.get("storage_path")
+    session_id = payload.get("session_id")
+    rotation = payload.get("rotation", 0)
+    segmented = payload.get("segmented")
+    analysis_only = payload.get("analysis_only", False)
+
+    import requests
+
+    logger.info(
+        f"Starting processing for Supabase video {video_id}")
+
+    # Step 1: Stream the video from Supabase to a local file; it keeps
+    # downloading in the background while processing starts
+    temp_video_path = UPLOAD_DIR / f"{video_id}.mp4"
+    progress({"stage": "downloading"})
+    download = ProgressiveDownload(video_url, str(temp_video_path))
+    download.start_in_thread()
+    logger.info(f"Downloading video to: {temp_video_path}")
+
+    # Step 2: Process video with MediaPipe
+    output_file_path = OUTPUT_DIR / f"{video_id}_output.mp4"
+    logger.info(
+        f"Processing video with rotation: {rotation} degrees")
+
+    # A faststart MP4 can be decoded while it downloads; otherwise (or when
+    # segmented mode is requested) wait for the whole file
+    capture = None
+    if segmented is not True and download.moov_before_mdat():
+        logger.info("Decoding video while it downloads")
+        capture = ProgressiveVideoCapture(download)
+    else:
+        download.wait_until_done()
+        logger.info(f"Downloaded video to: {temp_video_path}")
+
+    success, actual_output_path = processor.process_video(
+        str(temp_video_path), str(output_file_path), rotation=rotation,
+        segmented=segmented, render_overlay=not analysis_only, capture=capture,
+        progress=progress)
+    # Surface a download that failed after decoding stopped
+    download.wait_until_done()
+    if not success:
+        raise RuntimeError("Video processing failed")
+
+    # Step 3: Upload the processed video, angle data and any key frames
+    # back to Supabase in parallel
+    processed_video_path = Path(
+        actual_output_path) if actual_output_path else None
+    processed_prefix = processed_storage_prefix(storage_path, session_id)
+    processed_storage_path = f"{processed_prefix}/{video_id}_processed.mp4"
+    processed_video_url = None  # Initialize as None to track success
+    uploaded_artifacts = []
+
+    if analysis_only:
+        # No video to upload yet; the stream endpoint renders the overlay on first view
+        logger.info(
+            "Analysis-only processing, overlay will render on demand")
+    elif not (processed_video_path and processed_video_path.exists()):
+        logger.warn(
+            "⚠️ Processed video file not found, using backend stream")
+
+    artifacts = processed_artifact_uploads(
+        video_id, processed_prefix, processed_video_path)
+    if artifacts and supabase_storage is None:
+        logger.warn("❌ Missing Supabase credentials")
+    elif artifacts:
+        progress({"stage": "uploading"})
+        logger.info(
+            f"Uploading {len(artifacts)} processed artifacts to patient_videos bucket: {processed_prefix}")
+        upload_results = supabase_storage.upload_files(artifacts)
+        for remote_path, error in upload_results.items():
+            if error is None:
+                uploaded_artifacts.append(remote_path)
+                logger.info(f"✅ Uploaded {remote_path}")
+            else:
+                logger.warn(
+                    f"❌ Failed to upload {remote_path} to Supabase: {error}")
+
+        if processed_storage_path in uploaded_artifacts:
+            try:
+                processed_video_url = supabase_storage.create_signed_url(
+                    processed_storage_path,
+                    60 * 60 * 24  # 24 hours
+                )
+                logger.info(
+                    f"✅ Successfully got Supabase signed URL: {processed_video_url}")
+            except Exception as sign_error:
+                logger.error(
+                    f"❌ Failed to create signed URL for {processed_storage_path}: {sign_error}")
+
+    # Only fall back to localhost if Supabase failed or there is no video yet
+    if not processed_video_url:
+        processed_video_url = f"http://localhost:8001/api/stream/{video_id}"
+        if not analysis_only:
+            logger.warn(
+                f"⚠️ Using localhost fallback URL: {processed_video_url}")
+
+    # Update session with processed video URL (postvidurl)
+    if session_id and processed_video_url:
+        try:
+            logger.info(
+                f"🔄 Updating session {session_id} with postvidurl: {processed_video_url}")
+            session_update = requests.put(
+                f"http://localhost:3000/api/sessions/{session_id}",
+                json={"postvidurl": processed_video_url},
+                headers={"Content-Type": "application/json"}
+            )
+            if session_update.status_code == 200:
+                logger.info(
+                    f"✅ Updated session {session_id} with processed video URL")
+            else:
+                logger.warn(
+                    f"❌ Failed to update session {session_id}: {session_update.text}")
+        except Exception as e:
+            logger.warn(
+                f"❌ Error updating session with processed video URL: {e}")
+    elif session_id:
+        logger.warn(
+            f"⚠️ Not updating session {session_id} - no valid processed video URL")
+
+    logger.info(
+        f"Processing completed for Supabase video {video_id}")
+
+    return {
+        "message": "Processing completed successfully",
+        "original_url": video_url,
+        "processed_video_url": processed_video_url,
+        "output_path": str(actual_output_path) if actual_output_path else None,
+        "uploaded_artifacts": uploaded_artifacts,
+        "analysis_only": analysis_only
+    }
@@ -2,10 +2,269 @@ import cv2
 import numpy as np
 import json
 import base64
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Optional
+from angle_statistics import summarize_angle_data
 from datetime import datetime
 import os
-from pathlib import Path
+
+# Written next to the key frame images when they were captured during pose processing
+CAPTURED_MANIFEST = 'key_frames.json'
+
+# Key frames are sent to the vision model at this size: a long edge within its recommended
+# limit keeps detail while cutting image tokens, and JPEG quality 85 is visually lossless
+KEY_FRAME_LONG_EDGE = 1024
+KEY_FRAME_JPEG_QUALITY = 85
+
+# With motion selection the pose pass keeps this many evenly spaced candidate frames per
+# key frame, and the key frames are chosen among them once the angle timeline is known
+CANDIDATES_PER_KEY_FRAME = 8
+
+
+def encode_key_frame(frame, long_edge: int = KEY_FRAME_LONG_EDGE,
+                     quality: int = KEY_FRAME_JPEG_QUALITY) -> bytes:
+    """JPEG-encode a frame in memory, downscaled so its long edge is at most long_edge"""
+    height, width = frame.shape[:2]
+    scale = long_edge / max(width, height) if long_edge else 1.0
+    if scale < 1.0:
+        frame = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Could not encode key frame")
+    return buffer.tobytes()
+
+
+def build_contact_sheet(images: List[bytes], labels: List[str], columns: int = 3,
+                        long_edge: int = 1568, quality: int = KEY_FRAME_JPEG_QUALITY) -> bytes:
+    """
+    Tile encoded key frames into one labeled JPEG, in reading order
+
+    Every tile gets the first frame's aspect ratio (other frames are letterboxed)
+    and the grid is sized so the sheet's long edge is long_edge, which bounds
+    the image tokens of the whole set at once.
+    """
+    frames = [cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR) for image in images]
+    if not frames or any(frame is None for frame in frames):
+        raise ValueError("Could not decode key frames for the contact sheet")
+
+    columns = max(1, min(columns, len(frames)))
+    rows = -(-len(frames) // columns)
+    aspect = frames[0].shape[1] / frames[0].shape[0]
+    scale = long_edge / max(columns * aspect, rows)
+    tile_width, tile_height = max(1, int(scale * aspect)), max(1, int(scale))
+
+    sheet = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+    font_scale = max(0.4, tile_height / 400)
+    thickness = max(1, round(font_scale * 2))
+    for index, (frame, label) in enumerate(zip(frames, labels)):
+        height, width = frame.shape[:2]
+        fit = min(tile_width / width, tile_height / height)
+        resized = cv2.resize(frame, (max(1, int(width * fit)), max(1, int(height * fit))),
+                             interpolation=cv2.INTER_AREA)
+        top = (index // columns) * tile_height + (tile_height - resized.shape[0]) // 2
+        left = (index % columns) * tile_width + (tile_width - resized.shape[1]) // 2
+        sheet[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+
+        # Label on a dark band in the tile's top-left corner
+        (text_width, text_height), baseline = cv2.getTextSize(
+            label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        x, y = (index % columns) * tile_width, (index // columns) * tile_height
+        cv2.rectangle(sheet, (x, y), (x + text_width + 12, y + text_height + baseline + 12), (0, 0, 0), -1)
+        cv2.putText(sheet, label, (x + 6, y + text_height + 6), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, (255, 255, 255), thickness, cv2.LINE_AA)
+
+    return encode_key_frame(sheet, long_edge=0, quality=quality)
+
+
+def key_frame_positions(total_frames: int, max_frames: int = 5) -> List[int]:
+    """
+    Frame numbers of the key frames: the ends of max_frames equal intervals
+    (20%, 40%, ... 100% for 5 frames), or every frame of a very short video
+    """
+    if total_frames <= max_frames:
+        # If video is very short, just take all frames
+        return list(range(total_frames))
+
+    positions = []
+    for i in range(1, max_frames + 1):
+        frame_num = int((i / max_frames) * total_frames) - 1  # -1 for 0-based indexing
+        positions.append(max(0, min(frame_num, total_frames - 1)))  # Ensure valid range
+    return positions
+
+
+def select_key_frames(angle_data: List[Dict], total_frames: int, max_frames: int = 5,
+                      landmarks: Optional[np.ndarray] = None,
+                      min_spacing: Optional[int] = None,
+                      candidates: Optional[List[int]] = None) -> List[int]:
+    """
+    Frame numbers of the most informative frames according to the angle timeline
+
+    Each frame with angles is scored by how far its joint angles are from their
+    typical values (movement extremes) and how fast they change (velocity peaks),
+    weighted by the pose's mean landmark visibility; interpolated frames count
+    half. The best frames are picked greedily, at least min_spacing frames apart
+    (a 2*max_frames-th of the video by default) so they spread across it.
+    With candidates, only those frames can be picked, each scored by the best
+    frame around it. Falls back to evenly spaced frames without usable angle data.
+    """
+    candidates = sorted(set(candidates)) if candidates else None
+    if candidates is not None:
+        fallback = [candidates[i] for i in key_frame_positions(len(candidates), max_frames)]
+    else:
+        fallback = key_frame_positions(total_frames, max_frames)
+
+    frames = sorted((entry for entry in angle_data if entry.get('angles')), key=lambda e: e['frame'])
+    if len(frames) < 2 or total_frames <= max_frames:
+        return fallback
+
+    names = sorted({name for entry in frames for name in entry['angles']})
+    angles = np.array([[entry['angles'].get(name, np.nan) for name in names] for entry in frames],
+                      dtype=np.float64)
+    frame_numbers = np.array([entry['frame'] for entry in frames])
+    timestamps = np.array([entry.get('timestamp', entry['frame']) for entry in frames], dtype=np.float64)
+    if np.all(np.isnan(angles)):
+        return fallback
+
+    with np.errstate(all='ignore'):
+        # Distance from the median relative to the joint's 5-95% range, weighted by that range
+        # against the most-moving joint so jitter in joints that barely move doesn't count
+        low, median, high = np.nanpercentile(angles, [5, 50, 95], axis=0)
+        motion_range = np.nan_to_num(high - low)
+        weights = motion_range / max(motion_range.max(), 1e-6)
+        extremes = np.clip(np.abs(angles - median) / np.maximum(motion_range, 1e-6), 0, 1) * weights
+
+        # Angular speed relative to the 95th percentile over all joints
+        speed = np.abs(np.gradient(angles, timestamps, axis=0))
+        speed = np.clip(speed / max(np.nan_to_num(np.nanpercentile(speed, 95)), 1e-6), 0, 1)
+
+        scores = (np.nan_to_num(np.nanmax(extremes, axis=1)) + np.nan_to_num(np.nanmax(speed, axis=1))) / 2
+
+    # Mean landmark visibility from the (frames, 33, 4) landmark array
+    confidence = np.ones(len(frames))
+    if landmarks is not None:
+        in_range = frame_numbers < len(landmarks)
+        with np.errstate(all='ignore'):
+            visibility = np.nanmean(np.asarray(landmarks[frame_numbers[in_range], :, 3], dtype=np.float64), axis=1)
+        confidence[in_range] = np.nan_to_num(visibility, nan=1.0)
+    confidence *= [0.5 if entry.get('interpolated') else 1.0 for entry in frames]
+    scores = scores * confidence
+
+    if min_spacing is None:
+        min_spacing = max(1, total_frames // (2 * max_frames))
+    if candidates is not None:
+        # A candidate stands for the frames halfway to its neighbours, so a peak
+        # between two candidates is credited to the nearest one
+        dense = np.zeros(max(total_frames, int(frame_numbers.max()) + 1, candidates[-1] + 1))
+        dense[frame_numbers] = scores
+        radius = max(1, int(np.median(np.diff(candidates))) // 2) if len(candidates) > 1 else 0
+        frame_numbers = np.array(candidates)
+        scores = np.array([dense[max(0, c - radius):c + radius + 1].max() for c in candidates])
+
+    selected = []
+    for index in np.argsort(-scores, kind='stable'):
+        frame_number = int(frame_numbers[index])
+        if all(abs(frame_number - other) >= min_spacing for other in selected):
+            selected.append(frame_number)
+            if len(selected) == max_frames:
+                break
+    return sorted(selected)
+
+
+class KeyFrameCapture:
+    """
+    Collect the analysis key frames while a video is decoded for pose detection
+
+    The pose pass offers every decoded frame; the ones at the capture
+    positions are JPEG-encoded on the spot, so analysis doesn't need to open
+    and seek the video again. With 'uniform' selection these are the key frames
+    themselves; with 'motion' selection they are CANDIDATES_PER_KEY_FRAME evenly
+    spaced candidates per key frame, which the key frames are picked from once
+    the angle timeline is known. The container's frame count can be slightly
+    off, so the frames near the end are kept as a stand-in for a final
+    position that never arrives.
+    """
+
+    def __init__(self, total_frames: int, fps: float, max_frames: int = 5, selection: str = 'motion',
+                 image_long_edge: int = KEY_FRAME_LONG_EDGE, jpeg_quality: int = KEY_FRAME_JPEG_QUALITY):
+        if selection not in ('motion', 'uniform'):
+            raise ValueError(f"Unknown key frame selection: {selection}")
+        self.total_frames = total_frames
+        self.fps = fps
+        self.max_frames = max_frames
+        self.selection = selection
+        self.image_long_edge = image_long_edge
+        self.jpeg_quality = jpeg_quality
+        positions = key_frame_positions(
+            total_frames, max_frames * (CANDIDATES_PER_KEY_FRAME if selection == 'motion' else 1))
+        self.slots = {frame: slot for slot, frame in enumerate(positions)}
+        self.frames = {}  # slot -> (frame_number, JPEG bytes)
+        self.tail_start = total_frames - max(1, total_frames // 20)
+        self.last_frame = None  # (frame_number, frame) of the latest frame in the tail
+
+    def offer(self, frame_number: int, frame):
+        """Called with every decoded frame, before anything is drawn on it"""
+        slot = self.slots.get(frame_number)
+        if slot is not None:
+            self.frames[slot] = (frame_number, self._encode(frame))
+        if frame_number >= self.tail_start:
+            self.last_frame = (frame_number, frame.copy())
+
+    def merge(self, other: 'KeyFrameCapture'):
+        """Take over the frames another capture over part of the same video collected"""
+        self.frames.update(other.frames)
+        if other.last_frame is not None and (
+                self.last_frame is None or other.last_frame[0] > self.last_frame[0]):
+            self.last_frame = other.last_frame
+
+    def finish(self):
+        """Fill key frames past the real end of the video with its last frame"""
+        if self.last_frame is None:
+            return
+        missing = [slot for frame_number, slot in self.slots.items()
+                   if slot not in self.frames and frame_number > self.last_frame[0]]
+        if self.selection == 'motion':
+            # One candidate for the end of the video is enough
+            missing = missing[-1:]
+        for slot in missing:
+            self.frames[slot] = (self.last_frame[0], self._encode(self.last_frame[1]))
+        self.last_frame = None
+
+    def save(self, output_dir: str) -> int:
+        """Write the captured images and their manifest; returns the number of frames"""
+        os.makedirs(output_dir, exist_ok=True)
+        key_frames = []
+        for slot in sorted(self.frames):
+            frame_number, jpeg = self.frames[slot]
+            if self.selection == 'motion':
+                frame_filename = f"candidate_frame_{frame_number}.jpg"
+                interval = f"{round((frame_number + 1) / self.total_frames * 100)}%" if self.total_frames else ''
+            else:
+                frame_filename = f"key_frame_{slot + 1}.jpg"
+                interval = f"{(slot + 1) * 100 // self.max_frames}%"
+            with open(os.path.join(output_dir, frame_filename), 'wb') as f:
+                f.write(jpeg)
+            key_frames.append({
+                'frame_number': int(frame_number),
+                'timestamp': float(frame_number / self.fps) if self.fps > 0 else 0.0,
+                'filename': frame_filename,
+                'interval': interval
+            })
+
+        with open(os.path.join(output_dir, CAPTURED_MANIFEST), 'w') as f:
+            json.dump({
+                'total_frames': self.total_frames,
+                'fps': float(self.fps),
+                'duration': float(self.total_frames / self.fps) if self.fps > 0 else 0.0,
+                'selection': self.selection,
+                'max_frames': self.max_frames,
+                'key_frames': key_frames,
+                'capture_timestamp': datetime.now().isoformat()
+            }, f, indent=2)
+        return len(key_frames)
+
+    def _encode(self, frame) -> bytes:
+        return encode_key_frame(frame, self.image_long_edge, self.jpeg_quality)
+
 
 class KeyFrameExtractor:
     """
@@ -13,13 +272,28 @@ class KeyFrameExtractor:
     Selects 5 representative frames from different intervals
     """
     
-    def __init__(self):
-        self.max_frames = 5
+    def __init__(self, image_long_edge: int = KEY_FRAME_LONG_EDGE,
+                 jpeg_quality: int = KEY_FRAME_JPEG_QUALITY,
+                 max_frames: int = 5, selection: str = 'motion'):
+        # 'motion' picks frames from the angle timeline (select_key_frames), 'uniform' at fixed positions
+        if selection not in ('motion', 'uniform'):
+            raise ValueError(f"Unknown key frame selection: {selection}")
+        self.max_frames = max_frames
+        self.selection = selection
+        self.image_long_edge = image_long_edge
+        self.jpeg_quality = jpeg_quality
         
-    def extract_key_frames(self, video_path: str, output_dir: str) -> Dict:
+    def extract_key_frames(self, video_path: str, output_dir: str,
+                           frame_numbers: Optional[List[int]] = None) -> Dict:
         """
-        Extract 5 key frames from different intervals of the video
+        Extract key frames from different intervals of the video, or the given frame_numbers.
+        Frames already captured during pose processing are used as they are; the video
+        is only decoded again when some of them weren't captured.
         """
+        captured = self._load_captured_key_frames(video_path, output_dir, frame_numbers)
+        if captured is not None:
+            return captured
+
         try:
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
@@ -32,8 +306,9 @@ class KeyFrameExtractor:
             
             print(f"📹 Video info: {total_frames} frames, {fps:.1f} FPS, {duration:.1f}s duration")
             
-            # Calculate frame intervals for 5 key frames
-            frame_intervals = self._calculate_frame_intervals(total_frames)
+            # Selected frames, or 5 evenly distributed intervals
+            frame_intervals = frame_numbers if frame_numbers is not None \
+                else self._calculate_frame_intervals(total_frames)
             
             # Extract frames
             key_frames = []
@@ -46,13 +321,15 @@ class KeyFrameExtractor:
                     # Calculate timestamp
                     timestamp = frame_num / fps if fps > 0 else 0
                     
-                    # Save frame as image
-                    frame_filename = f"key_frame_{i+1}.jpg"
+                    # Encode in memory at the size sent to Claude, and keep a copy on disk
+                    jpeg = encode_key_frame(frame, self.image_long_edge, self.jpeg_quality)
+                    # Selected frames get their own names so they never overwrite captured ones
+                    frame_filename = f"key_frame_{i+1}.jpg" if frame_numbers is None \
+                        else f"selected_frame_{frame_num}.jpg"
                     frame_path = os.path.join(output_dir, frame_filename)
-                    cv2.imwrite(frame_path, frame)
-                    
-                    # Encode image for Claude
-                    image_base64 = self._encode_image_for_claude(frame_path)
+                    with open(frame_path, 'wb') as f:
+                        f.write(jpeg)
+                    image_base64 = base64.b64encode(jpeg).decode('utf-8')
                     
                     # Store frame info
                     key_frame_info = {
@@ -60,7 +337,8 @@ class KeyFrameExtractor:
                         'timestamp': float(timestamp),
                         'filename': frame_filename,
                         'path': frame_path,
-                        'interval': f"{(i+1)*20}%",  # 20%, 40%, 60%, 80%, 100%
+                        'interval': f"{round((frame_num + 1) / total_frames * 100)}%" if total_frames else '',
+                        'media_type': 'image/jpeg',
                         'image_base64': image_base64,
                         'image_encoded': True
                     }
@@ -97,26 +375,89 @@ class KeyFrameExtractor:
         """
         Calculate frame numbers for 5 evenly distributed intervals
         """
-        if total_frames <= 5:
-            # If video is very short, just take all frames
-            return list(range(total_frames))
-        
-        # Calculate 5 intervals: 20%, 40%, 60%, 80%, 100%
-        intervals = []
-        for i in range(1, 6):  # 1, 2, 3, 4, 5
-            frame_num = int((i / 5) * total_frames) - 1  # -1 for 0-based indexing
-            frame_num = max(0, min(frame_num, total_frames - 1))  # Ensure valid range
-            intervals.append(frame_num)
-        
-        return intervals
+        return key_frame_positions(total_frames, self.max_frames)
+
+    def _load_captured_manifest(self, output_dir: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(output_dir, CAPTURED_MANIFEST), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _captured_candidates(self, output_dir: str) -> Optional[List[int]]:
+        """Frame numbers of the candidates the pose pass captured for motion selection"""
+        manifest = self._load_captured_manifest(output_dir)
+        if manifest is None or manifest.get('selection') != 'motion':
+            return None
+        return [frame_info['frame_number'] for frame_info in manifest.get('key_frames', [])] or None
+
+    def _load_captured_key_frames(self, video_path: str, output_dir: str,
+                                  frame_numbers: Optional[List[int]] = None) -> Optional[Dict]:
+        """
+        Key frames saved by the pose pass, in extract_key_frames' format: the given
+        frame_numbers, or the uniformly placed key frames. None unless all were captured.
+        """
+        manifest = self._load_captured_manifest(output_dir)
+        if manifest is None:
+            return None
+
+        captured = manifest.get('key_frames', [])
+        if frame_numbers is not None:
+            by_number = {frame_info['frame_number']: frame_info for frame_info in captured}
+            if any(frame_number not in by_number for frame_number in frame_numbers):
+                return None
+            captured = [by_number[frame_number] for frame_number in frame_numbers]
+        elif manifest.get('selection', 'uniform') != 'uniform' or \
+                manifest.get('max_frames', self.max_frames) != self.max_frames:
+            # Captured for another selection mode or frame budget
+            return None
+
+        key_frames = []
+        for frame_info in captured:
+            frame_path = os.path.join(output_dir, frame_info['filename'])
+            if not os.path.exists(frame_path):
+                # Incomplete capture: decode the video instead
+                return None
+            key_frames.append({
+                **frame_info,
+                'path': frame_path,
+                'media_type': 'image/jpeg',
+                'image_base64': self._encode_image_for_claude(frame_path),
+                'image_encoded': True
+            })
+        if not key_frames:
+            return None
+
+        print(f"✅ Using {len(key_frames)} key frames captured during pose processing")
+        return {
+            'video_path': video_path,
+            'total_frames': manifest.get('total_frames', 0),
+            'fps': manifest.get('fps', 0.0),
+            'duration': manifest.get('duration', 0.0),
+            'extracted_frames': len(key_frames),
+            'key_frames': key_frames,
+            'extraction_timestamp': manifest.get('capture_timestamp', datetime.now().isoformat())
+        }
     
-    def extract_frames_with_pose_data(self, video_path: str, angle_data: List[Dict], output_dir: str) -> Dict:
+    def extract_frames_with_pose_data(self, video_path: str, angle_data: List[Dict], output_dir: str,
+                                      landmarks: Optional[np.ndarray] = None) -> Dict:
         """
         Extract key frames and combine with pose data for analysis
         """
         try:
+            # Pick the frames from the angle timeline, or fall back to fixed positions
+            frame_numbers = None
+            if self.selection == 'motion' and angle_data:
+                # landmarks has a row for every processed frame, angle_data only for detected poses
+                total_frames = len(landmarks) if landmarks is not None \
+                    else max(entry['frame'] for entry in angle_data) + 1
+                # Choosing among the frames captured during the pose pass avoids decoding the video again
+                frame_numbers = select_key_frames(
+                    angle_data, total_frames, self.max_frames, landmarks,
+                    candidates=self._captured_candidates(output_dir))
+
             # Extract key frames
-            key_frame_info = self.extract_key_frames(video_path, output_dir)
+            key_frame_info = self.extract_key_frames(video_path, output_dir, frame_numbers)
             
             if key_frame_info.get('extracted_frames', 0) == 0:
                 return key_frame_info
@@ -159,16 +500,20 @@ class KeyFrameExtractor:
                 return frame_data
         return None
     
-    def create_analysis_package(self, video_path: str, angle_data: List[Dict], output_dir: str) -> Dict:
+    def create_analysis_package(self, video_path: str, angle_data: List[Dict], output_dir: str,
+                                landmarks: Optional[np.ndarray] = None,
+                                angle_summary: Optional[Dict] = None) -> Dict:
         """
-        Create a complete analysis package with key frames and pose data
+        Create a complete analysis package with key frames and pose data.
+        angle_summary is the summary stored with the angle data; without it one is computed.
         """
         try:
             # Ensure output directory exists
             os.makedirs(output_dir, exist_ok=True)
             
             # Extract key frames with pose data
-            key_frame_info = self.extract_frames_with_pose_data(video_path, angle_data, output_dir)
+            key_frame_info = self.extract_frames_with_pose_data(
+                video_path, angle_data, output_dir, landmarks)
             
             # Create analysis package
             analysis_package = {
@@ -182,19 +527,28 @@ class KeyFrameExtractor:
                 'pose_analysis': {
                     'total_pose_frames': len(angle_data),
                     'pose_data_available': key_frame_info.get('pose_data_available', False),
-                    'angle_summary': self._create_angle_summary(angle_data)
+                    'angle_summary': angle_summary if angle_summary is not None
+                    else summarize_angle_data(angle_data)
                 },
                 'extraction_metadata': {
                     'extraction_timestamp': datetime.now().isoformat(),
                     'extractor_version': '1.0.0',
-                    'max_frames_extracted': self.max_frames
+                    'max_frames_extracted': self.max_frames,
+                    'frame_selection': self.selection
                 }
             }
             
-            # Save analysis package
+            # Save analysis package; key frames reference their image files instead of
+            # embedding them, the base64 data only lives in the returned package
             package_path = os.path.join(output_dir, 'analysis_package.json')
             with open(package_path, 'w') as f:
-                json.dump(analysis_package, f, indent=2)
+                json.dump({
+                    **analysis_package,
+                    'key_frames': [
+                        {k: v for k, v in frame.items() if k != 'image_base64'}
+                        for frame in analysis_package['key_frames']
+                    ]
+                }, f, indent=2)
             
             print(f"✅ Analysis package saved to: {package_path}")
             
@@ -208,40 +562,6 @@ class KeyFrameExtractor:
                 'pose_analysis': {}
             }
     
-    def _create_angle_summary(self, angle_data: List[Dict]) -> Dict:
-        """
-        Create a summary of angle data for analysis
-        """
-        if not angle_data:
-            return {}
-        
-        # Collect all angle types
-        angle_types = set()
-        for frame_data in angle_data:
-            angles = frame_data.get('angles', {})
-            angle_types.update(angles.keys())
-        
-        # Calculate statistics for each angle type
-        angle_summary = {}
-        for angle_type in angle_types:
-            values = []
-            for frame_data in angle_data:
-                angles = frame_data.get('angles', {})
-                if angle_type in angles:
-                    values.append(angles[angle_type])
-            
-            if values:
-                angle_summary[angle_type] = {
-                    'mean': float(np.mean(values)),
-                    'std': float(np.std(values)),
-                    'min': float(np.min(values)),
-                    'max': float(np.max(values)),
-                    'range': float(np.max(values) - np.min(values)),
-                    'count': len(values)
-                }
-        
-        return angle_summary
-    
     def _encode_image_for_claude(self, image_path: str) -> str:
         """
         Encode image to base64 for Claude API
@@ -0,0 +1,169 @@
+"""
+Columnar pose landmark storage
+
+A video's landmarks are one float32 array of shape (frames, 33, 4) holding the
+normalized x, y, z and the visibility of every landmark; frames without a
+detected pose are NaN. It is saved as .npy next to the angle data so readers
+can memory-map it, and turned into per-frame JSON entries only when a client
+asks for them.
+"""
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+LANDMARK_COUNT = 33
+
+# MediaPipe Pose landmark names, in index order
+LANDMARK_NAMES = [
+    "nose", "left_eye_inner", "left_eye", "left_eye_outer", "right_eye_inner",
+    "right_eye", "right_eye_outer", "left_ear", "right_ear", "mouth_left",
+    "mouth_right", "left_shoulder", "right_shoulder", "left_elbow",
+    "right_elbow", "left_wrist", "right_wrist", "left_pinky",
+    "right_pinky", "left_index", "right_index", "left_thumb",
+    "right_thumb", "left_hip", "right_hip", "left_knee", "right_knee",
+    "left_ankle", "right_ankle", "left_heel", "right_heel", "left_foot_index",
+    "right_foot_index"
+]
+
+
+class LandmarkBuffer:
+    """
+    Preallocated landmark array filled as frames are recorded
+
+    Rows are frame_index - start_frame. The buffer grows if the video has more
+    frames than its container reported, and array() returns only the rows up
+    to the last recorded frame.
+    """
+
+    def __init__(self, capacity: int, start_frame: int = 0):
+        self.start_frame = start_frame
+        self.values = np.full((max(capacity, 1), LANDMARK_COUNT, 4), np.nan, dtype=np.float32)
+        self.interpolated = np.zeros(len(self.values), dtype=bool)
+        self.frame_count = 0
+
+    def record(self, frame_index: int, pose_landmarks, interpolated: bool = False):
+        """Store a frame's MediaPipe landmarks (None leaves the frame empty)"""
+        row = frame_index - self.start_frame
+        if row >= len(self.values):
+            self._grow(row + 1)
+        if pose_landmarks:
+            self.values[row] = [[lm.x, lm.y, lm.z, lm.visibility] for lm in pose_landmarks.landmark]
+        self.interpolated[row] = interpolated
+        self.frame_count = max(self.frame_count, row + 1)
+
+    def merge(self, other: 'LandmarkBuffer'):
+        """Copy the frames recorded by another buffer (e.g. a video segment) into this one"""
+        start = other.start_frame - self.start_frame
+        end = start + other.frame_count
+        if end > len(self.values):
+            self._grow(end)
+        self.values[start:end] = other.values[:other.frame_count]
+        self.interpolated[start:end] = other.interpolated[:other.frame_count]
+        self.frame_count = max(self.frame_count, end)
+
+    def trim(self) -> 'LandmarkBuffer':
+        """Drop the unused preallocated rows, e.g. before sending the buffer to another process"""
+        self.values = self.values[:self.frame_count].copy()
+        self.interpolated = self.interpolated[:self.frame_count].copy()
+        return self
+
+    def array(self) -> np.ndarray:
+        return self.values[:self.frame_count]
+
+    def interpolated_frames(self) -> List[int]:
+        return [int(row) + self.start_frame for row in np.flatnonzero(self.interpolated[:self.frame_count])]
+
+    def _grow(self, rows: int):
+        capacity = max(rows, len(self.values) * 2)
+        values = np.full((capacity, LANDMARK_COUNT, 4), np.nan, dtype=np.float32)
+        values[:len(self.values)] = self.values
+        interpolated = np.zeros(capacity, dtype=bool)
+        interpolated[:len(self.interpolated)] = self.interpolated
+        self.values, self.interpolated = values, interpolated
+
+
+def landmarks_path(angles_path) -> Path:
+    """The landmark array stored next to a {video_id}_output_angles.json file"""
+    angles_path = Path(angles_path)
+    return angles_path.with_name(angles_path.name.replace('_output_angles.json', '_landmarks.npy'))
+
+
+def save_landmarks(path, landmarks: np.ndarray):
+    """Write the array as .npy; written to a temporary name first so readers never see a partial file"""
+    partial_path = f"{path}.part"
+    with open(partial_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(landmarks, dtype=np.float32))
+    os.replace(partial_path, path)
+
+
+def load_landmarks(path, mmap: bool = True) -> np.ndarray:
+    """Read a saved landmark array, memory-mapped unless mmap=False"""
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def load_video_landmarks(angles_path, angle_file: Dict) -> Tuple[Optional[np.ndarray], Optional[List[int]]]:
+    """
+    (landmarks, interpolated_frames) of a processed video. Angle data files written
+    before the landmark array existed carry landmarks_data, which is converted.
+    interpolated_frames is None when the video was processed without striding.
+    """
+    array_path = landmarks_path(angles_path)
+    if array_path.exists():
+        return load_landmarks(array_path), angle_file.get('landmarks', {}).get('interpolated_frames')
+    if angle_file.get('landmarks_data'):
+        return landmarks_from_json(angle_file['landmarks_data'])
+    return None, None
+
+
+def landmarks_to_json(landmarks: np.ndarray, fps: float, width: int, height: int,
+                      interpolated_frames: Optional[List[int]] = None,
+                      start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+    """Per-frame landmark entries (the landmarks_data format) for frames [start, stop)"""
+    stop = len(landmarks) if stop is None else min(stop, len(landmarks))
+    interpolated = set(interpolated_frames) if interpolated_frames is not None else None
+    entries = []
+    for frame in range(max(0, start), stop):
+        values = np.asarray(landmarks[frame], dtype=np.float64)
+        detected = not np.isnan(values[:, 0]).all()
+        entry = {
+            'frame': frame,
+            'timestamp': frame / fps if fps else 0.0,
+            'landmarks_2d': [{
+                'name': LANDMARK_NAMES[i],
+                'index': i,
+                'pixel': {
+                    'x': int(x * width),
+                    'y': int(y * height)
+                },
+                'normalized': {
+                    'x': float(x),
+                    'y': float(y),
+                    'z': float(z)
+                },
+                'visibility': float(visibility),
+                'presence': 1.0
+            } for i, (x, y, z, visibility) in enumerate(values)] if detected else [],
+            'pose_detected': detected
+        }
+        if interpolated is not None:
+            entry['interpolated'] = frame in interpolated
+        entries.append(entry)
+    return entries
+
+
+def landmarks_from_json(landmarks_data: List[Dict]) -> Tuple[np.ndarray, Optional[List[int]]]:
+    """Convert landmarks_data entries back into the array form"""
+    frame_count = max((entry['frame'] for entry in landmarks_data), default=-1) + 1
+    landmarks = np.full((frame_count, LANDMARK_COUNT, 4), np.nan, dtype=np.float32)
+    interpolated_frames = None
+    for entry in landmarks_data:
+        if 'interpolated' in entry:
+            interpolated_frames = interpolated_frames or []
+            if entry['interpolated']:
+                interpolated_frames.append(entry['frame'])
+        if entry.get('pose_detected') and entry.get('landmarks_2d'):
+            landmarks[entry['frame']] = [
+                [lm['normalized']['x'], lm['normalized']['y'], lm['normalized']['z'], lm['visibility']]
+                for lm in entry['landmarks_2d']]
+    return landmarks, interpolated_frames
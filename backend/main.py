@@ -1,10 +1,13 @@
 from datetime import datetime
 from action_logger import action_logger
-from two_stage_claude_analyzer import TwoStageClaudeAnalyzer
-from key_frame_extractor import KeyFrameExtractor
-from simple_processor import SimpleProcessor
-from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Response
-from fastapi.responses import FileResponse, StreamingResponse, HTMLResponse, JSONResponse
+from range_response import file_response
+from resumable_upload import ResumableUploadStore, UploadSessionError
+from streaming_upload import MultipartUploadError, receive_multipart_file
+from landmark_store import landmarks_path, load_video_landmarks, landmarks_to_json
+from jobs import (UPLOAD_DIR, OUTPUT_DIR, PROCESSING_WORKERS, processor, supabase_storage,
+                  two_stage_claude_analyzer, create_job_queue, register_handlers)
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 import os
@@ -15,6 +18,8 @@ import logging
 from typing import Optional
 import base64
 import json
+import re
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -37,20 +42,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create directories
-UPLOAD_DIR = Path("uploads")
-OUTPUT_DIR = Path("outputs")
-UPLOAD_DIR.mkdir(exist_ok=True)
-OUTPUT_DIR.mkdir(exist_ok=True)
+# Uploads are streamed to disk as they arrive and rejected past MAX_UPLOAD_MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "500")) * 1024 * 1024
 
-# Global processor and thread pool
-processor = SimpleProcessor()
-key_frame_extractor = KeyFrameExtractor()
-two_stage_claude_analyzer = TwoStageClaudeAnalyzer()
+# Resumable upload sessions, kept on disk so they survive a restart
+upload_sessions = ResumableUploadStore(UPLOAD_DIR / "sessions", MAX_UPLOAD_BYTES)
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+# Blocking work done on behalf of a request; video processing and video analysis run as queued jobs
 executor = ThreadPoolExecutor(max_workers=2)
 
-# In-memory storage for processing status
-processing_status = {}
+# Durable processing jobs; /api/status reads job state from here
+job_queue = create_job_queue()
+
+# Job kinds behind each progress stream; "processing" is what /api/status reports
+JOB_KINDS = {
+    "processing": ["process_video", "process_supabase_video"],
+    "analysis": ["two_stage_analysis"],
+    "overlay": ["render_overlay"]
+}
+
+# Run job workers inside the API process. Set EMBEDDED_WORKERS=0 only when separate
+# `python worker.py` processes on the same host share JOB_DB_PATH and the upload/output
+# directories, so the API only serves requests.
+EMBEDDED_WORKERS = os.getenv("EMBEDDED_WORKERS", "1").lower() not in ("0", "false", "no")
+
+# How often progress streams check the queue for changes, and the idle keep-alive interval
+PROGRESS_POLL_SECONDS = float(os.getenv("PROGRESS_POLL_SECONDS", "0.5"))
+PROGRESS_KEEPALIVE_SECONDS = 15
+
+# How long a request waits for an on-demand overlay render before giving up
+OVERLAY_RENDER_TIMEOUT_SECONDS = float(os.getenv("OVERLAY_RENDER_TIMEOUT_SECONDS", "600"))
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Load the pose model, then start pulling processing jobs from the queue"""
+    if not EMBEDDED_WORKERS:
+        logger.info("Embedded job workers disabled; jobs run in worker.py processes")
+        return
+    await asyncio.get_event_loop().run_in_executor(executor, processor.warm_up)
+    register_handlers(job_queue)
+    job_queue.start(PROCESSING_WORKERS)
+
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    """Stop claiming jobs; unfinished ones are picked up again once their lease runs out"""
+    job_queue.stop(timeout=5)
+
+
+@app.on_event("shutdown")
+def close_storage_client():
+    """Close the shared storage client's pooled connections"""
+    if supabase_storage is not None:
+        supabase_storage.close()
 
 
 @app.get("/api/health")
@@ -59,106 +106,298 @@ async def health_check():
 
 
 @app.post("/api/upload")
-async def upload_video(file: UploadFile = File(...)):
-    """Upload video file and return video ID"""
-    try:
-        # Generate unique video ID
-        video_id = str(uuid.uuid4())
+async def upload_video(request: Request):
+    """Upload video file (multipart field "file") and return video ID"""
+    # Reject oversized uploads from the declared length before reading the body
+    # (the allowance covers the multipart boundaries and headers)
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + UPLOAD_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit")
 
-        # Save uploaded file
-        file_path = UPLOAD_DIR / f"{video_id}.mp4"
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+    # Generate unique video ID
+    video_id = str(uuid.uuid4())
+    file_path = UPLOAD_DIR / f"{video_id}.mp4"
+
+    try:
+        # Parse the body as it arrives, writing the file straight to the uploads folder
+        upload = await receive_multipart_file(
+            request.headers.get("content-type", ""), request.stream(), "file",
+            file_path, MAX_UPLOAD_BYTES)
 
         logger.info(f"Video uploaded: {video_id}")
         action_logger.log_file_operation(
-            "UPLOAD", file_path, True, len(content))
+            "UPLOAD", file_path, True, upload["size"])
 
         return {
             "success": True,
             "video_id": video_id,
-            "filename": file.filename,
-            "size": len(content)
+            "filename": upload["filename"],
+            "size": upload["size"],
+            "sha256": upload["sha256"]
         }
 
+    except MultipartUploadError as e:
+        action_logger.log_error("UPLOAD_FAILED", e.message, {"video_id": video_id})
+        raise HTTPException(status_code=e.status_code, detail=e.message)
     except Exception as e:
         logger.error(f"Error uploading video: {e}")
-        action_logger.log_error("UPLOAD_FAILED", str(e), {
-                                "filename": file.filename})
+        action_logger.log_error("UPLOAD_FAILED", str(e), {"video_id": video_id})
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+async def read_json_object(request: Request) -> dict:
+    """The request body as a JSON object; 400 if it is not valid JSON or not an object"""
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return body
+
+
+@app.post("/api/uploads")
+async def create_upload_session(request: Request):
+    """
+    Start a resumable upload. Body: {"size": bytes, "filename": optional}.
+    Send the file with PUT /api/uploads/{upload_id} chunks, then complete it.
+    """
+    body = await read_json_object(request)
+    try:
+        session = await asyncio.get_event_loop().run_in_executor(
+            None, upload_sessions.create, int(body.get("size", 0)), body.get("filename"))
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="size must be an integer")
+
+    logger.info(f"Upload session created: {session['upload_id']} ({session['size']} bytes)")
+    return session
+
+
+@app.put("/api/uploads/{upload_id}")
+async def upload_session_chunk(upload_id: str, request: Request):
+    """
+    Write one chunk of a resumable upload. The Content-Range header
+    ("bytes start-end/total") places it; chunks may be sent in any order and retried.
+    """
+    match = CONTENT_RANGE_PATTERN.match(request.headers.get("content-range", ""))
+    if not match:
+        raise HTTPException(
+            status_code=400, detail="Content-Range header 'bytes start-end/total' is required")
+    start, end, total = (int(value) for value in match.groups())
+
+    try:
+        return await upload_sessions.write_chunk(upload_id, start, end, total, request.stream())
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+
+@app.get("/api/uploads/{upload_id}")
+@app.head("/api/uploads/{upload_id}")
+async def get_upload_session(upload_id: str):
+    """Received byte ranges; "offset" is where a sequential client should resume"""
+    try:
+        session = await asyncio.to_thread(upload_sessions.status, upload_id)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    return JSONResponse(session, headers={"Upload-Offset": str(session["offset"])})
+
+
+@app.post("/api/uploads/{upload_id}/complete")
+async def complete_upload_session(upload_id: str, request: Request):
+    """
+    Assemble the uploaded file as a new video. Body (optional):
+    {"process": true, "analysis_only": false} starts processing right away.
+    """
+    body = await read_json_object(request) if await request.body() else {}
+
+    video_id = str(uuid.uuid4())
+    file_path = UPLOAD_DIR / f"{video_id}.mp4"
+    try:
+        result = await asyncio.get_event_loop().run_in_executor(
+            None, upload_sessions.finalize, upload_id, file_path)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+
+    logger.info(f"Video uploaded: {video_id} (resumable session {upload_id})")
+    action_logger.log_file_operation(
+        "UPLOAD", file_path, True, result["size"])
+
+    response = {
+        "success": True,
+        "video_id": video_id,
+        "filename": result["filename"],
+        "size": result["size"],
+        "sha256": result["sha256"],
+        "processing_started": False
+    }
+    if body.get("process"):
+        await process_video(video_id, analysis_only=bool(body.get("analysis_only", False)))
+        response["processing_started"] = True
+    return response
+
+
+@app.delete("/api/uploads/{upload_id}")
+async def cancel_upload_session(upload_id: str):
+    """Abandon a resumable upload and delete the received bytes"""
+    try:
+        await asyncio.to_thread(upload_sessions.cancel, upload_id)
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    return {"success": True, "upload_id": upload_id}
+
+
+async def ensure_overlay_video(video_id: str) -> Path:
+    """
+    Return the processed overlay video, rendering it from the stored landmarks first
+    if the video was processed in analysis-only mode or reprocessed since
+    """
+    processed_path = OUTPUT_DIR / f"{video_id}_output.mp4"
+    video_path = UPLOAD_DIR / f"{video_id}.mp4"
+    angle_file = OUTPUT_DIR / f"{video_id}_output_angles.json"
+    if overlay_is_current(processed_path, angle_file):
+        return processed_path
+    if not video_path.exists() or not angle_file.exists():
+        raise HTTPException(
+            status_code=404, detail="Processed video not found")
+
+    # Concurrent requests for the same video share one render job, run by whichever worker
+    # claims it; reprocessing the video rewrites the angle data, which warrants a fresh render.
+    # The render holds the video's processing lock, so while a processing job is writing
+    # the files, that job is returned and waited for instead
+    deadline = asyncio.get_event_loop().time() + OVERLAY_RENDER_TIMEOUT_SECONDS
+    for _ in range(3):
+        params = {"angle_data_mtime": angle_file.stat().st_mtime}
+        job = await asyncio.to_thread(
+            job_queue.submit, "render_overlay", video_id, params=params,
+            exclusive_key=processing_lock(video_id))
+        if (job["kind"] == "render_overlay" and job["state"] == "completed"
+                and not overlay_is_current(processed_path, angle_file)):
+            # Rendered before, but the file has been deleted or replaced since; render it again
+            await asyncio.to_thread(job_queue.expire, job["id"])
+            job = await asyncio.to_thread(
+                job_queue.submit, "render_overlay", video_id, params=params,
+                exclusive_key=processing_lock(video_id))
+
+        while job["state"] in ("queued", "running"):
+            if asyncio.get_event_loop().time() > deadline:
+                raise HTTPException(
+                    status_code=504, detail="Timed out waiting for the processed video")
+            await asyncio.sleep(0.5)
+            job = await asyncio.to_thread(job_queue.get, job["id"])
+
+        if job["kind"] == "render_overlay" and job["state"] != "completed":
+            break
+        if overlay_is_current(processed_path, angle_file):
+            return processed_path
+        if not angle_file.exists():
+            break
+        # A processing job held the lock, or the file changed as the render finished; try again
+
+    raise HTTPException(
+        status_code=500, detail="Failed to render processed video")
+
+
+def overlay_is_current(processed_path: Path, angle_file: Path) -> bool:
+    """An overlay is only served if it was written after the angle data it should show"""
+    try:
+        video_mtime = processed_path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    try:
+        return video_mtime >= angle_file.stat().st_mtime
+    except FileNotFoundError:
+        # No angle data to render from, so the existing overlay is the only one there is
+        return True
+
+
+def processing_lock(video_id: str) -> str:
+    """Exclusive key shared by every job kind that reads or writes a video's output files"""
+    return f"processing:{video_id}"
+
+
+def reject_if_rendering(job: dict):
+    """A processing request that found an overlay render holding the lock isn't queued; ask for a retry"""
+    if job["kind"] == "render_overlay":
+        raise HTTPException(
+            status_code=409, detail="The overlay video is being rendered; try again when it finishes")
+
+
+def job_status(job: dict) -> dict:
+    """Status response for a job, in the shape the frontend polls for"""
+    status = {
+        "queued": "processing",
+        "running": "processing",
+        "completed": "completed",
+        "failed": "error"
+    }[job["state"]]
+    default_message = {
+        "processing": "Processing started",
+        "completed": "Processing completed successfully",
+        "error": "Processing failed"
+    }[status]
+
+    response = {
+        "status": status,
+        "state": job["state"],
+        "job_id": job["id"],
+        "attempts": job["attempts"],
+        "message": job["message"] or default_message,
+        "analysis_only": job["payload"].get("analysis_only", False),
+        "start_time": datetime.fromtimestamp(job["created_at"]).isoformat()
+    }
+    if job["progress"] and job["state"] == "running":
+        response["progress"] = job["progress"]
+    if job["finished_at"]:
+        response["end_time"] = datetime.fromtimestamp(job["finished_at"]).isoformat()
+    if job["result"]:
+        response.update(job["result"])
+    return response
+
+
 @app.post("/api/process/{video_id}")
-async def process_video(video_id: str):
-    """Start MediaPipe processing for uploaded video"""
+async def process_video(video_id: str, analysis_only: bool = False):
+    """
+    Start MediaPipe processing for uploaded video. With analysis_only=true only the
+    angle/landmark data is produced and the overlay video is rendered on first request.
+    Submitting the same upload and options again returns the existing job; a new
+    upload under the same video_id is processed again. Only one processing job per
+    video runs at a time.
+    """
     try:
         # Check if video exists
         video_path = UPLOAD_DIR / f"{video_id}.mp4"
         if not video_path.exists():
             raise HTTPException(status_code=404, detail="Video not found")
 
-        # Check if already processing
-        if video_id in processing_status and processing_status[video_id]["status"] == "processing":
-            return {"message": "Video is already being processed"}
-
-        # Set processing status
-        processing_status[video_id] = {
-            "status": "processing",
-            "message": "Processing started",
-            "start_time": datetime.now().isoformat()
-        }
-
-        # Start processing in background
-        def process_video_task():
-            try:
-                logger.info(f"Starting processing for video {video_id}")
-                action_logger.log_processing_step(
-                    "VIDEO_PROCESSING", video_id, "started")
-
-                # Process video
-                output_file_path = OUTPUT_DIR / f"{video_id}_output.mp4"
-                success, actual_output_path = processor.process_video(
-                    str(video_path), str(output_file_path))
-
-                # Update status
-                if success:
-                    processing_status[video_id] = {
-                        "status": "completed",
-                        "message": "Processing completed successfully",
-                        "output_path": actual_output_path,
-                        "end_time": datetime.now().isoformat()
-                    }
-                else:
-                    processing_status[video_id] = {
-                        "status": "error",
-                        "message": "Processing failed",
-                        "end_time": datetime.now().isoformat()
-                    }
-
-                action_logger.log_processing_step(
-                    "VIDEO_PROCESSING", video_id, "completed")
-                logger.info(f"Processing completed for video {video_id}")
-
-            except Exception as e:
-                logger.error(f"Error processing video {video_id}: {e}")
-                processing_status[video_id] = {
-                    "status": "error",
-                    "message": f"Processing failed: {str(e)}",
-                    "end_time": datetime.now().isoformat()
-                }
-                action_logger.log_error("VIDEO_PROCESSING_FAILED", str(e), {
-                                        "video_id": video_id})
-
-        # Submit to thread pool
-        executor.submit(process_video_task)
+        # The upload's mtime and size identify its content without hashing it again
+        upload = video_path.stat()
+        job = await asyncio.to_thread(
+            job_queue.submit, "process_video", video_id,
+            params={"analysis_only": analysis_only,
+                    "upload_mtime": upload.st_mtime, "upload_size": upload.st_size},
+            exclusive_key=processing_lock(video_id))
+        reject_if_rendering(job)
+        if not job["created"]:
+            return {
+                "success": True,
+                "video_id": video_id,
+                "job_id": job["id"],
+                "message": "Video is already being processed" if job["state"] != "completed" else "Video was already processed"
+            }
 
         return {
             "success": True,
             "video_id": video_id,
+            "job_id": job["id"],
             "message": "Processing started"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error starting video processing: {e}")
         action_logger.log_error("PROCESSING_START_FAILED", str(e), {
@@ -170,30 +409,75 @@ async def process_video(video_id: str):
 @app.get("/api/status/{video_id}")
 async def get_processing_status(video_id: str):
     """Get processing status for video"""
-    if video_id not in processing_status:
+    job = await asyncio.to_thread(job_queue.latest_for_video, video_id, JOB_KINDS["processing"])
+    if job is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    return job_status(job)
+
+
+@app.get("/api/progress/{video_id}")
+async def stream_processing_progress(video_id: str, request: Request, kind: str = "processing"):
+    """
+    Server-Sent Events stream of a video's processing status, in the same shape
+    as /api/status. A new event is sent whenever the job changes (stage, frames
+    processed, fps, ETA) and the stream ends once processing completed or failed.
+    kind=analysis or kind=overlay follows the video's analysis or overlay render job instead.
+    """
+    if kind not in JOB_KINDS:
+        raise HTTPException(
+            status_code=400, detail=f"kind must be one of: {', '.join(JOB_KINDS)}")
+    job = await asyncio.to_thread(job_queue.latest_for_video, video_id, JOB_KINDS[kind])
+    if job is None:
         raise HTTPException(status_code=404, detail="Video not found")
 
-    return processing_status[video_id]
+    async def events():
+        current = job
+        last_update = None
+        last_sent = time.time()
+        # Tell EventSource how soon to reconnect if the connection drops
+        yield "retry: 2000\n\n"
+        while True:
+            if current is not None and (current["id"], current["updated_at"]) != last_update:
+                last_update = (current["id"], current["updated_at"])
+                last_sent = time.time()
+                yield f"data: {json.dumps(job_status(current))}\n\n"
+                if current["state"] in ("completed", "failed"):
+                    return
+            elif time.time() - last_sent > PROGRESS_KEEPALIVE_SECONDS:
+                # Comment line that keeps proxies from closing an idle stream
+                last_sent = time.time()
+                yield ": keepalive\n\n"
+
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(PROGRESS_POLL_SECONDS)
+            # Workers may run in other processes, so changes are picked up from the queue
+            current = await asyncio.to_thread(job_queue.latest_for_video, video_id, JOB_KINDS[kind])
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/api/download/{video_id}")
 @app.head("/api/download/{video_id}")
-async def download_processed_video(video_id: str):
+async def download_processed_video(video_id: str, request: Request):
     """Download processed video file"""
-    processed_path = OUTPUT_DIR / f"{video_id}_output.mp4"
-
-    if not processed_path.exists():
-        raise HTTPException(
-            status_code=404, detail="Processed video not found")
+    processed_path = await ensure_overlay_video(video_id)
 
-    return FileResponse(
-        path=str(processed_path),
+    return file_response(
+        request,
+        processed_path,
         media_type="video/mp4",
         filename=f"{video_id}_processed.mp4"
     )
 
 
 @app.get("/api/stream/{video_id}")
+@app.head("/api/stream/{video_id}")
 @app.options("/api/stream/{video_id}")
 async def stream_processed_video(video_id: str, request: Request):
     """Stream processed video with pose landmarks"""
@@ -204,29 +488,19 @@ async def stream_processed_video(video_id: str, request: Request):
             status_code=200,
             headers={
                 "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, OPTIONS",
+                "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
                 "Access-Control-Allow-Headers": "*",
             }
         )
 
-    processed_path = OUTPUT_DIR / f"{video_id}_output.mp4"
-
-    if not processed_path.exists():
-        raise HTTPException(
-            status_code=404, detail="Processed video not found")
-
-    def iterfile():
-        with open(processed_path, mode="rb") as file_like:
-            yield from file_like
+    processed_path = await ensure_overlay_video(video_id)
 
-    return StreamingResponse(
-        iterfile(),
+    # Serves only the requested byte range so seeking doesn't restart the download
+    return file_response(
+        request,
+        processed_path,
         media_type="video/mp4",
-        headers={
-            "Accept-Ranges": "bytes",
-            "Content-Length": str(processed_path.stat().st_size),
-            "Access-Control-Allow-Origin": "*",
-        }
+        headers={"Access-Control-Allow-Origin": "*"}
     )
 
 
@@ -252,8 +526,9 @@ async def get_original_video(video_id: str, request: Request):
     if not video_path.exists():
         raise HTTPException(status_code=404, detail="Video not found")
 
-    return FileResponse(
-        path=str(video_path),
+    return file_response(
+        request,
+        video_path,
         media_type="video/mp4",
         filename=f"{video_id}.mp4",
         headers={"Access-Control-Allow-Origin": "*"}
@@ -297,6 +572,49 @@ async def get_angle_data(video_id: str):
     )
 
 
+def landmarks_json_view(video_id: str, start: int, stop: Optional[int]) -> Optional[dict]:
+    """Per-frame landmark entries generated from the stored landmark array, or None without data"""
+    angle_file_path = OUTPUT_DIR / f"{video_id}_output_angles.json"
+    if not angle_file_path.exists():
+        return None
+    with open(angle_file_path, 'r') as f:
+        angle_file = json.load(f)
+    landmarks, interpolated_frames = load_video_landmarks(angle_file_path, angle_file)
+    if landmarks is None:
+        return None
+
+    video_info = angle_file.get('video_info', {})
+    return {
+        "video_id": video_id,
+        "total_frames": len(landmarks),
+        "landmarks_data": landmarks_to_json(
+            landmarks, video_info.get('fps', 0), video_info.get('width', 0), video_info.get('height', 0),
+            interpolated_frames, start, stop)
+    }
+
+
+@app.get("/api/landmarks/{video_id}")
+async def get_landmarks(video_id: str, format: str = "json", start: int = 0, stop: Optional[int] = None):
+    """
+    Pose landmarks of a processed video. format=npy returns the stored (frames, 33, 4)
+    float32 array; format=json builds the per-frame entries for frames [start, stop).
+    """
+    if format == "npy":
+        landmark_file = landmarks_path(OUTPUT_DIR / f"{video_id}_output_angles.json")
+        if not landmark_file.exists():
+            raise HTTPException(status_code=404, detail="Landmark data not found")
+        return FileResponse(path=str(landmark_file), media_type="application/octet-stream",
+                            filename=landmark_file.name)
+    if format != "json":
+        raise HTTPException(status_code=400, detail=f"Unknown landmark format: {format}")
+
+    result = await asyncio.get_event_loop().run_in_executor(
+        None, landmarks_json_view, video_id, start, stop)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Landmark data not found")
+    return result
+
+
 @app.post("/api/analyze-patient-model")
 async def analyze_patient_model(request: Request):
     """Analyze patient pain points and suggest appropriate BioDigital model and movements"""
@@ -341,6 +659,10 @@ async def process_supabase_video(request: Request):
         storage_path = body.get('storage_path')
         session_id = body.get('session_id')
         rotation = body.get('rotation', 0)  # Video rotation in degrees
+        # Split long videos across worker processes (None = decide by duration)
+        segmented = body.get('segmented')
+        # Only produce angle/landmark data; the overlay video is rendered on first request
+        analysis_only = bool(body.get('analysis_only', False))
 
         if not all([video_id, video_url]):
             raise HTTPException(
@@ -348,236 +670,83 @@ async def process_supabase_video(request: Request):
 
         logger.info(f"Processing Supabase video: {video_id}")
 
-        # Step 1: Download video from Supabase to local temp file
-        import requests
-        video_response = requests.get(video_url)
-        if video_response.status_code != 200:
-            raise HTTPException(
-                status_code=400, detail="Failed to download video from Supabase")
-
-        # Save to local temp file for processing
-        temp_video_path = UPLOAD_DIR / f"{video_id}.mp4"
-        with open(temp_video_path, 'wb') as f:
-            f.write(video_response.content)
-
-        logger.info(f"Downloaded video to: {temp_video_path}")
-
-        # Step 2: Process video locally (existing pipeline)
-        processing_status[video_id] = {
-            "status": "processing",
-            "message": "Processing started",
-            "start_time": datetime.now().isoformat()
-        }
-
-        def process_and_upload_task():
-            try:
-                import requests
-                import os
-                from pathlib import Path
-
-                logger.info(
-                    f"Starting processing for Supabase video {video_id}")
-
-                # Process video with MediaPipe
-                output_file_path = OUTPUT_DIR / f"{video_id}_output.mp4"
-                logger.info(
-                    f"Processing video with rotation: {rotation} degrees")
-                success, actual_output_path = processor.process_video(
-                    str(temp_video_path), str(output_file_path), rotation=rotation)
-
-                # Step 3: Upload processed video back to Supabase
-                processed_video_path = Path(
-                    actual_output_path) if success else OUTPUT_DIR / f"{video_id}_output.mp4"
-
-                if success and processed_video_path.exists():
-                    # Upload processed video to Supabase bucket
-                    processed_video_url = None  # Initialize as None to track success
-
-                    # Read processed video file
-                    with open(processed_video_path, 'rb') as video_file:
-                        video_data = video_file.read()
-
-                        # Create storage path for processed video
-                        # Extract user_id from original storage_path if available
-                        user_id = storage_path.split(
-                            '/')[0] if storage_path else 'unknown'
-                        # Store processed videos in same bucket but in processed folder
-                        processed_storage_path = f"{user_id}/processed/{session_id}/{video_id}_processed.mp4"
-
-                        logger.info(
-                            f"Uploading processed video to Supabase: {processed_storage_path}")
-
-                        # Upload to Supabase storage using SDK
-                        supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-                        supabase_key = os.getenv(
-                            'NEXT_PUBLIC_SUPABASE_ANON_KEY')
-
-                        logger.info(
-                            f"Supabase credentials check - URL: {'SET' if supabase_url else 'MISSING'}, Key: {'SET' if supabase_key else 'MISSING'}")
-
-                        if supabase_url and supabase_key:
-                            try:
-                                # Use Supabase SDK for upload
-                                from supabase import create_client
-                                supabase_client = create_client(
-                                    supabase_url, supabase_key)
-
-                                logger.info(
-                                    f"Uploading to patient_videos bucket: {processed_storage_path}")
-                                logger.info(
-                                    f"Video file size: {len(video_data)} bytes")
-
-                                # Upload processed video to patient_videos bucket
-                                upload_result = supabase_client.storage.from_('patient_videos').upload(
-                                    processed_storage_path,
-                                    video_data,
-                                    file_options={"content-type": "video/mp4"}
-                                )
-
-                                logger.info(f"Upload result: {upload_result}")
-
-                                # Check if upload was successful - UploadResponse has path attribute when successful
-                                if hasattr(upload_result, 'path') and upload_result.path:
-                                    logger.info(
-                                        f"✅ Processed video uploaded successfully to: {processed_storage_path}")
-
-                                    # Create signed URL for the processed video
-                                    logger.info(
-                                        f"Creating signed URL for: {processed_storage_path}")
-                                    signed_url_result = supabase_client.storage.from_('patient_videos').create_signed_url(
-                                        processed_storage_path,
-                                        60 * 60 * 24  # 24 hours
-                                    )
-
-                                    logger.info(
-                                        f"Signed URL result type: {type(signed_url_result)}")
-                                    logger.info(
-                                        f"Signed URL result: {signed_url_result}")
-
-                                    # Handle different response formats
-                                    if hasattr(signed_url_result, 'data') and signed_url_result.data:
-                                        # New format: result.data.signed_url
-                                        if hasattr(signed_url_result.data, 'signed_url'):
-                                            processed_video_url = signed_url_result.data.signed_url
-                                        # Old format: result.data['signedUrl']
-                                        elif isinstance(signed_url_result.data, dict) and 'signedUrl' in signed_url_result.data:
-                                            processed_video_url = signed_url_result.data['signedUrl']
-                                        else:
-                                            logger.warn(
-                                                f"Unexpected signed URL data format: {signed_url_result.data}")
-                                    elif isinstance(signed_url_result, dict):
-                                        # Direct dict format - this is what we're getting
-                                        if 'signedUrl' in signed_url_result:
-                                            processed_video_url = signed_url_result['signedUrl']
-                                            logger.info(
-                                                f"Using signedUrl from direct dict response")
-                                        elif 'signedURL' in signed_url_result:
-                                            processed_video_url = signed_url_result['signedURL']
-                                            logger.info(
-                                                f"Using signedURL from direct dict response")
-                                        elif 'data' in signed_url_result and 'signedUrl' in signed_url_result['data']:
-                                            processed_video_url = signed_url_result['data']['signedUrl']
-                                            logger.info(
-                                                f"Using nested data.signedUrl from dict response")
-                                        else:
-                                            logger.warn(
-                                                f"No signedUrl in response: {signed_url_result}")
-                                    else:
-                                        logger.warn(
-                                            f"Unexpected signed URL response format: {signed_url_result}")
-
-                                    if processed_video_url:
-                                        logger.info(
-                                            f"✅ Successfully got Supabase signed URL: {processed_video_url}")
-                                    else:
-                                        logger.error(
-                                            "❌ Failed to extract signed URL from Supabase response")
-                                else:
-                                    logger.warn(
-                                        f"❌ Failed to upload processed video to Supabase: {upload_result}")
-                                    logger.warn(
-                                        f"Upload result type: {type(upload_result)}, attributes: {dir(upload_result)}")
-
-                            except Exception as upload_error:
-                                logger.error(
-                                    f"❌ Error uploading processed video to Supabase: {upload_error}")
-                        else:
-                            logger.warn("❌ Missing Supabase credentials")
-
-                    # Only fall back to localhost if Supabase completely failed
-                    if not processed_video_url:
-                        processed_video_url = f"http://localhost:8001/api/stream/{video_id}"
-                        logger.warn(
-                            f"⚠️ Using localhost fallback URL: {processed_video_url}")
-                else:
-                    processed_video_url = f"http://localhost:8001/api/stream/{video_id}"
-                    logger.warn(
-                        "⚠️ Processed video file not found, using backend stream")
-
-                    # Update session with processed video URL (postvidurl)
-                if session_id and processed_video_url:
-                    try:
-                        logger.info(
-                            f"🔄 Updating session {session_id} with postvidurl: {processed_video_url}")
-                        session_update = requests.put(
-                            f"http://localhost:3000/api/sessions/{session_id}",
-                            json={"postvidurl": processed_video_url},
-                            headers={"Content-Type": "application/json"}
-                        )
-                        if session_update.status_code == 200:
-                            logger.info(
-                                f"✅ Updated session {session_id} with processed video URL")
-                        else:
-                            logger.warn(
-                                f"❌ Failed to update session {session_id}: {session_update.text}")
-                    except Exception as e:
-                        logger.warn(
-                            f"❌ Error updating session with processed video URL: {e}")
-                elif session_id:
-                    logger.warn(
-                        f"⚠️ Not updating session {session_id} - no valid processed video URL")
-
-                # Update status with URLs
-                processing_status[video_id] = {
-                    "status": "completed",
-                    "message": "Processing completed successfully",
-                    "original_url": video_url,
-                    "processed_video_url": processed_video_url,
-                    "output_path": str(actual_output_path) if success else None,
-                    "end_time": datetime.now().isoformat()
-                }
-
-                logger.info(
-                    f"Processing completed for Supabase video {video_id}")
-
-            except Exception as e:
-                logger.error(
-                    f"Error processing Supabase video {video_id}: {e}")
-                processing_status[video_id] = {
-                    "status": "error",
-                    "message": f"Processing failed: {str(e)}",
-                    "end_time": datetime.now().isoformat()
-                }
-
-        # Start processing in background
-        executor.submit(process_and_upload_task)
+        # The signed URL changes on every request, so the storage path identifies the source
+        job = await asyncio.to_thread(
+            job_queue.submit, "process_supabase_video", video_id,
+            params={"storage_path": storage_path, "session_id": session_id, "rotation": rotation,
+                    "segmented": segmented, "analysis_only": analysis_only},
+            payload={"video_url": video_url},
+            exclusive_key=processing_lock(video_id))
+        reject_if_rendering(job)
 
         return {
             "success": True,
             "video_id": video_id,
-            "message": "Supabase video processing started",
-            "status": "processing"
+            "job_id": job["id"],
+            "message": "Supabase video processing started" if job["created"] else "Video is already queued or processed",
+            "status": job_status(job)["status"]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error starting Supabase video processing: {e}")
         raise HTTPException(
             status_code=500, detail=f"Failed to start Supabase video processing: {str(e)}")
 
 
+def load_two_stage_analysis(video_id: str) -> Optional[dict]:
+    """Saved analysis result with the key frames it was based on, or None if there is none yet"""
+    analysis_file = OUTPUT_DIR / f"{video_id}_two_stage_analysis.json"
+    if not analysis_file.exists():
+        return None
+
+    with open(analysis_file, 'r') as f:
+        analysis_data = json.load(f)
+
+    key_frames = []
+    package_file = OUTPUT_DIR / f"{video_id}_key_frames" / "analysis_package.json"
+    if package_file.exists():
+        with open(package_file, 'r') as f:
+            key_frames = json.load(f).get('key_frames', [])
+
+    # The images are not embedded in the package; clients load them from the key frame endpoint
+    for frame in key_frames:
+        frame.pop('image_base64', None)
+        frame.pop('path', None)
+        if frame.get('filename'):
+            frame['image_url'] = f"/api/key-frames/{video_id}/{frame['filename']}"
+
+    return {
+        "success": True,
+        "video_id": video_id,
+        "analysis": analysis_data,
+        "key_frames": key_frames
+    }
+
+
+@app.get("/api/key-frames/{video_id}/{filename}")
+async def get_key_frame_image(video_id: str, filename: str):
+    """Key frame image saved for a video's analysis"""
+    if not re.fullmatch(r"(key|selected|candidate)_frame_\d+\.jpg", filename):
+        raise HTTPException(status_code=404, detail="Key frame not found")
+
+    image_path = OUTPUT_DIR / f"{video_id}_key_frames" / filename
+    if not image_path.exists():
+        raise HTTPException(status_code=404, detail="Key frame not found")
+
+    return FileResponse(path=str(image_path), media_type="image/jpeg")
+
+
 @app.post("/api/two-stage-analysis/{video_id}")
 async def perform_two_stage_analysis(video_id: str):
-    """Perform comprehensive two-stage Claude analysis with key frames and pose data"""
+    """
+    Start comprehensive two-stage Claude analysis with key frames and pose data.
+    Returns 202 with a job handle while the analysis runs in the background; follow it
+    with /api/progress/{video_id}?kind=analysis and read the result from the GET endpoint.
+    Concurrent requests for the same video share one analysis, and a finished
+    analysis of the current angle data is returned right away.
+    """
     start_time = datetime.now()
 
     try:
@@ -596,62 +765,30 @@ async def perform_two_stage_analysis(video_id: str):
             raise HTTPException(
                 status_code=404, detail="Angle data not found. Please process the video first.")
 
-        # Log file operations
-        action_logger.log_file_operation(
-            "READ", angle_file, True, angle_file.stat().st_size)
-
-        # Create key frames directory
-        key_frames_dir = OUTPUT_DIR / f"{video_id}_key_frames"
-        key_frames_dir.mkdir(exist_ok=True)
-        action_logger.log_file_operation("CREATE_DIR", key_frames_dir, True)
-
-        # Load angle data
-        with open(angle_file, 'r') as f:
-            angle_data_raw = json.load(f)
-
-        angle_data = angle_data_raw.get('angle_data', [])
-
-        # Extract key frames with pose data
-        action_logger.log_processing_step(
-            "KEY_FRAME_EXTRACTION", video_id, "started")
-        analysis_package = key_frame_extractor.create_analysis_package(
-            str(video_path),
-            angle_data,
-            str(key_frames_dir)
-        )
-        action_logger.log_processing_step(
-            "KEY_FRAME_EXTRACTION", video_id, "completed")
-
-        if analysis_package.get('error'):
-            action_logger.log_error(
-                "KEY_FRAME_EXTRACTION_FAILED", analysis_package['error'], {"video_id": video_id})
-            raise HTTPException(
-                status_code=500, detail=f"Key frame extraction failed: {analysis_package['error']}")
-
-        # Perform two-stage analysis
-        analysis_result = two_stage_claude_analyzer.analyze_video_comprehensive(
-            analysis_package
-        )
-
-        # Save analysis result
-        analysis_file = OUTPUT_DIR / f"{video_id}_two_stage_analysis.json"
-        with open(analysis_file, 'w') as f:
-            json.dump(analysis_result, f, indent=2)
-
-        action_logger.log_file_operation(
-            "WRITE", analysis_file, True, analysis_file.stat().st_size)
+        # Reprocessing the video rewrites the angle data, which warrants a fresh analysis
+        job = await asyncio.to_thread(
+            job_queue.submit, "two_stage_analysis", video_id,
+            params={"angle_data_mtime": angle_file.stat().st_mtime})
 
         duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-        action_logger.log_api_call("POST", f"/api/two-stage-analysis/{video_id}", 200, duration_ms,
-                                   {"video_id": video_id, "key_frames_count": len(analysis_package.get('key_frames', []))})
-
-        return {
+        if job["state"] == "completed":
+            result = load_two_stage_analysis(video_id)
+            if result is not None:
+                action_logger.log_api_call("POST", f"/api/two-stage-analysis/{video_id}", 200, duration_ms,
+                                           {"video_id": video_id, "job_id": job["id"]})
+                result["job_id"] = job["id"]
+                result["message"] = "Two-stage analysis completed successfully"
+                return result
+
+        action_logger.log_api_call("POST", f"/api/two-stage-analysis/{video_id}", 202, duration_ms,
+                                   {"video_id": video_id, "job_id": job["id"], "created": job["created"]})
+        return JSONResponse(status_code=202, content={
             "success": True,
             "video_id": video_id,
-            "analysis": analysis_result,
-            "key_frames": analysis_package.get('key_frames', []),
-            "message": "Two-stage analysis completed successfully"
-        }
+            "job_id": job["id"],
+            "status": "processing",
+            "message": "Two-stage analysis started" if job["created"] else "Two-stage analysis is already running"
+        })
 
     except HTTPException:
         raise
@@ -661,30 +798,31 @@ async def perform_two_stage_analysis(video_id: str):
                                    {"video_id": video_id, "error": str(e)})
         action_logger.log_error("TWO_STAGE_ANALYSIS_API_ERROR", str(e), {
                                 "video_id": video_id})
-        logger.error(f"Error performing two-stage analysis: {e}")
+        logger.error(f"Error starting two-stage analysis: {e}")
         raise HTTPException(
             status_code=500, detail=f"Two-stage analysis failed: {str(e)}")
 
 
 @app.get("/api/two-stage-analysis/{video_id}")
 async def get_two_stage_analysis(video_id: str):
-    """Get two-stage analysis results"""
+    """Get two-stage analysis results; 202 while an analysis is still running"""
     try:
-        analysis_file = OUTPUT_DIR / f"{video_id}_two_stage_analysis.json"
-
-        if not analysis_file.exists():
+        job = await asyncio.to_thread(job_queue.latest_for_video, video_id, JOB_KINDS["analysis"])
+        if job is not None and job["state"] in ("queued", "running"):
+            return JSONResponse(status_code=202, content=job_status(job))
+
+        result = load_two_stage_analysis(video_id)
+        if result is None:
+            if job is not None and job["state"] == "failed":
+                raise HTTPException(
+                    status_code=500, detail=f"Two-stage analysis failed: {job['message']}")
             raise HTTPException(
                 status_code=404, detail="Two-stage analysis not found. Please run analysis first.")
 
-        with open(analysis_file, 'r') as f:
-            analysis_data = json.load(f)
-
-        return {
-            "success": True,
-            "video_id": video_id,
-            "analysis": analysis_data
-        }
+        return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting two-stage analysis: {e}")
         raise HTTPException(
@@ -695,17 +833,12 @@ async def get_two_stage_analysis(video_id: str):
 async def get_processed_video_data(video_id: str):
     """Return processed video as base64 data for frontend display"""
     try:
-        processed_path = OUTPUT_DIR / f"{video_id}_output.mp4"
-
-        if not processed_path.exists():
-            raise HTTPException(
-                status_code=404, detail="Processed video not found")
+        processed_path = await ensure_overlay_video(video_id)
 
         # Read video file and encode as base64
         with open(processed_path, "rb") as video_file:
             video_data = video_file.read()
 
-        import base64
         video_base64 = base64.b64encode(video_data).decode('utf-8')
 
         return {
@@ -716,6 +849,8 @@ async def get_processed_video_data(video_id: str):
             "mime_type": "video/mp4"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting processed video data: {e}")
         raise HTTPException(
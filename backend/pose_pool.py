@@ -0,0 +1,120 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable
+import numpy as np
+
+
+class PosePool:
+    """
+    Pool of pre-initialized MediaPipe Pose graphs shared across jobs
+
+    Starting the graph and its TFLite interpreters happens on the first frame
+    a graph processes, so warm_up() pushes a blank frame through every
+    instance ahead of time. A returned instance is reset (the tracker and the
+    landmark/visibility smoothing keep state across frames) and warmed again
+    on a background thread before it goes back to the pool, so the next job
+    starts from the same state as a fresh graph without paying the restart.
+    """
+
+    def __init__(self, pose_factory: Callable, size: int):
+        self.pose_factory = pose_factory
+        self.size = max(1, size)
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._blank_frame = np.zeros((64, 64, 3), dtype=np.uint8)
+
+    def warm_up(self):
+        """Create and initialize every pooled graph so no job pays the model-load cost"""
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            try:
+                pose = self._new_pose()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self._idle.put(pose)
+
+    @contextmanager
+    def checkout(self):
+        """Borrow a warm Pose graph for the duration of one video"""
+        pose, pooled = self._acquire()
+        healthy = False
+        try:
+            yield pose
+            healthy = True
+        finally:
+            if pooled and healthy:
+                self._release(pose)
+            else:
+                self._discard(pose, pooled)
+
+    def close(self):
+        """Close all idle graphs"""
+        while True:
+            try:
+                pose = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            pose.close()
+            with self._lock:
+                self._created -= 1
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            grow = self._created < self.size
+            if grow:
+                self._created += 1
+        if grow:
+            try:
+                return self._new_pose(), True
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # More concurrent jobs than pooled graphs: use a throwaway one instead of waiting
+        print("Pose pool exhausted, creating a temporary Pose graph")
+        return self._new_pose(), False
+
+    def _release(self, pose):
+        threading.Thread(target=self._recycle, args=(pose,),
+                         name="pose-pool-recycle", daemon=True).start()
+
+    def _recycle(self, pose):
+        try:
+            pose.reset()
+            self._start_graph(pose)
+        except Exception as e:
+            print(f"Discarding Pose graph that failed to reset: {e}")
+            self._discard(pose, True)
+            return
+        self._idle.put(pose)
+
+    def _discard(self, pose, pooled: bool):
+        try:
+            pose.close()
+        except Exception:
+            pass
+        if pooled:
+            with self._lock:
+                self._created -= 1
+
+    def _new_pose(self):
+        pose = self.pose_factory()
+        self._start_graph(pose)
+        return pose
+
+    def _start_graph(self, pose):
+        # The first processed frame starts the graph; no person in view leaves the tracker idle
+        pose.process(self._blank_frame)
@@ -0,0 +1,256 @@
+import asyncio
+import struct
+import subprocess
+import threading
+from typing import Optional
+import cv2
+import httpx
+import imageio_ffmpeg
+import numpy as np
+
+
+class ProgressiveDownload:
+    """
+    Stream a URL to disk in chunks on the event loop
+
+    Worker threads can follow the file while it grows: wait_for() blocks until
+    a byte offset has been written (or the download ended), so decoding can
+    start before the last byte arrives.
+    """
+
+    def __init__(self, url: str, path: str, chunk_size: int = 256 * 1024, timeout: float = 60.0):
+        self.url = url
+        self.path = path
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.bytes_written = 0
+        self.total_bytes: Optional[int] = None
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+        self._client = None
+        self._response = None
+        self._task = None
+
+    async def start(self):
+        """Open the request and check its status, then copy the body in the background"""
+        self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+        try:
+            self._response = await self._client.send(
+                self._client.build_request("GET", self.url), stream=True)
+            self._response.raise_for_status()
+        except BaseException:
+            await self._close()
+            raise
+
+        content_length = self._response.headers.get("content-length")
+        self.total_bytes = int(content_length) if content_length and content_length.isdigit() else None
+        self._task = asyncio.create_task(self._copy())
+
+    def start_in_thread(self):
+        """
+        Run the download on its own event loop in a background thread, for callers
+        outside the API's loop. Returns once the response status has been checked.
+        """
+        started = threading.Event()
+        errors = []
+
+        async def run():
+            try:
+                await self.start()
+            except BaseException as e:
+                errors.append(e)
+                return
+            finally:
+                started.set()
+            await self._task
+
+        threading.Thread(target=asyncio.run, args=(run(),),
+                         name="progressive-download", daemon=True).start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    async def wait(self):
+        """Wait for the download to finish on the event loop, raising if it failed"""
+        await asyncio.shield(self._task)
+        if self.error is not None:
+            raise RuntimeError(f"Download failed: {self.error}") from self.error
+
+    def wait_for(self, offset: int, timeout: Optional[float] = None) -> int:
+        """
+        Block until at least `offset` bytes are on disk, the download ended or
+        the timeout passed; returns the bytes written so far
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.bytes_written >= offset or self.done, timeout=timeout)
+            return self.bytes_written
+
+    def wait_until_done(self):
+        """Block until the whole file is on disk, raising if the download failed"""
+        with self._condition:
+            while not self.done:
+                self._condition.wait()
+        if self.error is not None:
+            raise RuntimeError(f"Download failed: {self.error}") from self.error
+
+    def moov_before_mdat(self) -> bool:
+        """
+        Walk the top-level MP4 boxes as they arrive. True when the movie header
+        comes before the media data (a "faststart" file), which lets a decoder
+        start on a partial download.
+        """
+        position = 0
+        while True:
+            available = self.wait_for(position + 16)
+            if available < position + 8:
+                return False
+            with open(self.path, "rb") as f:
+                f.seek(position)
+                header = f.read(16)
+            size, box_type = struct.unpack(">I4s", header[:8])
+            if box_type == b"moov":
+                return True
+            if box_type == b"mdat":
+                return False
+            if size == 1:
+                if len(header) < 16:
+                    return False
+                size = struct.unpack(">Q", header[8:16])[0]
+            if size < 8:
+                # Size 0 runs to the end of the file; anything else is not an MP4 box
+                return False
+            position += size
+
+    async def _copy(self):
+        try:
+            with open(self.path, "wb") as f:
+                async for chunk in self._response.aiter_bytes(self.chunk_size):
+                    f.write(chunk)
+                    f.flush()
+                    with self._condition:
+                        self.bytes_written += len(chunk)
+                        self._condition.notify_all()
+            if self.total_bytes is not None and self.bytes_written != self.total_bytes:
+                raise IOError(
+                    f"Download ended after {self.bytes_written} of {self.total_bytes} bytes")
+        except Exception as e:
+            # Reported to whoever waits on the download instead of the event loop
+            self.error = e
+        finally:
+            await self._close()
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    async def _close(self):
+        if self._response is not None:
+            await self._response.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+
+
+class ProgressiveVideoCapture:
+    """
+    cv2.VideoCapture stand-in that decodes a faststart MP4 while it downloads
+
+    The partial file is fed into ffmpeg's stdin as bytes arrive and raw BGR
+    frames are read back from its stdout. Only sequential reading is
+    supported, which is all the single-pass pipeline needs.
+    """
+
+    def __init__(self, download: ProgressiveDownload):
+        self.download = download
+
+        # The movie header is already on disk, so the container metadata is complete
+        probe = cv2.VideoCapture(download.path)
+        self._properties = {
+            cv2.CAP_PROP_FPS: probe.get(cv2.CAP_PROP_FPS),
+            cv2.CAP_PROP_FRAME_WIDTH: probe.get(cv2.CAP_PROP_FRAME_WIDTH),
+            cv2.CAP_PROP_FRAME_HEIGHT: probe.get(cv2.CAP_PROP_FRAME_HEIGHT),
+            cv2.CAP_PROP_FRAME_COUNT: probe.get(cv2.CAP_PROP_FRAME_COUNT),
+        }
+        opened = probe.isOpened()
+        probe.release()
+
+        self.width = int(self._properties[cv2.CAP_PROP_FRAME_WIDTH])
+        self.height = int(self._properties[cv2.CAP_PROP_FRAME_HEIGHT])
+        self._frame_bytes = self.width * self.height * 3
+        self._process = None
+        self._feeder = None
+        self._stopped = threading.Event()
+        if not opened or self._frame_bytes == 0:
+            return
+
+        # OpenCV does not apply the container's display rotation, so neither does ffmpeg here
+        self._process = subprocess.Popen(
+            [imageio_ffmpeg.get_ffmpeg_exe(), '-loglevel', 'error', '-nostats',
+             '-noautorotate', '-i', 'pipe:0',
+             '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-vsync', 'passthrough', 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._feeder = threading.Thread(
+            target=self._feed, name="progressive-feeder", daemon=True)
+        self._feeder.start()
+
+    def isOpened(self) -> bool:
+        return self._process is not None
+
+    def get(self, prop: int) -> float:
+        return self._properties.get(prop, 0.0)
+
+    def set(self, prop: int, value) -> bool:
+        # Seeking would need the rest of the file
+        return False
+
+    def read(self):
+        if self._process is None:
+            return False, None
+        buffer = bytearray(self._frame_bytes)
+        view = memoryview(buffer)
+        filled = 0
+        while filled < self._frame_bytes:
+            count = self._process.stdout.readinto(view[filled:])
+            if not count:
+                if self.download.error is not None:
+                    # A truncated download must not look like the end of the video
+                    raise RuntimeError(f"Download failed: {self.download.error}")
+                return False, None
+            filled += count
+        return True, np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def release(self):
+        if self._process is None:
+            return
+        self._stopped.set()
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        self._process.stdout.close()
+        self._feeder.join()
+        self._process = None
+
+    def _feed(self):
+        """Copy the growing file into ffmpeg, waiting for the download as needed"""
+        position = 0
+        try:
+            with open(self.download.path, "rb") as f:
+                while not self._stopped.is_set():
+                    available = self.download.wait_for(position + 1, timeout=0.5)
+                    if available <= position:
+                        if self.download.done:
+                            # Download finished (or failed) and everything has been passed on
+                            break
+                        continue
+                    f.seek(position)
+                    chunk = f.read(min(available - position, 1024 * 1024))
+                    self._process.stdin.write(chunk)
+                    position += len(chunk)
+        except (BrokenPipeError, ValueError, OSError):
+            # ffmpeg was stopped early by release()
+            pass
+        finally:
+            try:
+                self._process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Optional
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+# Fixed read size for the response body; large enough to keep per-chunk overhead low
+CHUNK_SIZE = 256 * 1024
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def file_response(request: Request, path: Path, media_type: str,
+                  filename: Optional[str] = None,
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serve a file with HTTP Range support
+
+    A single `Range: bytes=...` request gets a 206 with just that slice, so a
+    browser seeking in a <video> element only downloads what it plays. An
+    If-Range validator that no longer matches the file, multiple ranges or a
+    malformed header fall back to the whole file with a 200; a range past the
+    end gets a 416.
+    """
+    stat = os.stat(path)
+    file_size = stat.st_size
+    etag = '"' + hashlib.md5(f"{stat.st_mtime}-{file_size}".encode()).hexdigest() + '"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+    response_headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+    }
+    if filename:
+        response_headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if headers:
+        response_headers.update(headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and _if_range_matches(request.headers.get("if-range"), etag, last_modified):
+        byte_range = _parse_range(range_header, file_size)
+        if byte_range == "unsatisfiable":
+            response_headers["Content-Range"] = f"bytes */{file_size}"
+            return Response(status_code=416, headers=response_headers)
+
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    else:
+        start, end = 0, file_size - 1
+        status_code = 200
+    response_headers["Content-Length"] = str(end - start + 1)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=response_headers, media_type=media_type)
+
+    return StreamingResponse(
+        _iter_file(path, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=response_headers
+    )
+
+
+def _iter_file(path: Path, start: int, end: int):
+    """Yield bytes start..end (inclusive) in fixed-size chunks"""
+    remaining = end - start + 1
+    with open(path, mode="rb") as file_like:
+        file_like.seek(start)
+        while remaining > 0:
+            chunk = file_like.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _if_range_matches(if_range: Optional[str], etag: str, last_modified: str) -> bool:
+    """A Range is only honoured if the client's cached copy is still the current file"""
+    if not if_range:
+        return True
+    return if_range.strip() in (etag, last_modified)
+
+
+def _parse_range(range_header: str, file_size: int):
+    """
+    Return (start, end) for a single byte range, None to ignore the header,
+    or "unsatisfiable" when the range lies outside the file
+    """
+    match = _RANGE_PATTERN.match(range_header.replace(" ", ""))
+    if not match:
+        # Malformed or multiple ranges: serve the whole file
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or file_size == 0:
+            return "unsatisfiable"
+        return max(0, file_size - length), file_size - 1
+
+    start = int(first)
+    end = int(last) if last else file_size - 1
+    if start >= file_size:
+        return "unsatisfiable"
+    if end < start:
+        return None
+    return start, min(end, file_size - 1)
@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Received bytes are collected up to this size before each write to the data file
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+class UploadSessionError(Exception):
+    """Raised for requests that don't fit the upload session; carries an HTTP status code"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class ResumableUploadStore:
+    """
+    Resumable uploads assembled from byte-range chunks
+
+    Every session is a directory holding the preallocated data file and a
+    meta.json with the declared size and the byte ranges received so far, so
+    sessions survive an API restart. Chunks are written in place at their
+    offset and can arrive in any order or be retried; a chunk only counts as
+    received once all of its bytes are on disk.
+    """
+
+    def __init__(self, root: Path, max_size: int, session_ttl_seconds: int = 24 * 3600):
+        self.root = root
+        self.max_size = max_size
+        self.session_ttl_seconds = session_ttl_seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def create(self, size: int, filename: Optional[str] = None) -> Dict:
+        """Start a session for a file of `size` bytes"""
+        if size <= 0:
+            raise UploadSessionError(400, "Upload size must be positive")
+        if size > self.max_size:
+            raise UploadSessionError(
+                413, f"Upload exceeds the {self.max_size // (1024 * 1024)} MB limit")
+
+        self.cleanup_expired()
+
+        upload_id = str(uuid.uuid4())
+        session_dir = self.root / upload_id
+        session_dir.mkdir()
+        with open(session_dir / "data.part", "wb") as f:
+            f.truncate(size)
+
+        meta = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "size": size,
+            "received": [],
+            "created_at": time.time()
+        }
+        self._save_meta(upload_id, meta)
+        return self._describe(meta)
+
+    def status(self, upload_id: str) -> Dict:
+        """Received ranges and the contiguous offset a client should resume from"""
+        with self._lock:
+            return self._describe(self._load_meta(upload_id))
+
+    async def write_chunk(self, upload_id: str, start: int, end: int, total: int, body) -> Dict:
+        """
+        Write bytes start..end (inclusive) from the async byte iterator `body`.
+        The range only counts as received if exactly that many bytes arrived.
+        File and metadata I/O runs in the default executor, off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        meta = await loop.run_in_executor(None, self._locked_meta, upload_id)
+        if total != meta["size"]:
+            raise UploadSessionError(
+                400, f"Chunk total {total} does not match upload size {meta['size']}")
+        if start < 0 or end < start or end >= meta["size"]:
+            raise UploadSessionError(416, f"Chunk range {start}-{end} is outside the upload")
+
+        expected = end - start + 1
+        written = 0
+        pending = bytearray()
+        fd = await loop.run_in_executor(None, os.open, self._data_path(upload_id), os.O_WRONLY)
+        try:
+            async for chunk in body:
+                if not chunk:
+                    continue
+                if written + len(pending) + len(chunk) > expected:
+                    raise UploadSessionError(400, "Chunk body is longer than its Content-Range")
+                pending += chunk
+                if len(pending) >= WRITE_BUFFER_SIZE:
+                    await loop.run_in_executor(None, os.pwrite, fd, bytes(pending), start + written)
+                    written += len(pending)
+                    pending.clear()
+            if pending:
+                await loop.run_in_executor(None, os.pwrite, fd, bytes(pending), start + written)
+                written += len(pending)
+        finally:
+            os.close(fd)
+
+        if written != expected:
+            raise UploadSessionError(
+                400, f"Chunk body has {written} bytes, Content-Range declares {expected}")
+
+        return await loop.run_in_executor(None, self._record_range, upload_id, start, end)
+
+    def finalize(self, upload_id: str, destination: Path) -> Dict:
+        """Move the complete file to `destination`, returning its size and SHA-256"""
+        with self._lock:
+            meta = self._load_meta(upload_id)
+            missing = self._missing_ranges(meta)
+            if missing:
+                raise UploadSessionError(
+                    409, f"Upload is incomplete, missing byte ranges: {missing[:10]}")
+
+            digest = hashlib.sha256()
+            with open(self._data_path(upload_id), "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+
+            os.replace(self._data_path(upload_id), destination)
+            shutil.rmtree(self.root / upload_id, ignore_errors=True)
+
+        return {
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "sha256": digest.hexdigest()
+        }
+
+    def cancel(self, upload_id: str):
+        """Drop a session and the bytes received so far"""
+        with self._lock:
+            self._load_meta(upload_id)
+            shutil.rmtree(self.root / upload_id, ignore_errors=True)
+
+    def cleanup_expired(self):
+        """Remove sessions that were started longer ago than the TTL"""
+        cutoff = time.time() - self.session_ttl_seconds
+        with self._lock:
+            for session_dir in self.root.iterdir():
+                try:
+                    with open(session_dir / "meta.json") as f:
+                        created_at = json.load(f)["created_at"]
+                except (OSError, ValueError, KeyError):
+                    created_at = session_dir.stat().st_mtime
+                if created_at < cutoff:
+                    shutil.rmtree(session_dir, ignore_errors=True)
+
+    def _locked_meta(self, upload_id: str) -> Dict:
+        with self._lock:
+            return self._load_meta(upload_id)
+
+    def _record_range(self, upload_id: str, start: int, end: int) -> Dict:
+        """Mark bytes start..end (inclusive) as received"""
+        with self._lock:
+            meta = self._load_meta(upload_id)
+            meta["received"] = _merge_ranges(meta["received"] + [[start, end + 1]])
+            self._save_meta(upload_id, meta)
+            return self._describe(meta)
+
+    def _describe(self, meta: Dict) -> Dict:
+        received = meta["received"]
+        # Bytes available from the start of the file without gaps
+        offset = received[0][1] if received and received[0][0] == 0 else 0
+        return {
+            "upload_id": meta["upload_id"],
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "offset": offset,
+            "received_bytes": sum(end - start for start, end in received),
+            "received_ranges": [[start, end - 1] for start, end in received],
+            "complete": not self._missing_ranges(meta)
+        }
+
+    def _missing_ranges(self, meta: Dict) -> List[List[int]]:
+        missing = []
+        position = 0
+        for start, end in meta["received"]:
+            if start > position:
+                missing.append([position, start - 1])
+            position = max(position, end)
+        if position < meta["size"]:
+            missing.append([position, meta["size"] - 1])
+        return missing
+
+    def _data_path(self, upload_id: str) -> Path:
+        return self.root / upload_id / "data.part"
+
+    def _load_meta(self, upload_id: str) -> Dict:
+        # Session ids are generated UUIDs; anything else can't name a session directory
+        try:
+            uuid.UUID(upload_id)
+            with open(self.root / upload_id / "meta.json") as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            raise UploadSessionError(404, "Upload session not found")
+
+    def _save_meta(self, upload_id: str, meta: Dict):
+        meta_path = self.root / upload_id / "meta.json"
+        temp_path = meta_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, meta_path)
+
+
+def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    """Merge half-open [start, end) ranges into a sorted list without overlaps"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
@@ -1,232 +1,440 @@
 import cv2
 import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
 import os
 import shutil
 import tempfile
 from moviepy.video.io.VideoFileClip import VideoFileClip
 import numpy as np
 import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+from angle_registry import ANGLE_REGISTRY, AngleDefinition, angle_descriptions, compile_registry, health_ranges
+from angle_statistics import RunningAngleStats
+from frame_pipeline import FramePipeline
+from key_frame_extractor import KeyFrameCapture
+from landmark_store import LANDMARK_NAMES, LandmarkBuffer, landmarks_path, load_video_landmarks, save_landmarks
+from pose_pool import PosePool
+from video_encoder import FfmpegVideoWriter, concat_videos
 
 
 class AngleCalculator:
     """Simple angle calculator for pose landmarks"""
 
+    # Angles are only measured when all of their landmarks are at least this visible
+    MIN_VISIBILITY = 0.5
+
+    def __init__(self, definitions: Optional[List[AngleDefinition]] = None):
+        # The angles to measure; see angle_registry.ANGLE_REGISTRY
+        self.definitions = ANGLE_REGISTRY if definitions is None else definitions
+        self.registry = compile_registry(self.definitions)
+
     def calculate_joint_angles(self, landmarks):
-        """Calculate joint angles from MediaPipe landmarks"""
+        """Calculate joint angles from MediaPipe landmarks (or a list of landmark dicts) for one frame"""
         if not landmarks:
             return {}
 
-        angles = {}
-
-        try:
-            # Handle both MediaPipe landmarks object and list of dictionaries
-            if hasattr(landmarks, 'landmark'):
-                # MediaPipe landmarks object
-                points = landmarks.landmark
-            elif isinstance(landmarks, list):
-                # List of dictionaries (converted format)
-                points = landmarks
-            else:
-                return {}
-
-            # Calculate knee angles
-            # Left hip, knee, ankle
-            if self._has_landmarks(points, [23, 25, 27]):
-                left_knee_angle = self._calculate_angle(
-                    points[23], points[25], points[27]
-                )
-                angles['left_knee_angle'] = left_knee_angle
-
-            # Right hip, knee, ankle
-            if self._has_landmarks(points, [24, 26, 28]):
-                right_knee_angle = self._calculate_angle(
-                    points[24], points[26], points[28]
-                )
-                angles['right_knee_angle'] = right_knee_angle
-
-            # Calculate elbow angles
-            # Left shoulder, elbow, wrist
-            if self._has_landmarks(points, [11, 13, 15]):
-                left_elbow_angle = self._calculate_angle(
-                    points[11], points[13], points[15]
-                )
-                angles['left_elbow_angle'] = left_elbow_angle
-
-            # Right shoulder, elbow, wrist
-            if self._has_landmarks(points, [12, 14, 16]):
-                right_elbow_angle = self._calculate_angle(
-                    points[12], points[14], points[16]
-                )
-                angles['right_elbow_angle'] = right_elbow_angle
-
-            # Calculate hip angles
-            # Left shoulder, hip, knee
-            if self._has_landmarks(points, [11, 23, 25]):
-                left_hip_angle = self._calculate_angle(
-                    points[11], points[23], points[25]
-                )
-                angles['left_hip_angle'] = left_hip_angle
-
-            # Right shoulder, hip, knee
-            if self._has_landmarks(points, [12, 24, 26]):
-                right_hip_angle = self._calculate_angle(
-                    points[12], points[24], points[26]
-                )
-                angles['right_hip_angle'] = right_hip_angle
-
-            # Calculate shoulder angles
-            # Left shoulder, right shoulder, left elbow
-            if self._has_landmarks(points, [11, 12, 13]):
-                left_shoulder_angle = self._calculate_angle(
-                    points[11], points[12], points[13]
-                )
-                angles['left_shoulder_angle'] = left_shoulder_angle
-
-            # Right shoulder, left shoulder, right elbow
-            if self._has_landmarks(points, [12, 11, 14]):
-                right_shoulder_angle = self._calculate_angle(
-                    points[12], points[11], points[14]
-                )
-                angles['right_shoulder_angle'] = right_shoulder_angle
-
-        except Exception as e:
-            print(f"Error calculating angles: {e}")
+        # Handle both MediaPipe landmarks object and list of dictionaries
+        if hasattr(landmarks, 'landmark'):
+            values = [[lm.x, lm.y, lm.z, lm.visibility] for lm in landmarks.landmark]
+        elif isinstance(landmarks, list):
+            values = [[lm.get('x', 0), lm.get('y', 0), lm.get('z', 0), lm.get('visibility', 0)]
+                      for lm in landmarks]
+        else:
             return {}
 
-        return angles
+        values = values[:33]
+        points = np.full((1, 33, 4), np.nan)
+        points[0, :len(values)] = values
+        angles = self.calculate_angles_batch(points)
+        return {name: float(values[0]) for name, values in angles.items() if not np.isnan(values[0])}
 
-    def _has_landmarks(self, points, indices):
-        """Check if all required landmarks are visible"""
-        for idx in indices:
-            if idx >= len(points):
-                return False
+    def calculate_angles_batch(self, landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Angles in degrees for a whole (frames, 33, 4) landmark timeline, all registered
+        angles in one pass. Each angle is a (frames,) array, NaN where one of its
+        landmarks is missing or less than MIN_VISIBILITY visible.
+        """
+        registry = self.registry
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        # Missing landmarks are masked below; zeroed here so they don't spill into other angles
+        points = np.nan_to_num(landmarks[..., :2])
+
+        # The two image-plane vectors of every angle in every frame, (frames, angles, 2)
+        v1 = np.matmul(registry.first_weights, points) + registry.first_offset
+        v2 = np.matmul(registry.second_weights, points) + registry.second_offset
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cos_angle = np.sum(v1 * v2, axis=-1) / (np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1))
+            # Clamp to avoid numerical errors
+            angles = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+            # Missing landmarks are NaN, which fails the comparison too
+            hidden = ~(landmarks[..., 3] >= self.MIN_VISIBILITY)
+        # Angles using any hidden landmark, as a (frames, 33) x (33, angles) product
+        angles[(hidden.astype(np.float64) @ registry.uses.T.astype(np.float64)) > 0] = np.nan
+
+        return {name: angles[:, i] for i, name in enumerate(registry.names)}
+
+    def angle_timeline(self, landmarks: np.ndarray, fps: float,
+                       interpolated_frames: Optional[List[int]] = None,
+                       statistics: Optional[RunningAngleStats] = None,
+                       chunk_frames: int = 4096) -> list:
+        """
+        angle_data entries ({frame, timestamp, angles}) for every frame with at least one
+        measurable angle. With interpolated_frames the entries carry an 'interpolated' flag.
+        The timeline is worked through chunk_frames at a time, so a memory-mapped landmark
+        array is never loaded whole; statistics, if given, is updated with every chunk.
+        """
+        names = self.registry.names
+        interpolated = set(interpolated_frames) if interpolated_frames is not None else None
+
+        angle_data = []
+        for start in range(0, len(landmarks), chunk_frames):
+            angles = self.calculate_angles_batch(landmarks[start:start + chunk_frames])
+            matrix = np.column_stack([angles[name] for name in names])
+            if statistics is not None:
+                statistics.update(matrix)
+
+            measured = ~np.isnan(matrix)
+            for row in np.flatnonzero(measured.any(axis=1)).tolist():
+                frame = start + row
+                entry = {
+                    'frame': frame,
+                    'timestamp': frame / fps,
+                    'angles': {names[i]: value for i, value in enumerate(matrix[row].tolist()) if measured[row, i]}
+                }
+                if interpolated is not None:
+                    entry['interpolated'] = frame in interpolated
+                angle_data.append(entry)
+        return angle_data
 
-            # Handle both MediaPipe landmark objects and dictionary format
-            if hasattr(points[idx], 'visibility'):
-                # MediaPipe landmark object
-                if points[idx].visibility < 0.5:
-                    return False
-            elif isinstance(points[idx], dict):
-                # Dictionary format
-                if points[idx].get('visibility', 0) < 0.5:
-                    return False
-            else:
-                return False
-        return True
+    def get_angle_descriptions(self):
+        """Return descriptions of what each angle represents"""
+        return angle_descriptions(self.definitions)
+
+    def get_health_ranges(self):
+        """Return healthy ranges for each angle"""
+        return health_ranges(self.definitions)
+
+
+class RotationPlan:
+    """
+    Rotation correction worked out once per video and applied to every frame
+
+    Positive angles rotate counterclockwise, like cv2.getRotationMatrix2D.
+    Multiples of 90 degrees use cv2.rotate, a lossless transpose/flip; other
+    angles warp with one cached affine matrix onto a canvas large enough to
+    avoid cropping. width/height are the size of the corrected frames.
+    """
+
+    _RIGHT_ANGLES = {
+        90: cv2.ROTATE_90_COUNTERCLOCKWISE,
+        180: cv2.ROTATE_180,
+        270: cv2.ROTATE_90_CLOCKWISE
+    }
+
+    def __init__(self, rotation: int, width: int, height: int):
+        self.rotation = rotation
+        self.angle = rotation % 360
+        self.rotate_code = self._RIGHT_ANGLES.get(self.angle)
+        self.matrix = None
+
+        if self.angle in (0, 180):
+            self.width, self.height = width, height
+        elif self.rotate_code is not None:
+            self.width, self.height = height, width
+        else:
+            center = (width // 2, height // 2)
+            matrix = cv2.getRotationMatrix2D(center, self.angle, 1.0)
+
+            # Calculate new dimensions to avoid cropping
+            cos = abs(matrix[0, 0])
+            sin = abs(matrix[0, 1])
+            self.width = int((height * sin) + (width * cos))
+            self.height = int((height * cos) + (width * sin))
+
+            # Adjust the rotation matrix to account for translation
+            matrix[0, 2] += (self.width / 2) - center[0]
+            matrix[1, 2] += (self.height / 2) - center[1]
+            self.matrix = matrix
+
+    def apply(self, frame):
+        """Return the rotation-corrected frame"""
+        if self.rotate_code is not None:
+            return cv2.rotate(frame, self.rotate_code)
+        if self.matrix is not None:
+            # A fresh output array per frame: earlier frames may still be queued downstream
+            return cv2.warpAffine(frame, self.matrix, (self.width, self.height))
+        return frame
+
+
+class AdaptiveStrideSampler:
+    """
+    Run pose inference on every Nth frame and interpolate landmarks in between
+
+    Skipped frames are held back until the next sampled frame arrives. If the pose
+    moved more than the motion threshold between the two samples (or appeared or
+    disappeared), the held frames get real inference instead and sampling stays
+    dense until motion has been calm for a full stride.
+    """
+
+    def __init__(self, run_pose, stride: int, motion_threshold: float):
+        self.run_pose = run_pose  # (frame_index, frame) -> pose landmarks or None
+        self.stride = stride
+        self.motion_threshold = motion_threshold
+        self.pending = []  # (frame_index, frame) waiting for the next sample
+        self.anchor_index = None
+        self.anchor_landmarks = None
+        self.dense = False
+        self.calm_frames = 0
+
+    def push(self, frame_index: int, frame) -> list:
+        """Return the (frame_index, frame, landmarks, interpolated) items that are ready"""
+        if self.stride <= 1:
+            return [(frame_index, frame, self.run_pose(frame_index, frame), False)]
+
+        if self.anchor_index is None or self.dense:
+            landmarks = self.run_pose(frame_index, frame)
+            if self.dense:
+                self._update_dense_mode(landmarks)
+            self._set_anchor(frame_index, landmarks)
+            return [(frame_index, frame, landmarks, False)]
+
+        if frame_index - self.anchor_index < self.stride:
+            self.pending.append((frame_index, frame))
+            return []
+
+        landmarks = self.run_pose(frame_index, frame)
+        motion = _landmark_motion(self.anchor_landmarks, landmarks)
+        if motion is None or motion > self.motion_threshold:
+            # Too much movement to interpolate: run the held frames for real as well. The
+            # tracker has already seen the sampled frame, so it steps back by less than a
+            # stride here, which it handles like any other jump (re-detecting the pose if
+            # it loses it); every frame is still inferred exactly once
+            ready = self.flush()
+            self.dense = True
+            self.calm_frames = 0
+        else:
+            ready = self._interpolate_pending(frame_index, landmarks)
+
+        ready.append((frame_index, frame, landmarks, False))
+        self._set_anchor(frame_index, landmarks)
+        return ready
+
+    def flush(self) -> list:
+        """Run inference on any held frames, e.g. at the end of the video"""
+        ready = [(index, frame, self.run_pose(index, frame), False)
+                 for index, frame in self.pending]
+        self.pending = []
+        return ready
+
+    def _interpolate_pending(self, frame_index: int, landmarks) -> list:
+        start = _landmarks_to_array(self.anchor_landmarks)
+        end = _landmarks_to_array(landmarks)
+        ready = []
+        for index, frame in self.pending:
+            if start is None:
+                ready.append((index, frame, None, True))
+                continue
+            t = (index - self.anchor_index) / (frame_index - self.anchor_index)
+            ready.append((index, frame, _array_to_landmarks(
+                start + (end - start) * t), True))
+        self.pending = []
+        return ready
+
+    def _update_dense_mode(self, landmarks):
+        # Per-frame motion scaled up to a full stride predicts the motion between samples
+        motion = _landmark_motion(self.anchor_landmarks, landmarks)
+        if motion is not None and motion * self.stride <= self.motion_threshold:
+            self.calm_frames += 1
+        else:
+            self.calm_frames = 0
+        if self.calm_frames >= self.stride:
+            self.dense = False
+            self.calm_frames = 0
+
+    def _set_anchor(self, frame_index: int, landmarks):
+        self.anchor_index = frame_index
+        self.anchor_landmarks = landmarks
+
+
+
+class ProgressReporter:
+    """
+    Turn frame counts into progress updates for a callback
+
+    Updates carry the stage, frames processed out of total_frames, the
+    processing rate and an ETA. Frame updates are throttled to one per
+    `interval` seconds; stage changes are always sent.
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]], total_frames: int = 0,
+                 interval: float = 0.5):
+        self.callback = callback
+        self.total_frames = total_frames
+        self.interval = interval
+        self.stage = None
+        self.frames_processed = 0
+        self._started_at = None
+        self._last_sent = 0.0
+        self._lock = threading.Lock()
+
+    def set_stage(self, stage: str):
+        with self._lock:
+            self.stage = stage
+            self._send()
+
+    def start_frames(self, total_frames: int):
+        """Begin counting frames for the per-frame stage"""
+        with self._lock:
+            self.total_frames = total_frames
+            self.frames_processed = 0
+            self._started_at = time.time()
+
+    def add_frames(self, count: int = 1):
+        with self._lock:
+            self.frames_processed += count
+            if time.time() - self._last_sent >= self.interval:
+                self._send()
+
+    def _send(self):
+        if self.callback is None:
+            return
+        self._last_sent = time.time()
+
+        fps = None
+        eta_seconds = None
+        if self._started_at is not None and self.frames_processed:
+            elapsed = time.time() - self._started_at
+            if elapsed > 0:
+                fps = self.frames_processed / elapsed
+                if self.total_frames:
+                    remaining = max(0, self.total_frames - self.frames_processed)
+                    eta_seconds = round(remaining / fps, 1)
 
-    def _calculate_angle(self, point1, point2, point3):
-        """Calculate angle between three points"""
         try:
-            # Convert to numpy arrays - handle both MediaPipe objects and dictionaries
-            def get_coords(point):
-                if hasattr(point, 'x') and hasattr(point, 'y'):
-                    # MediaPipe landmark object
-                    return [point.x, point.y]
-                elif isinstance(point, dict):
-                    # Dictionary format
-                    return [point.get('x', 0), point.get('y', 0)]
-                else:
-                    return [0, 0]
+            self.callback({
+                "stage": self.stage,
+                "frames_processed": self.frames_processed,
+                "total_frames": self.total_frames,
+                "fps": round(fps, 1) if fps is not None else None,
+                "eta_seconds": eta_seconds
+            })
+        except Exception as e:
+            # Progress is best-effort and must never fail the job
+            print(f"Progress callback failed: {e}")
 
-            p1 = np.array(get_coords(point1))
-            p2 = np.array(get_coords(point2))
-            p3 = np.array(get_coords(point3))
 
-            # Calculate vectors
-            v1 = p1 - p2
-            v2 = p3 - p2
+def _landmarks_to_array(pose_landmarks) -> Optional[np.ndarray]:
+    """(33, 4) array of x, y, z, visibility, or None when no pose was detected"""
+    if not pose_landmarks:
+        return None
+    return np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in pose_landmarks.landmark],
+                    dtype=np.float64)
 
-            # Calculate angle
-            cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1)
-                                          * np.linalg.norm(v2))
-            # Clamp to avoid numerical errors
-            cos_angle = np.clip(cos_angle, -1.0, 1.0)
-            angle = np.arccos(cos_angle)
 
-            # Convert to degrees
-            return np.degrees(angle)
+def _array_to_landmarks(values: np.ndarray):
+    """Build a MediaPipe landmark list from an (N, 4) array"""
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in np.asarray(values).tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
 
-        except Exception as e:
-            print(f"Error calculating angle: {e}")
-            return 0.0
 
-    def get_angle_descriptions(self):
-        """Return descriptions of what each angle represents"""
-        return {
-            'left_knee_angle': 'Angle between left hip, knee, and ankle',
-            'right_knee_angle': 'Angle between right hip, knee, and ankle',
-            'left_elbow_angle': 'Angle between left shoulder, elbow, and wrist',
-            'right_elbow_angle': 'Angle between right shoulder, elbow, and wrist',
-            'left_hip_angle': 'Angle between left shoulder, hip, and knee',
-            'right_hip_angle': 'Angle between right shoulder, hip, and knee',
-            'left_shoulder_angle': 'Angle at left shoulder joint',
-            'right_shoulder_angle': 'Angle at right shoulder joint'
-        }
+def _landmark_motion(previous, current) -> Optional[float]:
+    """
+    Largest 2D displacement of landmarks visible in both poses, in normalized units.
+    None means the change can't be interpolated (the pose appeared or disappeared).
+    """
+    if not previous and not current:
+        return 0.0
+    if not previous or not current:
+        return None
 
-    def get_health_ranges(self):
-        """Return healthy ranges for each angle"""
-        return {
-            'left_knee_angle': {'min': 0, 'max': 180, 'optimal_range': [150, 180]},
-            'right_knee_angle': {'min': 0, 'max': 180, 'optimal_range': [150, 180]},
-            'left_elbow_angle': {'min': 0, 'max': 180, 'optimal_range': [30, 150]},
-            'right_elbow_angle': {'min': 0, 'max': 180, 'optimal_range': [30, 150]},
-            'left_hip_angle': {'min': 0, 'max': 180, 'optimal_range': [90, 180]},
-            'right_hip_angle': {'min': 0, 'max': 180, 'optimal_range': [90, 180]},
-            'left_shoulder_angle': {'min': 0, 'max': 180, 'optimal_range': [30, 150]},
-            'right_shoulder_angle': {'min': 0, 'max': 180, 'optimal_range': [30, 150]}
-        }
+    before = _landmarks_to_array(previous)
+    after = _landmarks_to_array(current)
+    visible = (before[:, 3] >= 0.5) & (after[:, 3] >= 0.5)
+    if not visible.any():
+        return None
+    return float(np.max(np.hypot(*(after[visible, :2] - before[visible, :2]).T)))
 
 
 class SimpleProcessor:
-    def __init__(self):
+    def __init__(self, pipeline_queue_size: int = 8, segment_workers: Optional[int] = None,
+                 min_segmented_duration: float = 60.0, min_segment_seconds: float = 15.0,
+                 segment_overlap_seconds: float = 1.0, encoder: str = 'ffmpeg',
+                 x264_preset: str = 'veryfast', x264_crf: int = 23, encoder_threads: int = 0,
+                 inference_long_edge: Optional[int] = None, inference_stride: int = 1,
+                 stride_motion_threshold: float = 0.05, pose_pool_size: int = 0,
+                 key_frame_budget: int = 5, key_frame_selection: str = 'motion'):
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
         self.angle_calculator = AngleCalculator()
+        self.landmark_drawing_spec = self.mp_drawing.DrawingSpec(
+            color=(0, 255, 0), thickness=2, circle_radius=2)
+        self.connection_drawing_spec = self.mp_drawing.DrawingSpec(
+            color=(0, 255, 0), thickness=2)
 
         # Landmark names for reference (33 landmarks total)
-        self.landmark_names = [
-            "nose", "left_eye_inner", "left_eye", "left_eye_outer", "right_eye_inner",
-            "right_eye", "right_eye_outer", "left_ear", "right_ear", "mouth_left",
-            "mouth_right", "left_shoulder", "right_shoulder", "left_elbow",
-            "right_elbow", "left_wrist", "right_wrist", "left_pinky",
-            "right_pinky", "left_index", "right_index", "left_thumb",
-            "right_thumb", "left_hip", "right_hip", "left_knee", "right_knee",
-            "left_ankle", "right_ankle", "left_heel", "right_heel", "left_foot_index",
-            "right_foot_index"
-        ]
-
-    def _rotate_frame(self, frame, rotation):
-        """Apply rotation correction to frame"""
-        if rotation == 0:
-            return frame
-
-        height, width = frame.shape[:2]
-        center = (width // 2, height // 2)
-
-        # Get rotation matrix
-        # Testing: Try positive rotation instead of negative
-        # OpenCV: positive = counterclockwise, negative = clockwise
-        print(
-            f"DEBUG: Applying rotation matrix with angle: +{rotation} (counterclockwise)")
-        rotation_matrix = cv2.getRotationMatrix2D(center, rotation, 1.0)
-
-        # Calculate new dimensions to avoid cropping
-        cos = abs(rotation_matrix[0, 0])
-        sin = abs(rotation_matrix[0, 1])
-        new_width = int((height * sin) + (width * cos))
-        new_height = int((height * cos) + (width * sin))
-
-        # Adjust the rotation matrix to account for translation
-        rotation_matrix[0, 2] += (new_width / 2) - center[0]
-        rotation_matrix[1, 2] += (new_height / 2) - center[1]
-
-        # Apply rotation
-        rotated_frame = cv2.warpAffine(
-            frame, rotation_matrix, (new_width, new_height))
-
-        return rotated_frame
-
-    def process_video(self, input_path: str, output_path: str, rotation: int = 0) -> tuple[bool, str]:
+        self.landmark_names = LANDMARK_NAMES
+
+        # Frames allowed to wait between two pipeline stages; bounds memory per job
+        self.pipeline_queue_size = pipeline_queue_size
+
+        # Segmented mode: long videos are split into time ranges processed in parallel
+        self.segment_workers = segment_workers if segment_workers is not None else (
+            os.cpu_count() or 1)
+        self.min_segmented_duration = min_segmented_duration
+        self.min_segment_seconds = min_segment_seconds
+        # Frames before each segment start that are only used to warm up the pose tracker
+        self.segment_overlap_seconds = segment_overlap_seconds
+        self._segment_pool = None
+        self._segment_pool_lock = threading.Lock()
+
+        # Encoder backend: 'ffmpeg' pipes frames straight into libx264, 'opencv' writes
+        # an mp4v file that MoviePy re-encodes afterwards
+        if encoder not in ('ffmpeg', 'opencv'):
+            raise ValueError(f"Unknown encoder backend: {encoder}")
+        self.encoder = encoder
+        self.x264_preset = x264_preset
+        self.x264_crf = x264_crf
+        self.encoder_threads = encoder_threads  # 0 lets x264 choose
+
+        # Long edge in pixels that frames are downscaled to for pose inference only;
+        # the overlay is still drawn on the full-resolution frame. None disables it.
+        self.inference_long_edge = inference_long_edge
+
+        # Adaptive stride: run inference on every Nth frame and interpolate the rest,
+        # falling back to every frame while landmarks move more than the threshold
+        # (in normalized image units) between samples. 1 disables it.
+        self.inference_stride = max(1, inference_stride)
+        self.stride_motion_threshold = stride_motion_threshold
+
+        # Warm Pose graphs reused across jobs; 0 creates a fresh graph per video
+        self.pose_pool = PosePool(self._create_pose, pose_pool_size) if pose_pool_size > 0 else None
+
+        # Key frames captured for the analysis step; should match the KeyFrameExtractor settings
+        self.key_frame_budget = key_frame_budget
+        self.key_frame_selection = key_frame_selection
+
+    def process_video(self, input_path: str, output_path: str, rotation: int = 0,
+                      segmented: Optional[bool] = None, render_overlay: bool = True,
+                      capture=None,
+                      progress: Optional[Callable[[Dict], None]] = None) -> tuple[bool, str]:
+        """
+        Run pose detection over a video, writing the overlay video and angle data.
+        segmented=None picks segmented mode automatically for long videos.
+        render_overlay=False only writes the angle data; the overlay video can be
+        produced later from it with render_overlay_video.
+        capture is an already opened cv2.VideoCapture-like reader to decode from
+        instead of input_path (e.g. one following a download); it is read once
+        from start to end, so segmented mode is not used with it.
+        progress(update) is called with the stage, frames processed, fps and ETA
+        as the video is worked through (see ProgressReporter).
+        """
+        reporter = ProgressReporter(progress)
         try:
             print("=" * 50)
             print("DEBUG: process_video method called with updated code")
@@ -234,325 +442,566 @@ class SimpleProcessor:
             print(f"Video rotation: {rotation} degrees")
             print("=" * 50)
 
+            # The ffmpeg backend encodes the final MP4 in one pass next to output_path;
+            # the OpenCV backend writes an intermediate file that MoviePy re-encodes
+            direct_encode = self.encoder == 'ffmpeg'
+            partial_output = f"{output_path}.part"
+
             # Create temporary directory for intermediate files
             with tempfile.TemporaryDirectory() as temp_dir:
-                temp_output = os.path.join(temp_dir, "temp_processed.mp4")
-
-                # Initialize MediaPipe pose detection
-                with self.mp_pose.Pose(
-                    static_image_mode=False,
-                    model_complexity=1,
-                    enable_segmentation=False,
-                    min_detection_confidence=0.5,
-                    min_tracking_confidence=0.5
-                ) as pose:
-
-                    # Open input video
-                    cap = cv2.VideoCapture(input_path)
-                    if not cap.isOpened():
-                        print(f"Error: Could not open video {input_path}")
-                        return False, ""
-
-                    # Get video properties
-                    fps = int(cap.get(cv2.CAP_PROP_FPS))
-                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
+                temp_output = partial_output if direct_encode else os.path.join(
+                    temp_dir, "temp_processed.mp4")
+
+                # Open input video
+                cap = capture if capture is not None else cv2.VideoCapture(input_path)
+                if not cap.isOpened():
+                    print(f"Error: Could not open video {input_path}")
+                    return False, ""
+
+                # Get video properties
+                fps = int(cap.get(cv2.CAP_PROP_FPS))
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+                print(
+                    f"Video properties: {width}x{height}, {fps} FPS, {total_frames} frames")
+
+                # Everything downstream of decoding sees the rotation-corrected frame size
+                rotation_plan = RotationPlan(rotation, width, height)
+                width, height = rotation_plan.width, rotation_plan.height
+                if rotation_plan.angle:
+                    print(f"DEBUG: Rotated frame size: {width}x{height}")
+
+                # Landmarks go into one preallocated (frames, 33, 4) array instead of per-frame dicts
+                landmarks = LandmarkBuffer(total_frames)
+                # Key frames for the analysis step (or candidates for them) are picked up as the frames go by
+                key_frames = KeyFrameCapture(
+                    total_frames, fps, self.key_frame_budget, self.key_frame_selection)
+                reporter.start_frames(total_frames)
+                reporter.set_stage("pose_detection")
+
+                segment_count = 1 if capture is not None else self._plan_segment_count(
+                    fps, total_frames, segmented)
+                if segment_count > 1:
+                    cap.release()
                     print(
-                        f"Video properties: {width}x{height}, {fps} FPS, {total_frames} frames")
-
-                    # Use H264 codec for better MP4 compatibility
-                    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                    out = cv2.VideoWriter(
-                        temp_output, fourcc, fps, (width, height))
+                        f"DEBUG: Processing video in {segment_count} segments across worker processes")
+                    frame_count = self._process_segments(
+                        input_path, temp_dir, temp_output, segment_count, rotation_plan,
+                        fps, width, height, total_frames, landmarks,
+                        render_overlay, reporter, key_frames)
+                else:
+                    # Borrow a MediaPipe pose detection graph
+                    with self._checkout_pose() as pose:
+                        out = None
+                        if render_overlay:
+                            out = self._open_video_writer(
+                                temp_output, fps, width, height)
+                            if out is None:
+                                print(f"Error: Could not initialize VideoWriter")
+                                cap.release()
+                                return False, ""
 
-                    if not out.isOpened():
+                            print(
+                                f"VideoWriter initialized successfully ({self.encoder} backend)")
                         print(
-                            "Failed to initialize VideoWriter with mp4v, trying H264...")
-                        fourcc = cv2.VideoWriter_fourcc(*'H264')
-                        out = cv2.VideoWriter(
-                            temp_output, fourcc, fps, (width, height))
-
-                        if not out.isOpened():
-                            print("Failed to initialize VideoWriter, using XVID...")
-                            fourcc = cv2.VideoWriter_fourcc(*'XVID')
-                            out = cv2.VideoWriter(
-                                temp_output, fourcc, fps, (width, height))
-
-                    if not out.isOpened():
-                        print(f"Error: Could not initialize VideoWriter")
-                        cap.release()
-                        return False, ""
+                            "DEBUG: Starting staged video processing pipeline with angle data collection")
 
-                    print("VideoWriter initialized successfully")
-
-                    frame_count = 0
-                    processed_frames = []
-                    angle_data = []
-                    landmarks_data = []
+                        try:
+                            frame_count = self._run_frame_pipeline(
+                                cap, out, pose, rotation_plan, fps, width, height, total_frames,
+                                landmarks, reporter=reporter,
+                                key_frames=key_frames)
+                        finally:
+                            # Release everything
+                            cap.release()
+                            if out is not None:
+                                out.release()
+
+                print(f"Processed {frame_count} frames total")
+
+                # Joint angles for the whole timeline in one vectorized pass; the summary
+                # statistics are accumulated along the way
+                angle_statistics = RunningAngleStats(self.angle_calculator.registry.names)
+                angle_data = self.angle_calculator.angle_timeline(
+                    landmarks.array(), fps,
+                    landmarks.interpolated_frames() if self.inference_stride > 1 else None,
+                    statistics=angle_statistics)
+
+                # Save angle data after successful video processing
+                reporter.set_stage("saving_data")
+                self._save_angle_data(
+                    output_path, fps, width, height, total_frames, angle_data, landmarks,
+                    angle_statistics.summary(), rotation)
+                self._save_key_frames(output_path, key_frames)
+
+                # The overlay goes into place last, so it is never older than the angle data
+                # it was drawn from; an older overlay is treated as stale and rendered again
+                if render_overlay:
+                    reporter.set_stage("encoding")
+                    if not self._finalize_video(temp_output, output_path):
+                        return False, ""
 
+                    file_size = os.path.getsize(output_path)
                     print(
-                        "DEBUG: Starting video processing loop with angle data collection")
-
-                    while cap.isOpened():
-                        ret, frame = cap.read()
-                        if not ret:
-                            break
+                        f"Successfully processed video with pose detection: {output_path}")
+                    print(f"Final output file size: {file_size} bytes")
+                else:
+                    print("Analysis-only run: overlay video will be rendered on demand")
 
-                        # Apply rotation correction if needed
-                        if rotation != 0:
-                            print(
-                                f"DEBUG: Applying {rotation}° rotation correction to frame {frame_count}")
-                            frame = self._rotate_frame(frame, rotation)
-                            if frame_count == 0:
-                                print(
-                                    f"DEBUG: Original frame shape: {rgb_frame.shape}, Rotated frame shape: {frame.shape}")
+                return True, output_path if render_overlay else ""
 
-                        # Convert BGR to RGB for MediaPipe
-                        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        except Exception as e:
+            print(f"Error processing video: {e}")
+            if os.path.exists(f"{output_path}.part"):
+                os.remove(f"{output_path}.part")
+            return False, ""
 
-                        # Process frame with MediaPipe
-                        results = pose.process(rgb_frame)
+    def render_overlay_video(self, input_path: str, output_path: str, angles_path: str,
+                             progress: Optional[Callable[[Dict], None]] = None) -> tuple[bool, str]:
+        """
+        Draw the skeleton stored in an angle data file onto the original video.
+        Used to produce the overlay video on demand after an analysis-only run.
+        """
+        reporter = ProgressReporter(progress)
+        try:
+            print(f"Rendering overlay video for {input_path} from {angles_path}")
+            with open(angles_path, 'r') as f:
+                angle_file = json.load(f)
+            rotation = angle_file.get('video_info', {}).get('rotation', 0)
 
-                        # Debug pose detection
-                        if frame_count == 0:
-                            print(
-                                f"DEBUG: First frame - pose landmarks detected: {results.pose_landmarks is not None}")
-                            if results.pose_landmarks:
-                                print(
-                                    f"DEBUG: First frame - number of landmarks: {len(results.pose_landmarks.landmark)}")
-
-                        # Draw pose landmarks on the frame
-                        if results.pose_landmarks:
-                            self.mp_drawing.draw_landmarks(
-                                frame,
-                                results.pose_landmarks,
-                                self.mp_pose.POSE_CONNECTIONS,
-                                landmark_drawing_spec=self.mp_drawing.DrawingSpec(
-                                    color=(0, 255, 0), thickness=2, circle_radius=2),
-                                connection_drawing_spec=self.mp_drawing.DrawingSpec(
-                                    color=(0, 255, 0), thickness=2)
-                            )
-
-                            # Extract landmarks for angle calculation
-                            landmarks = []
-                            for i, landmark in enumerate(results.pose_landmarks.landmark):
-                                landmarks.append({
-                                    'name': self.landmark_names[i],
-                                    'x': landmark.x,
-                                    'y': landmark.y,
-                                    'z': landmark.z,
-                                    'visibility': landmark.visibility
-                                })
-
-                            # Calculate angles for this frame using original MediaPipe landmarks using the MediaPipe landmarks object
-                            if results.pose_landmarks:
-                                frame_angles = self.angle_calculator.calculate_joint_angles(
-                                    results.pose_landmarks)
-                            else:
-                                frame_angles = {}
-                            if frame_angles:
-                                angle_data.append({
-                                    'frame': frame_count,
-                                    'timestamp': frame_count / fps,
-                                    'angles': frame_angles
-                                })
-                                if frame_count == 0:  # Debug first frame
-                                    print(
-                                        f"First frame angles: {frame_angles}")
-                            else:
-                                if frame_count == 0:  # Debug first frame
-                                    print(
-                                        f"No angles calculated for first frame. Landmarks count: {len(landmarks)}")
-                                    print(
-                                        f"Sample landmark: {landmarks[0] if landmarks else 'None'}")
-
-                            # Store landmarks data for ICON viewer
-                            landmarks_data.append({
-                                'frame': frame_count,
-                                'timestamp': frame_count / fps,
-                                'landmarks_2d': [{
-                                    'name': landmark['name'],
-                                    'index': i,
-                                    'pixel': {
-                                        'x': int(landmark['x'] * width),
-                                        'y': int(landmark['y'] * height)
-                                    },
-                                    'normalized': {
-                                        'x': landmark['x'],
-                                        'y': landmark['y'],
-                                        'z': landmark['z']
-                                    },
-                                    'visibility': landmark['visibility'],
-                                    'presence': 1.0
-                                } for i, landmark in enumerate(landmarks)],
-                                'pose_detected': True
-                            })
-                        else:
-                            # No pose detected, add empty data
-                            landmarks_data.append({
-                                'frame': frame_count,
-                                'timestamp': frame_count / fps,
-                                'landmarks_2d': [],
-                                'pose_detected': False
-                            })
-
-                        # Write frame to output video
-                        out.write(frame)
-                        frame_count += 1
-
-                        if frame_count % 30 == 0:  # Log progress every 30 frames
-                            print(
-                                f"Processed {frame_count}/{total_frames} frames")
+            # Memory-mapped landmark array; landmark lists are built per frame while drawing
+            landmarks, _ = load_video_landmarks(angles_path, angle_file)
+            if landmarks is None:
+                landmarks = np.empty((0, 33, 4), dtype=np.float32)
 
-                    # Release everything
+            with tempfile.TemporaryDirectory() as temp_dir:
+                temp_output = f"{output_path}.part" if self.encoder == 'ffmpeg' else os.path.join(
+                    temp_dir, "temp_processed.mp4")
+
+                cap = cv2.VideoCapture(input_path)
+                if not cap.isOpened():
+                    print(f"Error: Could not open video {input_path}")
+                    return False, ""
+
+                fps = int(cap.get(cv2.CAP_PROP_FPS))
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                rotation_plan = RotationPlan(rotation, width, height)
+
+                out = self._open_video_writer(
+                    temp_output, fps, rotation_plan.width, rotation_plan.height)
+                if out is None:
+                    print(f"Error: Could not initialize VideoWriter")
+                    cap.release()
+                    return False, ""
+
+                def overlay(item):
+                    frame_index, frame = item
+                    if frame_index < len(landmarks) and not np.isnan(landmarks[frame_index, 0, 0]):
+                        self._draw_pose(frame, _array_to_landmarks(landmarks[frame_index]))
+                    reporter.add_frames()
+                    return frame
+
+                reporter.start_frames(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+                reporter.set_stage("rendering_overlay")
+
+                try:
+                    FramePipeline(
+                        self._decode_frames(cap, rotation_plan),
+                        [('overlay', overlay), ('encode', out.write)],
+                        queue_size=self.pipeline_queue_size
+                    ).run()
+                finally:
                     cap.release()
                     out.release()
 
-                    # Check if temp file was created
-                    if not os.path.exists(temp_output):
-                        print(f"Error: Temporary output file was not created")
-                        return False, ""
+                reporter.set_stage("encoding")
+                if not self._finalize_video(temp_output, output_path):
+                    return False, ""
 
-                    print(
-                        f"Temporary file created: {os.path.getsize(temp_output)} bytes")
-
-                    # Use MoviePy to ensure proper MP4 format
-                    try:
-                        print("Converting to proper MP4 format using MoviePy...")
-                        clip = VideoFileClip(temp_output)
-
-                        # Write final MP4 with proper encoding
-                        clip.write_videofile(
-                            output_path,
-                            codec='libx264',
-                            audio_codec='aac',
-                            temp_audiofile='temp-audio.m4a',
-                            remove_temp=True,
-                            logger=None
-                        )
-                        clip.close()
-
-                        # Verify the final file was created
-                        if os.path.exists(output_path):
-                            file_size = os.path.getsize(output_path)
-                            print(
-                                f"Successfully processed video with pose detection: {output_path}")
-                            print(f"Final output file size: {file_size} bytes")
-                            print(f"Processed {frame_count} frames total")
+            print(f"Overlay video rendered: {output_path}")
+            return True, output_path
 
-                            # Save angle data after successful video processing
-                            print("DEBUG: Reached angle data saving section")
-                            print(
-                                f"Total angle data entries: {len(angle_data)}")
-                            print(
-                                f"Total landmarks data entries: {len(landmarks_data)}")
-
-                            if angle_data:
-                                # Extract video_id from output_path and create proper filename
-                                video_id = os.path.basename(
-                                    output_path).replace('_output.mp4', '')
-                                angle_output_path = os.path.join(os.path.dirname(
-                                    output_path), f"{video_id}_output_angles.json")
-                                angle_summary = self._create_angle_summary(
-                                    angle_data)
-                                key_frames = self._find_key_frames(angle_data)
-
-                                with open(angle_output_path, 'w') as f:
-                                    json.dump({
-                                        'video_info': {
-                                            'fps': fps,
-                                            'width': width,
-                                            'height': height,
-                                            'total_frames': total_frames
-                                        },
-                                        'angle_data': angle_data,
-                                        'angle_summary': angle_summary,
-                                        'key_frames': key_frames,  # Key frames for Claude analysis
-                                        'angle_descriptions': self.get_angle_descriptions(),
-                                        'health_ranges': self.get_health_ranges(),
-                                        'landmarks_data': landmarks_data  # Include landmarks for ICON viewer
-                                    }, f, indent=2)
-
-                                print(
-                                    f"Angle data saved to: {angle_output_path}")
-                                print(
-                                    f"Angle data file size: {os.path.getsize(angle_output_path)} bytes")
-                                print(
-                                    f"DEBUG: Expected API path: {os.path.join(os.path.dirname(output_path), f'{video_id}_output_angles.json')}")
-                            else:
-                                print(
-                                    "No angle data to save - no angles were calculated!")
-
-                            return True, output_path
-                        else:
-                            print("Error: Final MP4 file was not created")
-                            return False, ""
-
-                    except Exception as e:
-                        print(f"MoviePy conversion error: {e}")
-                        # Fallback: copy temp file to output
-                        try:
-                            shutil.copy2(temp_output, output_path)
-                            if os.path.exists(output_path):
-                                file_size = os.path.getsize(output_path)
-                                print(
-                                    f"Fallback: Copied temp file to {output_path}")
-                                print(f"Output file size: {file_size} bytes")
-
-                                # Save angle data after successful fallback
-                                print(
-                                    f"Total angle data entries: {len(angle_data)}")
-                                print(
-                                    f"Total landmarks data entries: {len(landmarks_data)}")
-
-                                if angle_data:
-                                    # Extract video_id from output_path and create proper filename
-                                    video_id = os.path.basename(
-                                        output_path).replace('_output.mp4', '')
-                                    angle_output_path = os.path.join(os.path.dirname(
-                                        output_path), f"{video_id}_output_angles.json")
-                                    angle_summary = self._create_angle_summary(
-                                        angle_data)
-                                    key_frames = self._find_key_frames(
-                                        angle_data)
-
-                                    with open(angle_output_path, 'w') as f:
-                                        json.dump({
-                                            'video_info': {
-                                                'fps': fps,
-                                                'width': width,
-                                                'height': height,
-                                                'total_frames': total_frames
-                                            },
-                                            'angle_data': angle_data,
-                                            'angle_summary': angle_summary,
-                                            'key_frames': key_frames,  # Key frames for Claude analysis
-                                            'angle_descriptions': self.get_angle_descriptions(),
-                                            'health_ranges': self.get_health_ranges(),
-                                            'landmarks_data': landmarks_data  # Include landmarks for ICON viewer
-                                        }, f, indent=2)
-
-                                    print(
-                                        f"Angle data saved to: {angle_output_path}")
-                                    print(
-                                        f"Angle data file size: {os.path.getsize(angle_output_path)} bytes")
-                                    print(
-                                        f"DEBUG: Expected API path: {os.path.join(os.path.dirname(output_path), f'{video_id}_output_angles.json')}")
-                                else:
-                                    print(
-                                        "No angle data to save - no angles were calculated!")
-
-                                return True, output_path
-                        except Exception as copy_error:
-                            print(f"Fallback copy error: {copy_error}")
+        except Exception as e:
+            print(f"Error rendering overlay video: {e}")
+            if os.path.exists(f"{output_path}.part"):
+                os.remove(f"{output_path}.part")
+            return False, ""
 
-                        return False, ""
+    def _finalize_video(self, temp_output: str, output_path: str) -> bool:
+        """Move the encoded video into place, re-encoding it first for the OpenCV backend"""
+        # Check if temp file was created
+        if not os.path.exists(temp_output):
+            print(f"Error: Temporary output file was not created")
+            return False
+
+        if self.encoder == 'ffmpeg':
+            os.replace(temp_output, output_path)
+            return True
+        return self._reencode_with_moviepy(temp_output, output_path)
+
+    def _reencode_with_moviepy(self, temp_output: str, output_path: str) -> bool:
+        """Convert the OpenCV backend's intermediate file into a browser-friendly MP4"""
+        print(
+            f"Temporary file created: {os.path.getsize(temp_output)} bytes")
+
+        # Use MoviePy to ensure proper MP4 format
+        try:
+            print("Converting to proper MP4 format using MoviePy...")
+            clip = VideoFileClip(temp_output)
+
+            # Write final MP4 with proper encoding
+            clip.write_videofile(
+                output_path,
+                codec='libx264',
+                audio_codec='aac',
+                temp_audiofile='temp-audio.m4a',
+                remove_temp=True,
+                logger=None
+            )
+            clip.close()
+
+            # Verify the final file was created
+            if not os.path.exists(output_path):
+                print("Error: Final MP4 file was not created")
+                return False
+            return True
 
         except Exception as e:
-            print(f"Error processing video: {e}")
-            return False, ""
+            print(f"MoviePy conversion error: {e}")
+            # Fallback: copy temp file to output
+            try:
+                shutil.copy2(temp_output, output_path)
+                print(f"Fallback: Copied temp file to {output_path}")
+                return os.path.exists(output_path)
+            except Exception as copy_error:
+                print(f"Fallback copy error: {copy_error}")
+                return False
+
+    def warm_up(self):
+        """Load the pose model into every pooled graph ahead of the first job"""
+        if self.pose_pool is not None:
+            self.pose_pool.warm_up()
+            print(f"Pose pool warmed up with {self.pose_pool.size} graphs")
+
+    def _checkout_pose(self):
+        """Context manager yielding a Pose graph, from the warm pool when one is configured"""
+        if self.pose_pool is not None:
+            return self.pose_pool.checkout()
+        return self._create_pose()
+
+    def _create_pose(self):
+        """Create a MediaPipe Pose graph configured for video tracking"""
+        return self.mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=1,
+            enable_segmentation=False,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def _open_video_writer(self, path: str, fps: int, width: int, height: int, faststart: bool = True):
+        """
+        Open the configured encoder backend: an ffmpeg/libx264 pipe, or an OpenCV
+        VideoWriter falling back through mp4v, H264 and XVID
+        """
+        if self.encoder == 'ffmpeg':
+            out = FfmpegVideoWriter(
+                path, fps, width, height, preset=self.x264_preset, crf=self.x264_crf,
+                threads=self.encoder_threads, faststart=faststart)
+            return out if out.isOpened() else None
+
+        for codec in ('mp4v', 'H264', 'XVID'):
+            fourcc = cv2.VideoWriter_fourcc(*codec)
+            out = cv2.VideoWriter(path, fourcc, fps, (width, height))
+            if out.isOpened():
+                return out
+            print(f"Failed to initialize VideoWriter with {codec}")
+        return None
+
+    def _save_angle_data(self, output_path: str, fps: int, width: int, height: int,
+                         total_frames: int, angle_data: list, landmarks: LandmarkBuffer,
+                         angle_summary: dict, rotation: int = 0):
+        """Write the angle data and the landmark array next to the processed video"""
+        print("DEBUG: Reached angle data saving section")
+        print(f"Total angle data entries: {len(angle_data)}")
+        print(f"Total landmark frames: {landmarks.frame_count}")
+
+        if not angle_data:
+            print("No angle data to save - no angles were calculated!")
+            return
+
+        # Extract video_id from output_path and create proper filename
+        video_id = os.path.basename(output_path).replace('_output.mp4', '')
+        angle_output_path = os.path.join(os.path.dirname(
+            output_path), f"{video_id}_output_angles.json")
+        key_frames = self._find_key_frames(angle_data)
+
+        # Saved first: the angle data file announces it, and readers look for it once that exists
+        landmark_output_path = landmarks_path(angle_output_path)
+        save_landmarks(landmark_output_path, landmarks.array())
+
+        # Written to a temporary name first, like the landmark array, so readers never see a partial file
+        partial_path = f"{angle_output_path}.part"
+        with open(partial_path, 'w') as f:
+            json.dump({
+                'video_info': {
+                    'fps': fps,
+                    'width': width,
+                    'height': height,
+                    'total_frames': total_frames,
+                    'rotation': rotation
+                },
+                'angle_data': angle_data,
+                'angle_summary': angle_summary,
+                'key_frames': key_frames,  # Key frames for Claude analysis
+                'angle_descriptions': self.get_angle_descriptions(),
+                'health_ranges': self.get_health_ranges(),
+                # (frames, 33, 4) float32 x, y, z, visibility; NaN where no pose was detected.
+                # The per-frame JSON view for the ICON viewer is served by /api/landmarks
+                'landmarks': {
+                    'file': landmark_output_path.name,
+                    'shape': list(landmarks.array().shape),
+                    'dtype': 'float32',
+                    'interpolated_frames': landmarks.interpolated_frames() if self.inference_stride > 1 else None
+                }
+            }, f, indent=2)
+        os.replace(partial_path, angle_output_path)
+
+        print(f"Angle data saved to: {angle_output_path}")
+        print(
+            f"Angle data file size: {os.path.getsize(angle_output_path)} bytes")
+
+    def _save_key_frames(self, output_path: str, key_frames: KeyFrameCapture):
+        """Write the key frames captured during the pass to {video_id}_key_frames next to the video"""
+        key_frames.finish()
+        video_id = os.path.basename(output_path).replace('_output.mp4', '')
+        key_frames_dir = os.path.join(os.path.dirname(output_path), f"{video_id}_key_frames")
+        count = key_frames.save(key_frames_dir)
+        print(f"Saved {count} key frames to: {key_frames_dir}")
+
+    def _plan_segment_count(self, fps: int, total_frames: int, segmented: Optional[bool]) -> int:
+        """Decide how many time segments to split the video into"""
+        if segmented is False or self.segment_workers <= 1 or fps <= 0 or total_frames <= 0:
+            return 1
+
+        duration = total_frames / fps
+        if segmented is None and duration < self.min_segmented_duration:
+            return 1
+
+        # Every segment should be long enough to amortize the warm-up frames
+        max_segments = max(1, int(duration // self.min_segment_seconds))
+        return max(1, min(self.segment_workers, max_segments))
+
+    def _process_segments(self, input_path: str, temp_dir: str, temp_output: str, segment_count: int,
+                          rotation_plan: RotationPlan, fps: int, width: int, height: int, total_frames: int,
+                          landmarks: LandmarkBuffer, render_overlay: bool = True,
+                          reporter: Optional[ProgressReporter] = None,
+                          key_frames: Optional[KeyFrameCapture] = None) -> int:
+        """
+        Process time ranges of the video in worker processes, each with its own Pose graph,
+        then merge their landmarks and join their videos into temp_output
+
+        The first segment matches a single pass exactly, but every later one starts from
+        a fresh tracker: its smoothing and region of interest settle on a slightly
+        different fit, and a longer warm-up doesn't close the gap. On the sample video
+        single elbow angles after the boundary differ by up to ~7 degrees (knees ~20,
+        about the frame-to-frame jitter), while per-angle means and medians agree
+        within ~1 degree. tests/test_segmented_processing.py pins those tolerances.
+        """
+        bounds = [total_frames * i // segment_count for i in range(segment_count + 1)]
+        warmup_frames = int(round(self.segment_overlap_seconds * fps))
+
+        futures = []
+        for i in range(segment_count):
+            # The last segment reads to the real end in case the frame count is approximate
+            end_frame = bounds[i + 1] if i < segment_count - 1 else None
+            segment_path = os.path.join(temp_dir, f"segment_{i:03d}.mp4")
+            futures.append(self._get_segment_pool().submit(
+                _process_segment, self._worker_settings(), input_path,
+                segment_path if render_overlay else None, rotation_plan, bounds[i], end_frame,
+                warmup_frames, fps, width, height, total_frames, key_frames))
+            if reporter is not None:
+                # Segment workers can't reach the callback, so progress moves per finished segment
+                futures[-1].add_done_callback(
+                    lambda future: future.exception() is None and reporter.add_frames(future.result()[1]))
+
+        segment_paths = []
+        frame_count = 0
+        for future in futures:
+            segment_path, segment_frames, segment_landmarks, segment_key_frames = future.result()
+            if key_frames is not None and segment_key_frames is not None:
+                key_frames.merge(segment_key_frames)
+            segment_paths.append(segment_path)
+            frame_count += segment_frames
+            landmarks.merge(segment_landmarks)
+
+        if not render_overlay:
+            return frame_count
+
+        direct_encode = self.encoder == 'ffmpeg'
+        concat_videos(segment_paths, temp_output, os.path.join(temp_dir, "segments.txt"),
+                      faststart=direct_encode, container='mp4' if direct_encode else None)
+        return frame_count
+
+    def _worker_settings(self) -> dict:
+        """Encoder and inference configuration handed to segment worker processes"""
+        return {
+            'encoder': self.encoder,
+            'x264_preset': self.x264_preset,
+            'x264_crf': self.x264_crf,
+            'encoder_threads': self.encoder_threads,
+            'inference_long_edge': self.inference_long_edge,
+            'inference_stride': self.inference_stride,
+            'stride_motion_threshold': self.stride_motion_threshold
+        }
+
+    def _get_segment_pool(self) -> ProcessPoolExecutor:
+        """Process pool shared by all jobs so concurrent videos don't oversubscribe the cores"""
+        with self._segment_pool_lock:
+            if self._segment_pool is None:
+                # MediaPipe graphs are not fork-safe, so workers start from a fresh interpreter
+                self._segment_pool = ProcessPoolExecutor(
+                    max_workers=self.segment_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_segment_worker,
+                    initargs=(self._worker_settings(),))
+            return self._segment_pool
+
+    def _run_frame_pipeline(self, cap, out, pose, rotation_plan: RotationPlan, fps: int,
+                            width: int, height: int, total_frames: int,
+                            landmarks: LandmarkBuffer,
+                            start_frame: int = 0, end_frame: Optional[int] = None,
+                            warmup_frames: int = 0,
+                            reporter: Optional[ProgressReporter] = None,
+                            key_frames: Optional[KeyFrameCapture] = None) -> int:
+        """
+        Decode, run pose inference, draw the overlay and encode on separate threads.
+        Fills landmarks by frame index and returns the frame count.
+        With out=None only the landmark data is produced. width/height
+        are the frame size after rotation_plan has been applied.
+
+        Only frames in [start_frame, end_frame) are recorded and written; up to
+        warmup_frames before start_frame are run through the pose tracker first.
+        key_frames, if given, is offered every recorded frame before drawing.
+        """
+        frames_processed = [0]
+        first_frame = max(0, start_frame - warmup_frames)
+
+        # Inference input size, decided from the first decoded frame
+        inference_size = []
+
+        def run_pose(frame_index, frame):
+            if not inference_size:
+                inference_size.append(self._inference_size(frame.shape[1], frame.shape[0]))
+                print(f"DEBUG: Pose inference resolution: {inference_size[0] or 'full frame'}")
+
+            # Landmarks come back normalized, so a smaller copy gives the same coordinates
+            small_frame = frame
+            if inference_size[0]:
+                small_frame = cv2.resize(
+                    frame, inference_size[0], interpolation=cv2.INTER_AREA)
+
+            # Convert BGR to RGB for MediaPipe
+            rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+
+            # Process frame with MediaPipe
+            results = pose.process(rgb_frame)
+
+            # Debug pose detection
+            if frame_index == first_frame:
+                print(
+                    f"DEBUG: First frame - pose landmarks detected: {results.pose_landmarks is not None}")
+                if results.pose_landmarks:
+                    print(
+                        f"DEBUG: First frame - number of landmarks: {len(results.pose_landmarks.landmark)}")
+
+            return results.pose_landmarks
+
+        sampler = AdaptiveStrideSampler(
+            run_pose, self.inference_stride, self.stride_motion_threshold)
+        def infer(item):
+            frame_index, frame = item
+            return sampler.push(frame_index, frame)
+
+        def overlay(item):
+            frame_index, frame, pose_landmarks, interpolated = item
+            if frame_index < start_frame:
+                # Tracker warm-up frame from the previous segment
+                return None
+
+            if key_frames is not None:
+                # Before the overlay is drawn onto the frame
+                key_frames.offer(frame_index, frame)
+
+            if out is not None:
+                self._draw_pose(frame, pose_landmarks)
+
+            # Angles are computed for the whole timeline once the pass is done
+            landmarks.record(frame_index, pose_landmarks, interpolated)
+
+            frames_processed[0] += 1
+            if reporter is not None:
+                reporter.add_frames()
+            if frames_processed[0] % 30 == 0:  # Log progress every 30 frames
+                print(
+                    f"Processed {frames_processed[0]}/{total_frames - start_frame} frames")
+            return frame
+
+        stages = [('inference', infer, sampler.flush), ('overlay', overlay)]
+        if out is not None:
+            # Write frames to output video
+            stages.append(('encode', out.write))
+
+        FramePipeline(
+            self._decode_frames(cap, rotation_plan, first_frame, end_frame),
+            stages,
+            queue_size=self.pipeline_queue_size
+        ).run()
+
+        return frames_processed[0]
+
+    def _decode_frames(self, cap, rotation_plan: RotationPlan, first_frame: int = 0,
+                       end_frame: Optional[int] = None):
+        """Yield (frame_index, frame) with rotation correction applied"""
+        if first_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, first_frame)
+
+        frame_index = first_frame
+        while cap.isOpened():
+            if end_frame is not None and frame_index >= end_frame:
+                break
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            # Apply rotation correction if needed
+            frame = rotation_plan.apply(frame)
+
+            yield frame_index, frame
+            frame_index += 1
+
+    def _draw_pose(self, frame, pose_landmarks):
+        """Draw pose landmarks on the frame in place"""
+        if pose_landmarks:
+            self.mp_drawing.draw_landmarks(
+                frame,
+                pose_landmarks,
+                self.mp_pose.POSE_CONNECTIONS,
+                landmark_drawing_spec=self.landmark_drawing_spec,
+                connection_drawing_spec=self.connection_drawing_spec
+            )
+
+    def _inference_size(self, width: int, height: int) -> Optional[tuple]:
+        """Size to downscale frames to before pose inference, or None to use them as-is"""
+        long_edge = max(width, height)
+        if not self.inference_long_edge or long_edge <= self.inference_long_edge:
+            return None
+
+        scale = self.inference_long_edge / long_edge
+        return (max(1, round(width * scale)), max(1, round(height * scale)))
 
     def _find_key_frames(self, angle_data: list) -> dict:
         """
@@ -761,58 +1210,71 @@ class SimpleProcessor:
 
         return key_frames
 
-    def _create_angle_summary(self, angle_data: list) -> dict:
-        """
-        Create summary statistics for angle data
-        """
-        if not angle_data:
-            return {}
-
-        # Collect all angle values by type
-        angle_values = {}
-        for frame_data in angle_data:
-            for angle_name, angle_value in frame_data['angles'].items():
-                if angle_name not in angle_values:
-                    angle_values[angle_name] = []
-                angle_values[angle_name].append(angle_value)
-
-        # Calculate statistics for each angle
-        summary = {}
-        for angle_name, values in angle_values.items():
-            if values:
-                summary[angle_name] = {
-                    'mean': np.mean(values),
-                    'std': np.std(values),
-                    'min': np.min(values),
-                    'max': np.max(values),
-                    'count': len(values),
-                    'range': np.max(values) - np.min(values)
-                }
-
-        return summary
-
     def get_angle_descriptions(self):
         """Get descriptions for all calculated angles"""
-        return {
-            'left_knee_angle': 'Left knee joint angle (hip-knee-ankle)',
-            'right_knee_angle': 'Right knee joint angle (hip-knee-ankle)',
-            'left_elbow_angle': 'Left elbow joint angle (shoulder-elbow-wrist)',
-            'right_elbow_angle': 'Right elbow joint angle (shoulder-elbow-wrist)',
-            'left_hip_angle': 'Left hip joint angle (shoulder-hip-knee)',
-            'right_hip_angle': 'Right hip joint angle (shoulder-hip-knee)',
-            'left_shoulder_angle': 'Left shoulder joint angle',
-            'right_shoulder_angle': 'Right shoulder joint angle'
-        }
+        return self.angle_calculator.get_angle_descriptions()
 
     def get_health_ranges(self):
         """Get healthy ranges for joint angles (in degrees)"""
-        return {
-            'left_knee_angle': {'min': 160, 'max': 180, 'optimal': 170},
-            'right_knee_angle': {'min': 160, 'max': 180, 'optimal': 170},
-            'left_elbow_angle': {'min': 140, 'max': 180, 'optimal': 160},
-            'right_elbow_angle': {'min': 140, 'max': 180, 'optimal': 160},
-            'left_hip_angle': {'min': 160, 'max': 180, 'optimal': 170},
-            'right_hip_angle': {'min': 160, 'max': 180, 'optimal': 170},
-            'left_shoulder_angle': {'min': 160, 'max': 180, 'optimal': 170},
-            'right_shoulder_angle': {'min': 160, 'max': 180, 'optimal': 170}
-        }
+        return self.angle_calculator.get_health_ranges()
+
+
+# Per-process processor used by segment workers
+_segment_processor = None
+
+
+def _init_segment_worker(worker_settings: dict):
+    """Create the worker's processor with one warm Pose graph when the process starts"""
+    global _segment_processor
+    _segment_processor = SimpleProcessor(
+        segment_workers=1, pose_pool_size=1, **worker_settings)
+    _segment_processor.warm_up()
+
+
+def _process_segment(worker_settings: dict, input_path: str, segment_path: Optional[str],
+                     rotation_plan: RotationPlan, start_frame: int, end_frame: Optional[int],
+                     warmup_frames: int, fps: int, width: int, height: int, total_frames: int,
+                     key_frames: Optional[KeyFrameCapture] = None) -> tuple:
+    """
+    Process one time range of a video inside a worker process; segment_path=None skips the video.
+    key_frames is an empty capture configured like the parent's, which this segment fills.
+    """
+    if _segment_processor is None:
+        _init_segment_worker(worker_settings)
+    processor = _segment_processor
+    # Settings may differ between jobs sharing this worker
+    for name, value in worker_settings.items():
+        setattr(processor, name, value)
+
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {input_path}")
+
+    out = None
+    if segment_path is not None:
+        # Segments are joined afterwards, so only the joined file needs faststart
+        out = processor._open_video_writer(
+            segment_path, fps, width, height, faststart=False)
+        if out is None:
+            cap.release()
+            raise ValueError(f"Could not initialize VideoWriter for {segment_path}")
+
+    landmarks = LandmarkBuffer((end_frame if end_frame is not None else total_frames) - start_frame,
+                               start_frame=start_frame)
+    try:
+        with processor._checkout_pose() as pose:
+            frame_count = processor._run_frame_pipeline(
+                cap, out, pose, rotation_plan, fps, width, height, total_frames,
+                landmarks, start_frame=start_frame,
+                end_frame=end_frame, warmup_frames=warmup_frames, key_frames=key_frames)
+    finally:
+        cap.release()
+        if out is not None:
+            out.release()
+
+    print(
+        f"Segment {start_frame}-{end_frame if end_frame is not None else 'end'}: {frame_count} frames")
+    if key_frames is not None and end_frame is not None:
+        # Only the last segment's final frame can stand in for a missing last key frame
+        key_frames.last_frame = None
+    return segment_path, frame_count, landmarks.trim(), key_frames
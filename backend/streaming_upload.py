@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+import multipart
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import parse_options_header
+
+
+class MultipartUploadError(Exception):
+    """Raised for upload bodies that can't be accepted; carries an HTTP status code"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class _FilePartCollector:
+    """MultipartParser callbacks that pick out the bytes of one file field"""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.found = False
+        self.pending: List[bytes] = []
+        self._in_target = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._in_target = False
+        self._disposition = b""
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_target:
+            self.pending.append(data[start:end])
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        # Only the first file sent in the field is kept; other fields are skipped
+        if name == self.field_name and b"filename" in options and not self.found:
+            self.found = True
+            self._in_target = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+
+async def receive_multipart_file(content_type: str, body: AsyncIterator[bytes], field_name: str,
+                                 destination: Path, max_size: int) -> Dict:
+    """
+    Stream the file in multipart field `field_name` from the request body straight to
+    `destination`, hashing it on the way. The body is parsed as it arrives, so nothing
+    is spooled to a temporary file first, and the upload is rejected with 413 as soon
+    as the file passes max_size, whether or not a Content-Length was sent.
+    Returns {filename, size, sha256}.
+    """
+    mime_type, params = parse_options_header(content_type)
+    if mime_type != b"multipart/form-data" or b"boundary" not in params:
+        raise MultipartUploadError(400, "Expected a multipart/form-data body")
+
+    collector = _FilePartCollector(field_name)
+    parser = multipart.MultipartParser(params[b"boundary"], collector.callbacks())
+    loop = asyncio.get_running_loop()
+    partial_path = destination.with_name(destination.name + ".part")
+    digest = hashlib.sha256()
+    size = 0
+    f = await loop.run_in_executor(None, open, partial_path, "wb")
+    try:
+        try:
+            async for chunk in body:
+                try:
+                    parser.write(chunk)
+                except MultipartParseError as e:
+                    raise MultipartUploadError(400, f"Malformed multipart body: {e}")
+                if not collector.pending:
+                    continue
+                data = b"".join(collector.pending)
+                collector.pending.clear()
+                size += len(data)
+                if size > max_size:
+                    raise MultipartUploadError(
+                        413, f"Upload exceeds the {max_size // (1024 * 1024)} MB limit")
+                digest.update(data)
+                await loop.run_in_executor(None, f.write, data)
+            parser.finalize()
+        finally:
+            await loop.run_in_executor(None, f.close)
+
+        if not collector.found:
+            raise MultipartUploadError(422, f"Missing {field_name} field")
+        os.replace(partial_path, destination)
+    finally:
+        if partial_path.exists():
+            partial_path.unlink()
+
+    return {
+        "filename": collector.filename,
+        "size": size,
+        "sha256": digest.hexdigest()
+    }
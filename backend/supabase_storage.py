@@ -0,0 +1,93 @@
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import httpx
+
+
+class SupabaseStorage:
+    """
+    Process-wide client for the Supabase Storage REST API
+
+    One httpx connection pool is shared by every job, so uploads reuse
+    keep-alive connections instead of building a new client per video. Files
+    are streamed from disk in fixed-size chunks with a known Content-Length,
+    and upload_files() sends several objects at once.
+    """
+
+    def __init__(self, url: str, key: str, bucket: str = "patient_videos",
+                 max_connections: int = 8, chunk_size: int = 1024 * 1024,
+                 timeout: float = 300.0, transport: Optional[httpx.BaseTransport] = None):
+        self.url = url.rstrip("/")
+        self.bucket = bucket
+        self.chunk_size = chunk_size
+        self._client = httpx.Client(
+            base_url=f"{self.url}/storage/v1",
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=timeout,
+            transport=transport)
+        self._upload_pool = ThreadPoolExecutor(
+            max_workers=max_connections, thread_name_prefix="storage-upload")
+
+    def upload_file(self, remote_path: str, local_path: Path,
+                    content_type: Optional[str] = None, upsert: bool = True) -> str:
+        """Stream a local file to remote_path in the bucket and return the object key"""
+        local_path = Path(local_path)
+        content_type = content_type or mimetypes.guess_type(local_path.name)[0] or "application/octet-stream"
+        response = self._client.post(
+            f"/object/{self.bucket}/{remote_path}",
+            content=self._read_chunks(local_path),
+            headers={
+                "Content-Type": content_type,
+                "Content-Length": str(local_path.stat().st_size),
+                "x-upsert": "true" if upsert else "false",
+            })
+        response.raise_for_status()
+        return response.json().get("Key", f"{self.bucket}/{remote_path}")
+
+    def upload_files(self, uploads: List[Tuple[Path, str]]) -> Dict[str, Optional[str]]:
+        """
+        Upload (local_path, remote_path) pairs in parallel. Returns remote_path ->
+        None on success or the error message, so one failed file doesn't lose the rest.
+        """
+        futures = {
+            remote_path: self._upload_pool.submit(self.upload_file, remote_path, local_path)
+            for local_path, remote_path in uploads
+        }
+        results = {}
+        for remote_path, future in futures.items():
+            try:
+                future.result()
+                results[remote_path] = None
+            except Exception as e:
+                results[remote_path] = str(e)
+        return results
+
+    def create_signed_url(self, remote_path: str, expires_in: int) -> str:
+        """Signed download URL for an object, valid for expires_in seconds"""
+        response = self._client.post(
+            f"/object/sign/{self.bucket}/{remote_path}", json={"expiresIn": expires_in})
+        response.raise_for_status()
+        signed_path = response.json()["signedURL"]
+        return f"{self.url}/storage/v1{signed_path}"
+
+    def close(self):
+        self._upload_pool.shutdown(wait=True)
+        self._client.close()
+
+    def _read_chunks(self, local_path: Path):
+        with open(local_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                yield chunk
+
+
+def create_storage_from_env() -> Optional[SupabaseStorage]:
+    """Build the shared storage client from the Supabase environment variables, if set"""
+    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+    supabase_key = os.getenv('NEXT_PUBLIC_SUPABASE_ANON_KEY')
+    if not supabase_url or not supabase_key:
+        return None
+    return SupabaseStorage(supabase_url, supabase_key)
@@ -0,0 +1,50 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def logger_class(tmp_path, monkeypatch):
+    # The module creates its global logger in ./logs on import
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("action_logger")
+    monkeypatch.setattr(module.ActionLogger, "SHARED_LOG_ROTATE_BYTES", 20 * 1024)
+    monkeypatch.setattr(module.ActionLogger, "SHARED_LOG_CHECK_SECONDS", 0.0)
+    return module.ActionLogger
+
+
+def test_shared_log_rotates_at_runtime(logger_class, tmp_path):
+    logger = logger_class(max_logs=50)
+    for i in range(2000):
+        logger.log_system_event("TEST", f"event {i}")
+
+    current = tmp_path / "logs" / "actions.jsonl"
+    previous = tmp_path / "logs" / "actions.1.jsonl"
+    assert previous.exists()
+    assert current.stat().st_size <= 21 * 1024
+    assert previous.stat().st_size <= 21 * 1024
+
+    messages = [log["message"] for log in logger.get_logs()]
+    assert messages == [f"event {i}" for i in range(1950, 2000)]
+
+
+def test_getters_read_across_the_rotation(logger_class):
+    logger = logger_class(max_logs=200)
+    for i in range(120):
+        logger.log_system_event("TEST", f"event {i}")
+
+    # The current file holds only the newest entries; the rest come from the previous one
+    assert logger.previous_log_path.exists()
+    assert len(logger.shared_log_path.read_text().splitlines()) < 120
+    messages = [log["message"] for log in logger.get_logs() if log["type"] == "SYSTEM_EVENT"]
+    assert messages == ["Action logger initialized"] + [f"event {i}" for i in range(120)]
+
+
+def test_loggers_follow_a_rotation_by_another_process(logger_class):
+    first = logger_class(max_logs=5000)
+    second = logger_class(max_logs=5000)
+    for i in range(150):
+        (first if i % 2 else second).log_system_event("TEST", f"event {i}")
+
+    messages = {log["message"] for log in first.get_logs()}
+    assert {f"event {i}" for i in range(150)} - messages == set()
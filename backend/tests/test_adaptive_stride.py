@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from simple_processor import AdaptiveStrideSampler, _array_to_landmarks
+
+
+class FakePose:
+    """run_pose stand-in that records the order frames are inferred in"""
+
+    def __init__(self, positions):
+        self.positions = positions  # frame index -> x of every landmark
+        self.calls = []
+
+    def __call__(self, frame_index, frame):
+        self.calls.append(frame_index)
+        values = np.zeros((33, 4))
+        values[:, 0] = self.positions(frame_index)
+        values[:, 3] = 1.0
+        return _array_to_landmarks(values)
+
+
+def run(sampler, frame_count):
+    ready = []
+    for index in range(frame_count):
+        ready.extend(sampler.push(index, f"frame-{index}"))
+    ready.extend(sampler.flush())
+    return ready
+
+
+def test_calm_video_only_infers_every_stride():
+    pose = FakePose(lambda index: 0.5 + index * 0.001)
+    ready = run(AdaptiveStrideSampler(pose, stride=3, motion_threshold=0.05), 10)
+
+    assert pose.calls == [0, 3, 6, 9]
+    assert [item[0] for item in ready] == list(range(10))
+    assert [item[3] for item in ready] == [False, True, True] * 3 + [False]
+    # Held frames are interpolated between the samples on either side
+    assert ready[1][2].landmark[0].x == pytest.approx(0.501)
+    assert ready[1][1] == "frame-1"
+
+
+def test_high_motion_infers_every_frame_once():
+    # The pose jumps between frames 4 and 5, then holds still
+    pose = FakePose(lambda index: 0.2 if index < 5 else 0.6)
+    ready = run(AdaptiveStrideSampler(pose, stride=3, motion_threshold=0.05), 14)
+
+    # The sample at 6 sees the jump, so the held frames 4 and 5 run for real after it,
+    # and sampling stays dense until the pose has been calm for a full stride
+    assert pose.calls == [0, 3, 6, 4, 5, 7, 8, 9, 12, 13]
+    assert len(pose.calls) == len(set(pose.calls))
+    assert [item[0] for item in ready] == list(range(14))
+    assert [index for index, _, _, interpolated in ready if interpolated] == [1, 2, 10, 11]
+    assert [item[2].landmark[0].x for item in ready[4:7]] == pytest.approx([0.2, 0.6, 0.6])
+
+
+def test_pose_appearing_counts_as_motion():
+    def run_pose(frame_index, frame):
+        calls.append(frame_index)
+        return None if frame_index < 4 else _array_to_landmarks(np.tile([0.5, 0.5, 0.0, 1.0], (33, 1)))
+
+    calls = []
+    ready = run(AdaptiveStrideSampler(run_pose, stride=3, motion_threshold=0.05), 7)
+    assert calls == [0, 3, 6, 4, 5]
+    assert not any(item[3] for item in ready[3:])
+    assert ready[1][2] is None and ready[1][3]
+
+
+def test_stride_one_infers_every_frame():
+    pose = FakePose(lambda index: 0.5)
+    ready = run(AdaptiveStrideSampler(pose, stride=1, motion_threshold=0.05), 4)
+    assert pose.calls == [0, 1, 2, 3]
+    assert not any(item[3] for item in ready)
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from angle_registry import ANGLE_REGISTRY, UP, AngleDefinition, compile_registry
+from simple_processor import AngleCalculator
+
+# The per-triplet angles computed before the registry existed
+BASELINE_TRIPLETS = {
+    'left_knee_angle': (23, 25, 27),
+    'right_knee_angle': (24, 26, 28),
+    'left_elbow_angle': (11, 13, 15),
+    'right_elbow_angle': (12, 14, 16),
+    'left_hip_angle': (11, 23, 25),
+    'right_hip_angle': (12, 24, 26),
+    'left_shoulder_angle': (11, 12, 13),
+    'right_shoulder_angle': (12, 11, 14),
+}
+
+
+def baseline_angle(point1, point2, point3):
+    """Angle at point2, as the old AngleCalculator._calculate_angle measured it"""
+    v1 = np.array(point1[:2]) - np.array(point2[:2])
+    v2 = np.array(point3[:2]) - np.array(point2[:2])
+    cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
+    return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+
+
+def vector_angle(origin, target, reference):
+    v1 = np.asarray(target) - np.asarray(origin)
+    v2 = np.asarray(reference)
+    return np.degrees(np.arccos(np.clip(
+        np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)), -1.0, 1.0)))
+
+
+@pytest.fixture
+def timeline():
+    rng = np.random.default_rng(3)
+    landmarks = np.empty((200, 33, 4))
+    landmarks[..., :3] = rng.uniform(0, 1, (200, 33, 3))
+    landmarks[..., 3] = rng.uniform(0.3, 1, (200, 33))
+    # Frames without a detected pose
+    landmarks[::17] = np.nan
+    return landmarks
+
+
+def test_joint_angles_match_baseline_triplets(timeline):
+    angles = AngleCalculator().calculate_angles_batch(timeline)
+
+    for name, (first, vertex, second) in BASELINE_TRIPLETS.items():
+        for frame, points in enumerate(timeline):
+            visible = all(points[index, 3] >= 0.5 for index in (first, vertex, second))
+            if visible:
+                assert angles[name][frame] == pytest.approx(
+                    baseline_angle(points[first], points[vertex], points[second]), abs=1e-9)
+            else:
+                assert np.isnan(angles[name][frame])
+
+
+def test_vector_angles_use_midpoints(timeline):
+    angles = AngleCalculator().calculate_angles_batch(timeline)
+
+    for frame, points in enumerate(timeline):
+        if np.isnan(points).any():
+            assert np.isnan(angles['spine_angle'][frame])
+            continue
+        hips = (points[23, :2] + points[24, :2]) / 2
+        shoulders = (points[11, :2] + points[12, :2]) / 2
+        if min(points[[11, 12, 23, 24], 3]) >= 0.5:
+            assert angles['spine_angle'][frame] == pytest.approx(vector_angle(hips, shoulders, UP), abs=1e-9)
+        if min(points[[0, 11, 12], 3]) >= 0.5:
+            assert angles['head_angle'][frame] == pytest.approx(
+                vector_angle(shoulders, points[0, :2], UP), abs=1e-9)
+
+
+def test_single_frame_matches_batch(timeline):
+    calculator = AngleCalculator()
+    batch = calculator.calculate_angles_batch(timeline[:1])
+    landmarks = [{'x': x, 'y': y, 'z': z, 'visibility': v} for x, y, z, v in timeline[0]]
+    single = calculator.calculate_joint_angles(landmarks)
+    expected = {name: values[0] for name, values in batch.items() if not np.isnan(values[0])}
+    assert single == pytest.approx(expected)
+
+
+def test_hidden_landmark_only_masks_its_angles():
+    landmarks = np.zeros((1, 33, 4))
+    landmarks[0, :, :2] = np.random.default_rng(0).uniform(0, 1, (33, 2))
+    landmarks[0, :, 3] = 1.0
+    landmarks[0, 15, 3] = 0.1  # Left wrist
+    angles = AngleCalculator().calculate_angles_batch(landmarks)
+    assert np.isnan(angles['left_elbow_angle'][0])
+    assert not any(np.isnan(values[0]) for name, values in angles.items() if name != 'left_elbow_angle')
+
+
+def test_registering_an_angle_adds_a_row():
+    definitions = ANGLE_REGISTRY + [AngleDefinition(
+        'left_forearm_angle', 'Left forearm vs. vertical', {'min': 0, 'max': 180, 'optimal': 90},
+        side='left', vector=(13, 15), reference=UP)]
+    registry = compile_registry(definitions)
+    assert registry.names[-1] == 'left_forearm_angle'
+    assert registry.first_weights.shape == (len(ANGLE_REGISTRY) + 1, 33)
+    assert registry.uses[-1].nonzero()[0].tolist() == [13, 15]
+
+
+def test_invalid_definitions_are_rejected():
+    with pytest.raises(ValueError):
+        AngleDefinition('bad', '', {}, joint=(1, 2, 3), vector=(1, 2), reference=UP)
+    with pytest.raises(ValueError):
+        AngleDefinition('bad', '', {}, vector=(1, 2))
+    with pytest.raises(ValueError):
+        compile_registry([AngleDefinition('bad', '', {}, joint=(1, 2, 40))])
+    with pytest.raises(ValueError):
+        compile_registry([ANGLE_REGISTRY[0], ANGLE_REGISTRY[0]])
+
+
+def test_upright_pose_has_zero_alignment_angles():
+    landmarks = np.zeros((1, 33, 4))
+    landmarks[0, :, 3] = 1.0
+    # Nose above the shoulders above the hips, mirrored about x = 0.5
+    landmarks[0, 0, :2] = (0.5, 0.1)
+    landmarks[0, 11, :2], landmarks[0, 12, :2] = (0.6, 0.3), (0.4, 0.3)
+    landmarks[0, 23, :2], landmarks[0, 24, :2] = (0.58, 0.6), (0.42, 0.6)
+    angles = AngleCalculator().calculate_angles_batch(landmarks)
+    assert angles['spine_angle'][0] == pytest.approx(0.0, abs=1e-6)
+    assert angles['head_angle'][0] == pytest.approx(0.0, abs=1e-6)
+
+    # Leaning the shoulders forward by 10 degrees shows up as a 10 degree deviation
+    lean = 0.3 * np.tan(np.radians(10))
+    landmarks[0, [11, 12], 0] += lean
+    landmarks[0, 0, 0] += lean
+    angles = AngleCalculator().calculate_angles_batch(landmarks)
+    assert angles['spine_angle'][0] == pytest.approx(10.0, abs=1e-6)
+    assert angles['head_angle'][0] == pytest.approx(0.0, abs=1e-6)
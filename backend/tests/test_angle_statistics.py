@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from angle_statistics import RunningAngleStats, summarize_angle_data
+
+NAMES = ["knee", "elbow", "spine"]
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(7)
+    values = np.column_stack([
+        rng.normal(150, 12, 2000),
+        rng.uniform(30, 170, 2000),
+        rng.normal(8, 3, 2000),
+    ]).clip(0, 180)
+    # Angles go unmeasured while a landmark is hidden
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return values
+
+
+def expected(values, reduce):
+    return np.array([reduce(column[~np.isnan(column)]) for column in values.T])
+
+
+def test_batched_updates_match_numpy(values):
+    stats = RunningAngleStats(NAMES)
+    for start in range(0, len(values), 137):
+        stats.update(values[start:start + 137])
+
+    np.testing.assert_array_equal(stats.count, (~np.isnan(values)).sum(axis=0))
+    np.testing.assert_allclose(stats.mean, expected(values, np.mean), rtol=1e-12)
+    np.testing.assert_allclose(np.sqrt(stats.m2 / stats.count), expected(values, np.std), rtol=1e-10)
+    np.testing.assert_array_equal(stats.min, expected(values, np.min))
+    np.testing.assert_array_equal(stats.max, expected(values, np.max))
+
+
+def test_merged_parts_match_one_pass(values):
+    whole = RunningAngleStats(NAMES)
+    whole.update(values)
+
+    # Uneven parts, including one with no measurements at all
+    merged = RunningAngleStats(NAMES)
+    for part in (values[:1], values[1:700], np.full((5, 3), np.nan), values[700:]):
+        stats = RunningAngleStats(NAMES)
+        stats.update(part)
+        merged.merge(stats)
+
+    np.testing.assert_array_equal(merged.count, whole.count)
+    np.testing.assert_allclose(merged.mean, whole.mean, rtol=1e-12)
+    np.testing.assert_allclose(merged.m2, whole.m2, rtol=1e-10)
+    np.testing.assert_array_equal(merged.histogram, whole.histogram)
+    np.testing.assert_allclose(np.sqrt(merged.m2 / merged.count), expected(values, np.std), rtol=1e-10)
+
+
+def test_large_offset_keeps_precision():
+    # A naive sum-of-squares variance loses all precision here
+    values = (1e8 + np.arange(10, dtype=np.float64)).reshape(-1, 1)
+    stats = RunningAngleStats(["angle"], value_range=(1e8, 1e8 + 10))
+    for row in values:
+        stats.update(row)
+    assert stats.summary()["angle"]["std"] == pytest.approx(np.std(values), rel=1e-9)
+
+
+@pytest.mark.parametrize("q", [10, 25, 50, 75, 90])
+def test_histogram_percentiles_within_a_bin(values, q):
+    stats = RunningAngleStats(NAMES)
+    stats.update(values)
+    bin_width = 180.0 / stats.histogram.shape[1]
+    np.testing.assert_allclose(
+        stats.percentile(q), expected(values, lambda column: np.percentile(column, q)), atol=bin_width)
+
+
+def test_percentiles_clamped_to_observed_values():
+    stats = RunningAngleStats(["angle"])
+    stats.update(np.array([[90.2], [90.4], [90.6]]))
+    assert 90.2 <= stats.percentile(0)[0] <= stats.percentile(100)[0] <= 90.6
+
+
+def test_summary_skips_unmeasured_angles():
+    stats = RunningAngleStats(NAMES)
+    stats.update(np.array([[100.0, np.nan, 5.0], [110.0, np.nan, 7.0]]))
+    summary = stats.summary()
+    assert set(summary) == {"knee", "spine"}
+    knee = summary["knee"]
+    assert (knee['mean'], knee['std'], knee['min'], knee['max'], knee['count'], knee['range']) == (
+        105.0, 5.0, 100.0, 110.0, 2, 10.0)
+    assert knee['p10'] <= knee['p50'] <= knee['p90']
+
+
+def test_summarize_angle_data():
+    angle_data = [
+        {'frame': 0, 'angles': {'knee': 100.0}},
+        {'frame': 1, 'angles': {}},
+        {'frame': 2, 'angles': {'knee': 120.0, 'elbow': 45.0}},
+    ]
+    summary = summarize_angle_data(angle_data)
+    assert summary['knee']['mean'] == pytest.approx(110.0)
+    assert summary['knee']['count'] == 2
+    assert summary['elbow']['count'] == 1
+    assert summarize_angle_data([{'frame': 0, 'angles': {}}]) == {}
@@ -0,0 +1,109 @@
+import itertools
+import threading
+
+import pytest
+
+from frame_pipeline import FramePipeline
+
+
+def run_with_timeout(pipeline, timeout=10.0):
+    """Run the pipeline on a thread so a deadlock fails the test instead of hanging it"""
+    outcome = {}
+
+    def target():
+        try:
+            pipeline.run()
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline did not finish"
+    if 'error' in outcome:
+        raise outcome['error']
+
+
+def test_items_pass_through_stages_in_order():
+    collected = []
+    pipeline = FramePipeline(range(500), [
+        ("double", lambda item: item * 2),
+        ("collect", collected.append),
+    ], queue_size=2)
+    run_with_timeout(pipeline)
+    assert collected == [item * 2 for item in range(500)]
+
+
+def test_stages_can_drop_split_and_flush_items():
+    held = []
+    collected = []
+
+    def hold_back_odd(item):
+        if item % 2:
+            held.append(item)
+            return None
+        return item
+
+    pipeline = FramePipeline(range(6), [
+        ("hold", hold_back_odd, lambda: list(held)),
+        ("split", lambda item: [item, item]),
+        ("collect", collected.append),
+    ])
+    run_with_timeout(pipeline)
+    assert collected == [0, 0, 2, 2, 4, 4, 1, 1, 3, 3, 5, 5]
+
+
+def test_stage_error_is_reraised_with_its_stage():
+    def fail_at_ten(item):
+        if item == 10:
+            raise ValueError("bad frame")
+        return item
+
+    # An endless source must still stop once a stage has failed
+    pipeline = FramePipeline(itertools.count(), [
+        ("inference", fail_at_ten),
+        ("encode", lambda item: None),
+    ], queue_size=1)
+    with pytest.raises(RuntimeError, match="Pipeline stage 'inference' failed: bad frame") as excinfo:
+        run_with_timeout(pipeline)
+    assert isinstance(excinfo.value.__cause__, ValueError)
+
+
+def test_source_error_is_reraised():
+    def frames():
+        yield from range(3)
+        raise IOError("decode failed")
+
+    pipeline = FramePipeline(frames(), [("collect", lambda item: None)])
+    with pytest.raises(RuntimeError, match="Pipeline stage 'source' failed: decode failed"):
+        run_with_timeout(pipeline)
+
+
+def test_error_in_last_stage_stops_upstream():
+    def fail_in_encoder(item):
+        raise KeyError("encoder")
+
+    # The upstream stages block on full queues unless the failure drains them
+    pipeline = FramePipeline(itertools.count(), [
+        ("inference", lambda item: item),
+        ("overlay", lambda item: [item, item]),
+        ("encode", fail_in_encoder),
+    ], queue_size=1)
+    with pytest.raises(RuntimeError, match="Pipeline stage 'encode' failed") as excinfo:
+        run_with_timeout(pipeline)
+    assert isinstance(excinfo.value.__cause__, KeyError)
+
+
+def test_flush_is_skipped_after_an_error():
+    flushed = []
+
+    def fail(item):
+        raise ValueError("boom")
+
+    pipeline = FramePipeline(range(5), [
+        ("fail", fail),
+        ("hold", lambda item: None, lambda: flushed.append(True)),
+    ])
+    with pytest.raises(RuntimeError):
+        run_with_timeout(pipeline)
+    assert flushed == []
@@ -0,0 +1,170 @@
+import pytest
+
+import job_queue
+from job_queue import COMPLETED, FAILED, QUEUED, RUNNING, JobQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(job_queue, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=3, retry_backoff_seconds=10.0,
+                     lease_seconds=60.0)
+    queue.register("process_video", lambda job, progress: {})
+    return queue
+
+
+def test_resubmitting_returns_the_same_job(queue):
+    first = queue.submit("process_video", "v1", {"analysis_only": True}, payload={"url": "a"})
+    again = queue.submit("process_video", "v1", {"analysis_only": True}, payload={"url": "b"})
+    assert first["created"] and not again["created"]
+    assert again["id"] == first["id"]
+    assert again["payload"]["url"] == "a"
+
+    # Different params or another video are different jobs
+    assert queue.submit("process_video", "v1", {"analysis_only": False})["created"]
+    assert queue.submit("process_video", "v2", {"analysis_only": True})["created"]
+
+
+def test_completed_job_is_not_rerun_until_expired(queue):
+    job = queue.submit("process_video", "v1", {})
+    claimed = queue.claim("worker-a")
+    queue.complete(claimed, {"message": "done"})
+
+    again = queue.submit("process_video", "v1", {})
+    assert again["id"] == job["id"] and again["state"] == COMPLETED
+    assert again["result"] == {"message": "done"}
+
+    queue.expire(job["id"])
+    fresh = queue.submit("process_video", "v1", {})
+    assert fresh["created"] and fresh["id"] != job["id"]
+
+
+def test_failed_job_can_be_resubmitted(queue, clock):
+    queue.submit("process_video", "v1", {})
+    for _ in range(3):
+        job = queue.claim("worker-a")
+        queue.fail(job, "boom")
+        clock.now += 1000
+    assert queue.get(job["id"])["state"] == FAILED
+    assert queue.submit("process_video", "v1", {})["created"]
+
+
+def test_exclusive_key_allows_one_active_job(queue):
+    first = queue.submit("process_video", "v1", {"upload_mtime": 1}, exclusive_key="processing:v1")
+    blocked = queue.submit("process_video", "v1", {"upload_mtime": 2}, exclusive_key="processing:v1")
+    assert not blocked["created"] and blocked["id"] == first["id"]
+    assert queue.submit("process_video", "v2", {}, exclusive_key="processing:v2")["created"]
+
+    queue.complete(queue.claim("worker-a"), {})
+    assert queue.submit("process_video", "v1", {"upload_mtime": 2}, exclusive_key="processing:v1")["created"]
+
+
+def test_claim_takes_jobs_in_order_and_only_once(queue, clock):
+    first = queue.submit("process_video", "v1", {})
+    clock.now += 1
+    second = queue.submit("process_video", "v2", {})
+    queue.submit("unregistered_kind", "v3", {})
+
+    claimed = queue.claim("worker-a")
+    assert claimed["id"] == first["id"]
+    assert (claimed["state"], claimed["attempts"], claimed["worker_id"]) == (RUNNING, 1, "worker-a")
+    assert queue.claim("worker-b")["id"] == second["id"]
+    assert queue.claim("worker-c") is None
+
+
+def test_expired_lease_is_claimed_again(queue, clock):
+    job = queue.submit("process_video", "v1", {})
+    stale = queue.claim("worker-a")
+
+    clock.now += 59
+    assert queue.claim("worker-b") is None
+
+    clock.now += 2
+    reclaimed = queue.claim("worker-b")
+    assert reclaimed["id"] == job["id"]
+    assert (reclaimed["worker_id"], reclaimed["attempts"]) == ("worker-b", 2)
+
+    # The worker that lost its lease can no longer finish the job
+    queue.complete(stale, {"message": "late"})
+    assert queue.get(job["id"])["state"] == RUNNING
+    queue.complete(reclaimed, {"message": "done"})
+    assert queue.get(job["id"])["result"] == {"message": "done"}
+
+
+def test_job_that_keeps_losing_its_lease_fails(queue, clock):
+    job = queue.submit("process_video", "v1", {})
+    for _ in range(3):
+        assert queue.claim("worker-a") is not None
+        clock.now += 61
+    assert queue.claim("worker-a") is None
+    failed = queue.get(job["id"])
+    assert failed["state"] == FAILED
+    assert failed["message"] == "Worker stopped responding"
+
+
+def test_failures_retry_with_exponential_backoff(queue, clock):
+    job = queue.submit("process_video", "v1", {})
+    for delay in (10, 20):
+        claimed = queue.claim("worker-a")
+        queue.fail(claimed, "boom")
+        retry = queue.get(job["id"])
+        assert retry["state"] == QUEUED
+        assert retry["run_at"] == clock.now + delay
+        assert retry["message"].startswith(f"Attempt {claimed['attempts']} failed, retrying")
+
+        clock.now += delay - 1
+        assert queue.claim("worker-a") is None
+        clock.now += 1
+
+    last = queue.claim("worker-a")
+    assert last["attempts"] == 3
+    queue.fail(last, "boom")
+    failed = queue.get(job["id"])
+    assert (failed["state"], failed["message"]) == (FAILED, "boom")
+    assert queue.claim("worker-a") is None
+
+
+def test_handler_errors_are_retried(queue, clock):
+    calls = []
+
+    def handler(job, progress):
+        calls.append(job["attempts"])
+        progress({"stage": "pose_detection"})
+        if len(calls) == 1:
+            raise RuntimeError("transient")
+        return {"message": "ok"}
+
+    queue.register("process_video", handler)
+    job = queue.submit("process_video", "v1", {})
+    queue._run(queue.claim("worker-a"))
+    assert queue.get(job["id"])["state"] == QUEUED
+
+    clock.now += 10
+    queue._run(queue.claim("worker-a"))
+    done = queue.get(job["id"])
+    assert calls == [1, 2]
+    assert (done["state"], done["message"], done["progress"]) == (COMPLETED, "ok", {"stage": "pose_detection"})
+
+
+def test_cleanup_removes_expired_finished_jobs(queue, clock):
+    job = queue.submit("process_video", "v1", {})
+    queue.complete(queue.claim("worker-a"), {})
+    clock.now += queue.finished_ttl_seconds - 1
+    assert queue.cleanup() == 0
+    clock.now += 2
+    assert queue.cleanup() == 1
+    assert queue.get(job["id"]) is None
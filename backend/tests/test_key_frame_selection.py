@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+import pytest
+
+from key_frame_extractor import build_contact_sheet, key_frame_positions, select_key_frames
+
+
+def timeline(total_frames=100, events=((30, 'left_knee_angle', -80), (70, 'left_elbow_angle', 60))):
+    """Angle data with a smooth dip or peak of the given size in one joint at each event frame"""
+    frames = np.arange(total_frames)
+    angles = {'left_knee_angle': np.full(total_frames, 170.0), 'left_elbow_angle': np.full(total_frames, 150.0)}
+    for frame, name, size in events:
+        angles[name] = angles[name] + size * np.exp(-((frames - frame) / 3.0) ** 2)
+    return [{'frame': int(frame), 'timestamp': frame / 25,
+             'angles': {name: float(values[frame]) for name, values in angles.items()}}
+            for frame in frames]
+
+
+def jpeg(color, width=640, height=360):
+    return cv2.imencode('.jpg', np.full((height, width, 3), color, dtype=np.uint8))[1].tobytes()
+
+
+def test_key_frame_positions():
+    assert key_frame_positions(100, 5) == [19, 39, 59, 79, 99]
+    assert key_frame_positions(3, 5) == [0, 1, 2]
+
+
+def test_without_angle_data_frames_are_evenly_spaced():
+    assert select_key_frames([], 100, 5) == [19, 39, 59, 79, 99]
+    assert select_key_frames([{'frame': 10, 'angles': {}}], 100, 5) == [19, 39, 59, 79, 99]
+
+
+def test_movement_extremes_are_selected():
+    selected = select_key_frames(timeline(), 100, max_frames=2)
+    assert len(selected) == 2
+    assert abs(selected[0] - 30) <= 5
+    assert abs(selected[1] - 70) <= 5
+
+
+def test_selected_frames_keep_their_spacing():
+    selected = select_key_frames(timeline(), 100, max_frames=5, min_spacing=15)
+    assert selected == sorted(selected)
+    assert all(b - a >= 15 for a, b in zip(selected, selected[1:]))
+
+
+def test_low_visibility_pose_loses_to_an_equal_clear_one():
+    data = timeline(events=((30, 'left_knee_angle', -80), (70, 'left_knee_angle', -80)))
+    landmarks = np.ones((100, 33, 4))
+    landmarks[20:40, :, 3] = 0.3
+    selected = select_key_frames(data, 100, max_frames=1, landmarks=landmarks)
+    assert abs(selected[0] - 70) <= 5
+
+
+def test_interpolated_frames_count_half():
+    data = timeline(events=((30, 'left_knee_angle', -80), (70, 'left_knee_angle', -80)))
+    for entry in data[20:40]:
+        entry['interpolated'] = True
+    selected = select_key_frames(data, 100, max_frames=1)
+    assert abs(selected[0] - 70) <= 5
+
+
+def test_only_candidates_are_picked():
+    candidates = list(range(4, 100, 8))
+    selected = select_key_frames(timeline(), 100, max_frames=2, candidates=candidates)
+    assert set(selected) <= set(candidates)
+    assert abs(selected[0] - 30) <= 4
+    assert abs(selected[1] - 70) <= 4
+
+
+def test_contact_sheet_tiles_frames_in_reading_order():
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (0, 255, 255)]
+    sheet = cv2.imdecode(np.frombuffer(build_contact_sheet(
+        [jpeg(color) for color in colors], [f"Frame {i}" for i in range(5)], long_edge=1568),
+        dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    # Three 16:9 tiles across, two rows, long edge within the limit
+    assert max(sheet.shape[:2]) <= 1568
+    tile_height, tile_width = sheet.shape[0] // 2, sheet.shape[1] // 3
+    assert tile_width / tile_height == pytest.approx(16 / 9, rel=0.01)
+    for index, color in enumerate(colors):
+        center = sheet[(index // 3) * tile_height + tile_height // 2, (index % 3) * tile_width + tile_width // 2]
+        assert np.abs(center.astype(int) - color).max() < 10
+    # The unused last tile stays black
+    assert sheet[tile_height + tile_height // 2, 2 * tile_width + tile_width // 2].max() < 10
+
+
+def test_contact_sheet_letterboxes_other_aspect_ratios():
+    sheet = cv2.imdecode(np.frombuffer(build_contact_sheet(
+        [jpeg((255, 255, 255)), jpeg((255, 255, 255), width=360, height=640)], ["a", "b"]),
+        dtype=np.uint8), cv2.IMREAD_COLOR)
+    tile_width = sheet.shape[1] // 2
+    middle = sheet.shape[0] // 2
+    # The portrait frame is centred in its landscape tile with black bars at the sides
+    assert sheet[middle, tile_width + tile_width // 2].min() > 245
+    assert sheet[middle, tile_width + 5].max() < 10
+
+
+def test_contact_sheet_rejects_undecodable_images():
+    with pytest.raises(ValueError):
+        build_contact_sheet([b"not a jpeg"], ["a"])
+    with pytest.raises(ValueError):
+        build_contact_sheet([], [])
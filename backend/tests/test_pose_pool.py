@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from pose_pool import PosePool
+
+
+class FakePose:
+    """Stand-in for mp.solutions.pose.Pose that records its lifecycle"""
+
+    def __init__(self, fail_reset=False):
+        self.processed = 0
+        self.resets = 0
+        self.closed = False
+        self.fail_reset = fail_reset
+
+    def process(self, frame):
+        self.processed += 1
+
+    def reset(self):
+        if self.fail_reset:
+            raise RuntimeError("graph is broken")
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def created():
+    return []
+
+
+@pytest.fixture
+def make_pool(created):
+    def make(size, **kwargs):
+        def factory():
+            pose = FakePose(**kwargs)
+            created.append(pose)
+            return pose
+        return PosePool(factory, size)
+    return make
+
+
+def wait_for_idle(pool, count):
+    deadline = time.time() + 5
+    while pool._idle.qsize() < count:
+        assert time.time() < deadline, "pose was not returned to the pool"
+        time.sleep(0.01)
+
+
+def test_warm_up_starts_every_graph(make_pool, created):
+    pool = make_pool(3)
+    pool.warm_up()
+    pool.warm_up()
+    assert len(created) == 3
+    assert [pose.processed for pose in created] == [1, 1, 1]
+
+
+def test_returned_pose_is_reset_warmed_and_reused(make_pool, created):
+    pool = make_pool(1)
+    pool.warm_up()
+
+    with pool.checkout() as pose:
+        assert pose is created[0]
+    wait_for_idle(pool, 1)
+    assert (pose.resets, pose.processed, pose.closed) == (1, 2, False)
+
+    with pool.checkout() as again:
+        assert again is pose
+    assert len(created) == 1
+
+
+def test_exhausted_pool_lends_a_temporary_pose(make_pool, created):
+    pool = make_pool(1)
+    with pool.checkout() as pooled:
+        with pool.checkout() as temporary:
+            assert temporary is not pooled
+        assert temporary.closed
+    wait_for_idle(pool, 1)
+    assert not pooled.closed
+    assert len(created) == 2
+
+
+def test_failed_job_discards_its_pose(make_pool, created):
+    pool = make_pool(1)
+    with pytest.raises(ValueError):
+        with pool.checkout() as broken:
+            raise ValueError("job failed")
+    assert broken.closed
+    assert pool._idle.qsize() == 0
+
+    # The slot is free again, so the next job gets a new pooled graph
+    with pool.checkout() as pose:
+        assert pose is not broken
+    wait_for_idle(pool, 1)
+
+
+def test_pose_that_fails_to_reset_is_discarded(make_pool, created):
+    pool = make_pool(1, fail_reset=True)
+    with pool.checkout() as pose:
+        pass
+    deadline = time.time() + 5
+    while pool._created:
+        assert time.time() < deadline, "pose was not discarded"
+        time.sleep(0.01)
+    assert pose.closed
+    assert pool._idle.qsize() == 0
+
+
+def test_close_closes_idle_poses(make_pool, created):
+    pool = make_pool(2)
+    pool.warm_up()
+    pool.close()
+    assert all(pose.closed for pose in created)
+    assert pool._created == 0
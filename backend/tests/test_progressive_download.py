@@ -0,0 +1,146 @@
+import struct
+import subprocess
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import cv2
+import httpx
+import imageio_ffmpeg
+import numpy as np
+import pytest
+
+from progressive_download import ProgressiveDownload, ProgressiveVideoCapture
+
+
+class Handler(SimpleHTTPRequestHandler):
+    """Serves the test directory; /truncated/<name> declares the full size but sends half"""
+
+    def do_GET(self):
+        if not self.path.startswith("/truncated/"):
+            return super().do_GET()
+        data = (Path(self.directory) / self.path[len("/truncated/"):]).read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data[:len(data) // 2])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=str(tmp_path)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def faststart_video(tmp_path):
+    path = tmp_path / "clip.mp4"
+    subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-loglevel", "error", "-f", "lavfi",
+         "-i", "testsrc=size=64x48:rate=10", "-frames:v", "20", "-c:v", "libx264",
+         "-pix_fmt", "yuv420p", "-movflags", "+faststart", str(path)],
+        check=True)
+    return path
+
+
+def box(box_type: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def download(server, tmp_path, name):
+    result = ProgressiveDownload(f"{server}/{name}", str(tmp_path / f"downloaded-{name.replace('/', '-')}"),
+                                 chunk_size=1024)
+    result.start_in_thread()
+    return result
+
+
+def test_download_writes_the_whole_file(server, tmp_path):
+    data = bytes(range(256)) * 1000
+    (tmp_path / "data.bin").write_bytes(data)
+
+    result = download(server, tmp_path, "data.bin")
+    result.wait_until_done()
+
+    assert result.total_bytes == len(data)
+    assert result.wait_for(len(data) + 1) == len(data)
+    assert (tmp_path / "downloaded-data.bin").read_bytes() == data
+
+
+def test_error_status_is_raised_when_starting(server, tmp_path):
+    with pytest.raises(httpx.HTTPStatusError):
+        download(server, tmp_path, "missing.mp4")
+
+
+def test_truncated_download_is_an_error(server, tmp_path):
+    (tmp_path / "data.bin").write_bytes(b"x" * 100_000)
+    result = download(server, tmp_path, "truncated/data.bin")
+    with pytest.raises(RuntimeError, match="Download failed"):
+        result.wait_until_done()
+
+
+@pytest.mark.parametrize("boxes, expected", [
+    ([box(b"ftyp", b"isom"), box(b"moov", b"m" * 100), box(b"mdat", b"d" * 5000)], True),
+    ([box(b"ftyp", b"isom"), box(b"mdat", b"d" * 5000), box(b"moov", b"m" * 100)], False),
+    # A 64-bit box size before the movie header
+    ([box(b"ftyp", b"isom"), struct.pack(">I4sQ", 1, b"free", 16 + 3000) + b"f" * 3000,
+      box(b"moov")], True),
+    ([box(b"ftyp", b"isom")], False),
+    ([b"not an mp4 file at all"], False),
+])
+def test_moov_before_mdat(server, tmp_path, boxes, expected):
+    (tmp_path / "video.mp4").write_bytes(b"".join(boxes))
+    assert download(server, tmp_path, "video.mp4").moov_before_mdat() is expected
+
+
+def test_decodes_through_the_ffmpeg_pipe(server, tmp_path, faststart_video):
+    result = download(server, tmp_path, "clip.mp4")
+    assert result.moov_before_mdat()
+
+    capture = ProgressiveVideoCapture(result)
+    try:
+        assert capture.isOpened()
+        assert (capture.get(cv2.CAP_PROP_FRAME_WIDTH), capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (64, 48)
+        assert capture.get(cv2.CAP_PROP_FPS) == pytest.approx(10)
+        frames = []
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+    finally:
+        capture.release()
+
+    reference = cv2.VideoCapture(str(faststart_video))
+    expected = []
+    while True:
+        ok, frame = reference.read()
+        if not ok:
+            break
+        expected.append(frame)
+    reference.release()
+
+    assert len(frames) == len(expected) == 20
+    for frame, expected_frame in zip(frames, expected):
+        assert frame.shape == expected_frame.shape
+        assert np.abs(frame.astype(int) - expected_frame.astype(int)).mean() < 3
+
+
+def test_truncated_download_fails_decoding(server, tmp_path, faststart_video):
+    result = download(server, tmp_path, "truncated/clip.mp4")
+    assert result.moov_before_mdat()
+
+    capture = ProgressiveVideoCapture(result)
+    try:
+        with pytest.raises(RuntimeError, match="Download failed"):
+            while capture.read()[0]:
+                pass
+    finally:
+        capture.release()
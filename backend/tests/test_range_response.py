@@ -0,0 +1,108 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from range_response import _parse_range, file_response
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes = 10 - 19", (10, 19)),
+    # Suffix ranges: the last N bytes, the whole file if N is larger than it
+    ("bytes=-100", (924, 1023)),
+    ("bytes=-1", (1023, 1023)),
+    ("bytes=-5000", (0, 1023)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert _parse_range(header, 1024) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=2000-3000", "bytes=-0"])
+def test_ranges_past_the_end_are_unsatisfiable(header):
+    assert _parse_range(header, 1024) == "unsatisfiable"
+
+
+def test_suffix_range_of_empty_file_is_unsatisfiable():
+    assert _parse_range("bytes=-10", 0) == "unsatisfiable"
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=0-99,200-299",
+    "bytes=-",
+    "bytes=50-10",
+    "items=0-99",
+    "bytes=abc-",
+])
+def test_multiple_or_malformed_ranges_are_ignored(header):
+    assert _parse_range(header, 1024) is None
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(CONTENT)
+    app = FastAPI()
+
+    @app.api_route("/video", methods=["GET", "HEAD"])
+    def video(request: Request):
+        return file_response(request, path, "video/mp4")
+
+    return TestClient(app)
+
+
+def test_full_file_without_range(client):
+    response = client.get("/video")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == "1024"
+
+
+def test_single_range_returns_partial_content(client):
+    response = client.get("/video", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[100:200]
+    assert response.headers["content-range"] == "bytes 100-199/1024"
+    assert response.headers["content-length"] == "100"
+
+
+def test_suffix_range_returns_file_tail(client):
+    response = client.get("/video", headers={"Range": "bytes=-24"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-24:]
+    assert response.headers["content-range"] == "bytes 1000-1023/1024"
+
+
+def test_range_past_the_end_returns_416(client):
+    response = client.get("/video", headers={"Range": "bytes=4096-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+    assert response.content == b""
+
+
+def test_multiple_ranges_fall_back_to_full_file(client):
+    response = client.get("/video", headers={"Range": "bytes=0-9,20-29"})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_stale_if_range_falls_back_to_full_file(client):
+    etag = client.head("/video").headers["etag"]
+    response = client.get("/video", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+
+    response = client.get("/video", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_head_sends_headers_only(client):
+    response = client.head("/video", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+
+import pytest
+
+import resumable_upload
+from resumable_upload import ResumableUploadStore, UploadSessionError
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+async def chunks(data: bytes, size: int = 1000):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResumableUploadStore(tmp_path / "sessions", max_size=1024 * 1024)
+
+
+def send(store, upload_id, start, end, body, total=len(DATA)):
+    return asyncio.run(store.write_chunk(upload_id, start, end, total, chunks(body)))
+
+
+def test_chunks_in_any_order_assemble_the_file(store, tmp_path, monkeypatch):
+    # A small buffer makes every chunk take several writes
+    monkeypatch.setattr(resumable_upload, "WRITE_BUFFER_SIZE", 1500)
+    session = store.create(len(DATA), "clip.mp4")
+
+    status = send(store, session["upload_id"], 6000, 10239, DATA[6000:])
+    assert (status["offset"], status["received_bytes"], status["complete"]) == (0, 4240, False)
+    status = send(store, session["upload_id"], 0, 2999, DATA[:3000])
+    assert status["offset"] == 3000
+    assert status["received_ranges"] == [[0, 2999], [6000, 10239]]
+    # Retried and overlapping chunks are fine
+    send(store, session["upload_id"], 2000, 6999, DATA[2000:7000])
+    status = send(store, session["upload_id"], 2000, 6999, DATA[2000:7000])
+    assert (status["offset"], status["complete"]) == (len(DATA), True)
+
+    destination = tmp_path / "video.mp4"
+    result = store.finalize(session["upload_id"], destination)
+    assert result == {"filename": "clip.mp4", "size": len(DATA), "sha256": hashlib.sha256(DATA).hexdigest()}
+    assert destination.read_bytes() == DATA
+    assert list(store.root.iterdir()) == []
+
+
+def test_status_survives_a_new_store(store):
+    session = store.create(len(DATA))
+    send(store, session["upload_id"], 0, 999, DATA[:1000])
+    reopened = ResumableUploadStore(store.root, max_size=store.max_size)
+    assert reopened.status(session["upload_id"])["offset"] == 1000
+
+
+@pytest.mark.parametrize("body", [DATA[:999], DATA[:1001]])
+def test_body_not_matching_content_range_is_not_recorded(store, body):
+    session = store.create(len(DATA))
+    with pytest.raises(UploadSessionError) as excinfo:
+        send(store, session["upload_id"], 0, 999, body)
+    assert excinfo.value.status_code == 400
+    assert store.status(session["upload_id"])["received_ranges"] == []
+
+
+def test_chunk_total_must_match_upload_size(store):
+    session = store.create(len(DATA))
+    with pytest.raises(UploadSessionError) as excinfo:
+        send(store, session["upload_id"], 0, 999, DATA[:1000], total=len(DATA) + 1)
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.parametrize("start, end", [(10000, 10240), (-1, 10), (500, 100)])
+def test_range_outside_the_upload_is_rejected(store, start, end):
+    session = store.create(len(DATA))
+    with pytest.raises(UploadSessionError) as excinfo:
+        send(store, session["upload_id"], start, end, b"")
+    assert excinfo.value.status_code == 416
+
+
+def test_incomplete_upload_cannot_be_finalized(store, tmp_path):
+    session = store.create(len(DATA))
+    send(store, session["upload_id"], 0, 999, DATA[:1000])
+    send(store, session["upload_id"], 5000, 5999, DATA[5000:6000])
+    with pytest.raises(UploadSessionError) as excinfo:
+        store.finalize(session["upload_id"], tmp_path / "video.mp4")
+    assert excinfo.value.status_code == 409
+    assert "[[1000, 4999], [6000, 10239]]" in excinfo.value.message
+    assert not (tmp_path / "video.mp4").exists()
+
+
+def test_size_limits(store):
+    for size, status_code in ((0, 400), (store.max_size + 1, 413)):
+        with pytest.raises(UploadSessionError) as excinfo:
+            store.create(size)
+        assert excinfo.value.status_code == status_code
+
+
+@pytest.mark.parametrize("upload_id", ["../../etc", "00000000-0000-0000-0000-000000000000"])
+def test_unknown_sessions_are_not_found(store, upload_id):
+    with pytest.raises(UploadSessionError) as excinfo:
+        store.status(upload_id)
+    assert excinfo.value.status_code == 404
+
+
+def test_cancel_and_expiry_remove_sessions(store, monkeypatch):
+    cancelled = store.create(100)
+    store.cancel(cancelled["upload_id"])
+    with pytest.raises(UploadSessionError):
+        store.status(cancelled["upload_id"])
+
+    stale = store.create(100)
+    monkeypatch.setattr(resumable_upload.time, "time", lambda: 10 ** 12)
+    store.cleanup_expired()
+    with pytest.raises(UploadSessionError):
+        store.status(stale["upload_id"])
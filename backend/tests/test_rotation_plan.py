@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from simple_processor import RotationPlan
+
+
+@pytest.fixture
+def frame():
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[:10, -10:] = 255  # Marks the top-right corner
+    return frame
+
+
+def test_no_rotation_returns_the_frame(frame):
+    plan = RotationPlan(0, 1280, 720)
+    assert (plan.width, plan.height) == (1280, 720)
+    assert plan.apply(frame) is frame
+
+
+def test_quarter_turn_swaps_dimensions(frame):
+    plan = RotationPlan(90, 1280, 720)
+    assert (plan.width, plan.height) == (720, 1280)
+    assert plan.matrix is None
+
+    rotated = plan.apply(frame)
+    assert rotated.shape == (1280, 720, 3)
+    # Counterclockwise: the top-right corner ends up top-left
+    assert rotated[:10, :10].min() == 255
+    assert rotated[-10:, -10:].max() == 0
+
+
+@pytest.mark.parametrize("rotation, size", [(180, (1280, 720)), (-90, (720, 1280)), (450, (720, 1280))])
+def test_right_angles_are_normalized(frame, rotation, size):
+    plan = RotationPlan(rotation, 1280, 720)
+    assert (plan.width, plan.height) == size
+    assert plan.apply(frame).shape == (size[1], size[0], 3)
+
+
+def test_arbitrary_angle_expands_the_canvas():
+    plan = RotationPlan(45, 1280, 720)
+    diagonal = int((1280 + 720) * np.cos(np.radians(45)))
+    assert abs(plan.width - diagonal) <= 1 and abs(plan.height - diagonal) <= 1
+
+    frame = np.full((720, 1280, 3), 255, dtype=np.uint8)
+    rotated = plan.apply(frame)
+    assert rotated.shape == (plan.height, plan.width, 3)
+    # Nothing is cropped: the whole picture is still there, centred on the canvas
+    assert np.count_nonzero(rotated[..., 0]) == pytest.approx(1280 * 720, rel=0.01)
+    assert rotated[plan.height // 2, plan.width // 2].min() == 255
+    assert rotated[0, 0].max() == 0
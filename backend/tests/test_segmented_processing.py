@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from simple_processor import SimpleProcessor
+
+SAMPLE_VIDEO = Path(__file__).resolve().parent.parent / "output" / "186b4b2b-5a9a-4456-a7b7-b1f5189bab06_output.mp4"
+
+pytestmark = pytest.mark.skipif(not SAMPLE_VIDEO.exists(), reason="sample video not available")
+
+
+def create_processor():
+    return SimpleProcessor(segment_workers=2, min_segment_seconds=5)
+
+
+def process(tmp_path, segmented):
+    processor = create_processor()
+    name = "segmented" if segmented else "single"
+    try:
+        success, _ = processor.process_video(
+            str(SAMPLE_VIDEO), str(tmp_path / f"{name}_output.mp4"), segmented=segmented,
+            render_overlay=False)
+    finally:
+        if processor._segment_pool is not None:
+            processor._segment_pool.shutdown()
+    assert success
+    with open(tmp_path / f"{name}_output_angles.json") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def runs(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("segments")
+    return process(tmp_path, False), process(tmp_path, True)
+
+
+def by_frame(result):
+    return {frame_data['frame']: frame_data['angles'] for frame_data in result['angle_data']}
+
+
+def test_sample_is_split_in_two(runs):
+    video_info = runs[0]['video_info']
+    assert create_processor()._plan_segment_count(video_info['fps'], video_info['total_frames'], True) == 2
+
+
+def test_every_frame_is_measured_once(runs):
+    single, segmented = runs
+    assert [frame['frame'] for frame in segmented['angle_data']] == [frame['frame'] for frame in single['angle_data']]
+    assert segmented['video_info'] == single['video_info']
+
+
+def test_first_segment_matches_single_pass(runs):
+    single, segmented = (by_frame(result) for result in runs)
+    boundary = runs[0]['video_info']['total_frames'] // 2
+    for frame in range(boundary):
+        assert segmented[frame].keys() == single[frame].keys()
+        for name, value in single[frame].items():
+            assert segmented[frame][name] == pytest.approx(value, abs=1e-6)
+
+
+def test_later_segments_within_tolerance(runs):
+    # The restarted tracker doesn't reproduce single frames exactly after the boundary
+    # (see SimpleProcessor._process_segments), but the timeline as a whole agrees
+    single, segmented = (by_frame(result) for result in runs)
+    boundary = runs[0]['video_info']['total_frames'] // 2
+    for name in ('left_elbow_angle', 'right_elbow_angle'):
+        differences = [abs(segmented[frame][name] - single[frame][name])
+                       for frame in single if frame >= boundary
+                       and name in single[frame] and name in segmented[frame]]
+        if differences:
+            assert np.median(differences) < 2.0
+            assert max(differences) < 15.0
+
+
+def test_summaries_agree(runs):
+    single, segmented = (result['angle_summary'] for result in runs)
+    assert segmented.keys() == single.keys()
+    for name, stats in single.items():
+        for key in ('mean', 'std', 'p50'):
+            assert segmented[name][key] == pytest.approx(stats[key], abs=2.0), (name, key)
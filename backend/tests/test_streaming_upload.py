@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from streaming_upload import MultipartUploadError, receive_multipart_file
+
+BOUNDARY = "test-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def multipart_body(parts):
+    """Encode (name, filename or None, data) parts as a multipart/form-data body"""
+    body = b""
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += (f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n"
+                 "Content-Type: application/octet-stream\r\n\r\n").encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+class ChunkedBody:
+    """Async body iterator that counts how many chunks the receiver pulled"""
+
+    def __init__(self, body: bytes, chunk_size: int = 1000):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.consumed = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+
+def receive(body, destination, content_type=CONTENT_TYPE, max_size=1024 * 1024):
+    return asyncio.run(receive_multipart_file(content_type, body, "file", destination, max_size))
+
+
+def test_file_field_is_written_and_hashed(tmp_path):
+    data = bytes(range(256)) * 200
+    body = ChunkedBody(multipart_body([
+        ("note", None, b"a form field"),
+        ("file", "clip.mp4", data),
+        ("other", "second.mp4", b"ignored"),
+    ]), chunk_size=777)
+    destination = tmp_path / "video.mp4"
+
+    result = receive(body, destination)
+
+    assert result == {"filename": "clip.mp4", "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+    assert destination.read_bytes() == data
+    assert not (tmp_path / "video.mp4.part").exists()
+
+
+def test_file_at_the_limit_is_accepted(tmp_path):
+    data = b"x" * 5000
+    result = receive(ChunkedBody(multipart_body([("file", "a.mp4", data)])), tmp_path / "v.mp4", max_size=5000)
+    assert result["size"] == 5000
+
+
+def test_oversized_upload_is_rejected_before_the_body_ends(tmp_path):
+    body = ChunkedBody(multipart_body([("file", "big.mp4", b"x" * 100_000)]))
+    destination = tmp_path / "video.mp4"
+
+    with pytest.raises(MultipartUploadError) as excinfo:
+        receive(body, destination, max_size=5000)
+
+    assert excinfo.value.status_code == 413
+    # Reading stops once the limit is passed, not at the end of the body
+    assert body.consumed < len(body.chunks) // 2
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_missing_file_field_is_rejected(tmp_path):
+    body = ChunkedBody(multipart_body([("video", "clip.mp4", b"data"), ("file", None, b"not a file")]))
+    with pytest.raises(MultipartUploadError) as excinfo:
+        receive(body, tmp_path / "video.mp4")
+    assert excinfo.value.status_code == 422
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "multipart/form-data"])
+def test_non_multipart_body_is_rejected(tmp_path, content_type):
+    with pytest.raises(MultipartUploadError) as excinfo:
+        receive(ChunkedBody(b"{}"), tmp_path / "video.mp4", content_type=content_type)
+    assert excinfo.value.status_code == 400
+
+
+def test_malformed_body_is_rejected(tmp_path):
+    with pytest.raises(MultipartUploadError) as excinfo:
+        receive(ChunkedBody(b"this is not multipart at all\r\n"), tmp_path / "video.mp4")
+    assert excinfo.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
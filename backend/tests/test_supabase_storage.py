@@ -0,0 +1,100 @@
+import json
+import threading
+
+import httpx
+import pytest
+
+from supabase_storage import SupabaseStorage
+
+
+def make_storage(handler, **kwargs):
+    return SupabaseStorage("https://project.supabase.co/", "anon-key",
+                           transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_upload_streams_the_file_with_headers(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append((request, request.read()))
+        return httpx.Response(200, json={"Key": "patient_videos/videos/clip.mp4"})
+
+    data = bytes(range(256)) * 100
+    local_path = tmp_path / "clip.mp4"
+    local_path.write_bytes(data)
+    storage = make_storage(handler, chunk_size=1000)
+    try:
+        key = storage.upload_file("videos/clip.mp4", local_path, upsert=False)
+    finally:
+        storage.close()
+
+    assert key == "patient_videos/videos/clip.mp4"
+    request, body = requests[0]
+    assert request.method == "POST"
+    assert str(request.url) == "https://project.supabase.co/storage/v1/object/patient_videos/videos/clip.mp4"
+    assert request.headers["apikey"] == "anon-key"
+    assert request.headers["Authorization"] == "Bearer anon-key"
+    assert request.headers["Content-Type"] == "video/mp4"
+    assert request.headers["Content-Length"] == str(len(data))
+    assert request.headers["x-upsert"] == "false"
+    assert body == data
+
+
+def test_upload_without_key_in_response_returns_the_object_path(tmp_path):
+    local_path = tmp_path / "angles.json"
+    local_path.write_text("{}")
+    storage = make_storage(lambda request: httpx.Response(200, json={}), bucket="results")
+    try:
+        assert storage.upload_file("a/angles.json", local_path) == "results/a/angles.json"
+    finally:
+        storage.close()
+
+
+def test_upload_files_runs_in_parallel_and_reports_each_failure(tmp_path):
+    # Every upload has to be in flight at once to get past the barrier
+    barrier = threading.Barrier(3, timeout=5)
+
+    def handler(request):
+        barrier.wait()
+        if request.url.path.endswith("/broken.mp4"):
+            return httpx.Response(500, json={"error": "storage down"})
+        return httpx.Response(200, json={})
+
+    uploads = []
+    for name in ("one.mp4", "broken.mp4", "two.mp4"):
+        (tmp_path / name).write_bytes(name.encode())
+        uploads.append((tmp_path / name, f"videos/{name}"))
+
+    storage = make_storage(handler)
+    try:
+        results = storage.upload_files(uploads)
+    finally:
+        storage.close()
+
+    assert results["videos/one.mp4"] is None
+    assert results["videos/two.mp4"] is None
+    assert "500" in results["videos/broken.mp4"]
+
+
+def test_create_signed_url(tmp_path):
+    def handler(request):
+        assert request.url.path == "/storage/v1/object/sign/patient_videos/videos/clip.mp4"
+        assert json.loads(request.read()) == {"expiresIn": 3600}
+        return httpx.Response(200, json={"signedURL": "/object/sign/patient_videos/videos/clip.mp4?token=abc"})
+
+    storage = make_storage(handler)
+    try:
+        url = storage.create_signed_url("videos/clip.mp4", 3600)
+    finally:
+        storage.close()
+
+    assert url == "https://project.supabase.co/storage/v1/object/sign/patient_videos/videos/clip.mp4?token=abc"
+
+
+def test_signed_url_error_is_raised():
+    storage = make_storage(lambda request: httpx.Response(404, json={"error": "not found"}))
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            storage.create_signed_url("videos/missing.mp4", 60)
+    finally:
+        storage.close()
@@ -0,0 +1,80 @@
+import cv2
+import numpy as np
+import pytest
+
+from video_encoder import FfmpegVideoWriter, concat_videos
+
+
+def frames(count, width, height, start=0):
+    return [np.full((height, width, 3), (start + index) * 10 % 256, dtype=np.uint8)
+            for index in range(count)]
+
+
+def encode(path, frame_list, fps=10, **kwargs):
+    height, width = frame_list[0].shape[:2]
+    writer = FfmpegVideoWriter(str(path), fps, width, height, **kwargs)
+    assert writer.isOpened()
+    for frame in frame_list:
+        writer.write(frame)
+    writer.release()
+
+
+def read_frames(path):
+    capture = cv2.VideoCapture(str(path))
+    result = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        result.append(frame)
+    capture.release()
+    return result
+
+
+def test_encoder_writes_every_frame(tmp_path):
+    path = tmp_path / "out.mp4"
+    source = frames(12, 64, 48)
+    encode(path, source)
+
+    decoded = read_frames(path)
+    assert len(decoded) == 12
+    assert decoded[0].shape == (48, 64, 3)
+    for frame, expected in zip(decoded, source):
+        assert np.abs(frame.astype(int) - expected.astype(int)).mean() < 8
+
+
+def test_odd_dimensions_are_padded_to_even(tmp_path):
+    path = tmp_path / "odd.mp4"
+    source = frames(5, 65, 49)
+    encode(path, source)
+
+    decoded = read_frames(path)
+    assert len(decoded) == 5
+    assert decoded[0].shape == (50, 66, 3)
+    # The original picture sits in the top-left corner of the padded frame
+    assert np.abs(decoded[2][:49, :65].astype(int) - source[2].astype(int)).mean() < 8
+
+
+def test_wrong_frame_size_is_rejected(tmp_path):
+    writer = FfmpegVideoWriter(str(tmp_path / "out.mp4"), 10, 64, 48)
+    try:
+        with pytest.raises(ValueError):
+            writer.write(np.zeros((48, 65, 3), dtype=np.uint8))
+    finally:
+        writer.release()
+
+
+def test_concat_joins_odd_sized_segments(tmp_path):
+    # Segments are written without faststart, as segmented processing does
+    segments = []
+    for index, count in enumerate((4, 6)):
+        path = tmp_path / f"segment{index}.mp4"
+        encode(path, frames(count, 33, 25, start=index * 4), faststart=False)
+        segments.append(str(path))
+
+    output = tmp_path / "joined.mp4"
+    concat_videos(segments, str(output), str(tmp_path / "list.txt"), faststart=True, container="mp4")
+
+    decoded = read_frames(output)
+    assert len(decoded) == 10
+    assert decoded[0].shape == (26, 34, 3)
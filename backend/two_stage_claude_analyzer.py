@@ -6,6 +6,7 @@ from datetime import datetime
 import anthropic
 from pathlib import Path
 from action_logger import action_logger
+from key_frame_extractor import build_contact_sheet
 
 class TwoStageClaudeAnalyzer:
     """
@@ -14,7 +15,12 @@ class TwoStageClaudeAnalyzer:
     2. Detailed health report with pose data
     """
     
-    def __init__(self):
+    def __init__(self, contact_sheet: bool = False, contact_sheet_columns: int = 3,
+                 contact_sheet_long_edge: int = 1568):
+        # With contact_sheet, key frames are sent as one tiled image instead of one image each
+        self.contact_sheet = contact_sheet
+        self.contact_sheet_columns = contact_sheet_columns
+        self.contact_sheet_long_edge = contact_sheet_long_edge
         self.api_key = os.getenv('CLAUDE_API_KEY') or os.getenv('ANTHROPIC_API_KEY')
         self.model = "claude-3-5-sonnet-20241022"
         if not self.api_key:
@@ -76,7 +82,10 @@ class TwoStageClaudeAnalyzer:
                 key_frame_data.append(frame_data)
             
             # Create prompt for movement overview
-            prompt = self._create_movement_overview_prompt(video_info, key_frame_data)
+            selection = analysis_package.get('extraction_metadata', {}).get('frame_selection', 'uniform')
+            # The images come from the full key frames; key_frame_data only carries what goes in the text
+            prompt = self._create_movement_overview_prompt(
+                video_info, key_frame_data, selection, image_frames=key_frames)
             
             # Call Claude API
             response = self._call_claude_api(prompt, "movement_overview")
@@ -163,22 +172,14 @@ class TwoStageClaudeAnalyzer:
                 'timestamp': datetime.now().isoformat()
             }
 
-    def _create_movement_overview_prompt(self, video_info: Dict, key_frames: List[Dict]) -> str:
+    def _create_movement_overview_prompt(self, video_info: Dict, key_frames: List[Dict],
+                                         selection: str = 'uniform',
+                                         image_frames: Optional[List[Dict]] = None) -> str:
         """
         Create prompt for movement overview analysis with images
         """
         # Prepare image data for Claude
-        image_content = []
-        for i, frame in enumerate(key_frames):
-            if frame.get('image_encoded') and frame.get('image_base64'):
-                image_content.append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": "image/jpeg",
-                        "data": frame['image_base64']
-                    }
-                })
+        image_content = self._key_frame_images(image_frames if image_frames is not None else key_frames)
         
         # Create text content
         text_content = f"""You are an expert physical therapist and movement analysis specialist. Please analyze the following video key frames to determine the type of movement being performed.
@@ -189,13 +190,15 @@ VIDEO INFORMATION:
 - FPS: {video_info.get('fps', 0):.1f}
 
 KEY FRAMES ANALYSIS:
-I've extracted 5 key frames from different intervals of the video. Please analyze these frames to determine:
+{self._key_frame_selection_note(key_frames, selection)} Please analyze these frames to determine:
 
 1. What type of movement is being performed?
 2. What is the quality and technique of the movement?
 3. Are there any obvious issues or concerns?
 4. What is the overall assessment of the movement?
 
+{self._key_frame_images_note(key_frames, image_content)}
+
 KEY FRAMES DATA:
 {json.dumps([{k: v for k, v in frame.items() if k != 'image_base64'} for frame in key_frames], indent=2)}
 
@@ -358,24 +361,73 @@ This is a comprehensive health analysis, so be detailed and professional in your
         
         return prompt
     
-    def _create_structured_analysis_prompt(self, video_info: Dict, key_frames: List[Dict], pose_analysis: Dict) -> List:
+    def _key_frame_images(self, key_frames: List[Dict]) -> List[Dict]:
         """
-        Create structured prompt following the AI_ANALYSIS_PROMPT_EXAMPLE format
+        Image content blocks for the key frames: the in-memory encoding from the
+        extractor, or the saved image file for packages loaded from disk
         """
-        # Prepare key frame images for analysis
-        image_content = []
+        images = []
         for frame in key_frames:
-            if frame.get('image_path') and os.path.exists(frame['image_path']):
-                with open(frame['image_path'], 'rb') as img_file:
+            image_data = frame.get('image_base64')
+            if not image_data:
+                frame_path = frame.get('path')
+                if not frame_path or not os.path.exists(frame_path):
+                    continue
+                with open(frame_path, 'rb') as img_file:
                     image_data = base64.b64encode(img_file.read()).decode('utf-8')
-                    image_content.append({
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/jpeg",
-                            "data": image_data
-                        }
-                    })
+            images.append((frame, image_data))
+
+        if self.contact_sheet and images:
+            sheet = build_contact_sheet(
+                [base64.b64decode(image_data) for _, image_data in images],
+                [self._key_frame_label(frame) for frame, _ in images],
+                columns=self.contact_sheet_columns,
+                long_edge=self.contact_sheet_long_edge)
+            images = [({'media_type': 'image/jpeg'}, base64.b64encode(sheet).decode('utf-8'))]
+
+        return [{
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": frame.get('media_type', 'image/jpeg'),
+                "data": image_data
+            }
+        } for frame, image_data in images]
+
+    @staticmethod
+    def _key_frame_label(frame: Dict) -> str:
+        return f"Frame {frame.get('frame_number', 0)} @ {frame.get('timestamp', 0):.1f}s"
+
+    @staticmethod
+    def _key_frame_selection_note(key_frames: List[Dict], selection: str) -> str:
+        """Tells the model how many key frames there are and how they were chosen"""
+        count = len(key_frames)
+        frames = f"{count} key frame" + ("" if count == 1 else "s")
+        if selection == 'motion':
+            return (f"I've selected {frames} where the joint angles reach their extremes or "
+                    "change fastest, so they show the most informative moments of the movement.")
+        positions = ", ".join(frame['interval'] for frame in key_frames if frame.get('interval'))
+        return (f"I've extracted {frames} at evenly spaced points of the video"
+                + (f" ({positions})." if positions else "."))
+
+    def _key_frame_images_note(self, key_frames: List[Dict], image_content: List[Dict]) -> str:
+        """Tells the model how the attached images map to the key frames"""
+        if not image_content:
+            return "No key frame images are attached; work from the pose data below."
+        if self.contact_sheet:
+            return (f"The attached image is a contact sheet of the {len(key_frames)} key frames in "
+                    "chronological order (left to right, top to bottom), each labeled with its "
+                    "frame number and timestamp.")
+        return "The key frames are attached as images in chronological order."
+
+    def _create_structured_analysis_prompt(self, video_info: Dict, key_frames: List[Dict], pose_analysis: Dict) -> List:
+        """
+        Create structured prompt following the AI_ANALYSIS_PROMPT_EXAMPLE format
+        """
+        # Key frames are only attached as a contact sheet: one image, so the vision payload
+        # stays a single image's tokens however many key frames there are. Without it the
+        # prompt carries no images, as it always has
+        image_content = self._key_frame_images(key_frames) if self.contact_sheet else []
         
         # Create comprehensive angle analysis summary
         angle_analysis = self._create_comprehensive_angle_analysis(pose_analysis.get('angle_summary', {}))
@@ -403,6 +455,7 @@ BIOMECHANICAL DATA:
 {json.dumps(angle_analysis, indent=2)}
 
 KEY FRAME ANALYSIS:
+{self._key_frame_images_note(key_frames, image_content)}
 {json.dumps(key_frame_data, indent=2)}
 
 Please analyze this physical therapy video and return a JSON response with the following structure:
@@ -0,0 +1,93 @@
+import subprocess
+import tempfile
+from typing import List, Optional
+import imageio_ffmpeg
+
+
+class FfmpegVideoWriter:
+    """
+    Pipe raw BGR frames into an ffmpeg/libx264 subprocess
+
+    Drop-in replacement for cv2.VideoWriter (isOpened/write/release) that
+    produces a browser-ready H.264 MP4 in a single pass.
+    """
+
+    def __init__(self, output_path: str, fps: float, width: int, height: int,
+                 preset: str = "veryfast", crf: int = 23, threads: int = 0,
+                 faststart: bool = True, container: Optional[str] = "mp4"):
+        self.output_path = output_path
+        self.frame_size = (width, height)
+        self._stderr = tempfile.TemporaryFile()
+
+        command = [
+            imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error', '-nostats',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}",
+            '-r', str(fps), '-i', 'pipe:0',
+            '-an',
+            # yuv420p needs even dimensions; pad by a pixel instead of failing
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+            '-c:v', 'libx264', '-preset', preset, '-crf', str(crf),
+            '-threads', str(threads), '-pix_fmt', 'yuv420p',
+        ]
+        if faststart:
+            command += ['-movflags', '+faststart']
+        if container:
+            command += ['-f', container]
+        command.append(output_path)
+
+        try:
+            self._process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._stderr)
+        except OSError as e:
+            print(f"Could not start ffmpeg encoder: {e}")
+            self._process = None
+
+    def isOpened(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def write(self, frame):
+        if (frame.shape[1], frame.shape[0]) != self.frame_size:
+            raise ValueError(
+                f"Frame size {frame.shape[1]}x{frame.shape[0]} does not match encoder size "
+                f"{self.frame_size[0]}x{self.frame_size[1]}")
+        try:
+            self._process.stdin.write(frame.tobytes())
+        except BrokenPipeError:
+            raise RuntimeError(f"ffmpeg encoder exited early: {self._read_errors()}")
+
+    def release(self):
+        """Close the pipe and wait for ffmpeg to finish writing the file"""
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        return_code = self._process.wait()
+        self._process = None
+        if return_code != 0:
+            raise RuntimeError(
+                f"ffmpeg encoder failed with exit code {return_code}: {self._read_errors()}")
+        self._stderr.close()
+
+    def _read_errors(self) -> str:
+        self._stderr.seek(0)
+        return self._stderr.read().decode('utf-8', errors='replace').strip()
+
+
+def concat_videos(input_paths: List[str], output_path: str, list_path: str,
+                  faststart: bool = False, container: Optional[str] = None):
+    """Join videos with identical encoding settings without re-encoding them"""
+    with open(list_path, 'w') as f:
+        for path in input_paths:
+            f.write(f"file '{path}'\n")
+
+    command = [imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error', '-f', 'concat',
+               '-safe', '0', '-i', list_path, '-c', 'copy']
+    if faststart:
+        command += ['-movflags', '+faststart']
+    if container:
+        command += ['-f', container]
+    command.append(output_path)
+
+    subprocess.run(command, check=True, capture_output=True)
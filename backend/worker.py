@@ -0,0 +1,46 @@
+"""
+Standalone job worker
+
+Runs processing jobs from the shared queue (JOB_DB_PATH) in its own process,
+so pose processing can be scaled separately from the API. Start the API with
+EMBEDDED_WORKERS=0 and as many `python worker.py` processes as the machine
+has room for; each one runs PROCESSING_WORKERS jobs at a time.
+
+This is an option for single-host deployments only: the queue is a SQLite
+file and uploads/outputs are local directories, so the API and the workers
+must share one filesystem. On Heroku every dyno has its own filesystem, which
+is why the Procfile runs the API with its embedded workers.
+"""
+import logging
+import signal
+import threading
+from jobs import PROCESSING_WORKERS, processor, supabase_storage, create_job_queue, register_handlers
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    job_queue = create_job_queue()
+    register_handlers(job_queue)
+
+    logger.info("🔄 Loading pose model")
+    processor.warm_up()
+    job_queue.start(PROCESSING_WORKERS, worker_name="worker")
+    logger.info(f"✅ Worker running {PROCESSING_WORKERS} jobs at a time from {job_queue.db_path}")
+
+    stop.wait()
+
+    # Jobs still running when the timeout passes are picked up again once their lease runs out
+    logger.info("🛑 Stopping worker")
+    job_queue.stop(timeout=30)
+    if supabase_storage is not None:
+        supabase_storage.close()
+
+
+if __name__ == "__main__":
+    main()
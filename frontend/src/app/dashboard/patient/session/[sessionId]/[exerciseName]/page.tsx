@@ -21,6 +21,7 @@ import { useVideoUpload } from '@/hooks/useVideoUpload'
 import { useSessionVideo } from '@/hooks/useSessionVideo'
 import { usePatientSessions } from '@/hooks/usePatientSessions'
 import { useToast } from '@/hooks/use-toast'
+import { watchProcessing, progressPercent, describeProgress, requestTwoStageAnalysis } from '@/lib/processingProgress'
 
 type ProcessingStep = 'idle' | 'uploading' | 'processing_pose' | 'extracting_keyframes' | 'claude_analysis' | 'complete'
 type VideoMode = 'original' | 'processed'
@@ -57,6 +58,7 @@ export default function ExerciseDetailPage() {
   const [videoId, setVideoId] = useState<string>('')
   const [currentStep, setCurrentStep] = useState<ProcessingStep>('idle')
   const [stepProgress, setStepProgress] = useState(0)
+  const [stepDetail, setStepDetail] = useState<string | null>(null)
   const [analysisResult, setAnalysisResult] = useState<AnalysisResult | null>(null)
   const [error, setError] = useState<string | null>(null)
   const [videoMode, setVideoMode] = useState<VideoMode>('original')
@@ -370,43 +372,20 @@ export default function ExerciseDetailPage() {
       const processResult = await processResponse.json()
       console.log('✅ Pose processing started:', processResult)
 
-      // Wait for processing to complete by polling status
+      // Follow pose processing as the backend pushes progress (stage, frames, ETA)
       console.log('⏳ Waiting for pose processing to complete...')
-      let processingComplete = false
-      let pollAttempts = 0
-      let processedVideoUrl = null
-      const maxPollAttempts = 30 // 30 seconds max
-
-      while (!processingComplete && pollAttempts < maxPollAttempts) {
-        await new Promise(resolve => setTimeout(resolve, 1000)) // Wait 1 second
-        pollAttempts++
-        
-        try {
-          const statusResponse = await fetch(`http://localhost:8001/api/status/${currentVideoId}`)
-          if (statusResponse.ok) {
-            const status = await statusResponse.json()
-            console.log(`📊 Processing status (${pollAttempts}/30):`, status.status, status.message)
-            
-            if (status.status === 'completed') {
-              processingComplete = true
-              processedVideoUrl = status.processed_video_url // URL from Supabase bucket
-              console.log('✅ Pose processing completed!')
-              console.log('🎬 Processed video URL:', processedVideoUrl)
-            } else if (status.status === 'error' || status.status === 'failed') {
-              throw new Error(`Processing failed: ${status.message}`)
-            }
-            
-            // Update progress based on status
-            setStepProgress(Math.min((pollAttempts / maxPollAttempts) * 100, 90))
-          }
-        } catch (statusError) {
-          console.warn('⚠️ Status check failed:', statusError)
+      const finalStatus = await watchProcessing('http://localhost:8001', currentVideoId, (status) => {
+        console.log('📊 Processing status:', status.status, status.progress || status.message)
+        setStepDetail(describeProgress(status))
+        const percent = progressPercent(status.progress)
+        if (percent !== null) {
+          setStepProgress(Math.min(percent, 99))
         }
-      }
-
-      if (!processingComplete) {
-        throw new Error('Pose processing timed out after 30 seconds')
-      }
+      })
+      setStepDetail(null)
+      const processedVideoUrl = finalStatus.processed_video_url // URL from Supabase bucket
+      console.log('✅ Pose processing completed!')
+      console.log('🎬 Processed video URL:', processedVideoUrl)
 
       // Save processed video URL to session (postvidurl)
       if (processedVideoUrl) {
@@ -445,17 +424,10 @@ export default function ExerciseDetailPage() {
       setStepProgress(0)
 
       console.log('🧠 Starting AI analysis for video:', currentVideoId)
-      const analysisResponse = await fetch(`http://localhost:8001/api/two-stage-analysis/${currentVideoId}`, {
-        method: 'POST',
+      // Runs in the background on the backend; resolves once the result is ready
+      const result = await requestTwoStageAnalysis('http://localhost:8001', currentVideoId, (status) => {
+        console.log('🧠 Analysis status:', status.status, status.progress || status.message)
       })
-
-      if (!analysisResponse.ok) {
-        const errorText = await analysisResponse.text()
-        console.error('❌ Analysis response error:', errorText)
-        throw new Error(`AI analysis failed: ${analysisResponse.status} - ${errorText}`)
-      }
-
-      const result = await analysisResponse.json()
       console.log('🎉 Claude analysis result:', result)
       setAnalysisResult(result)
       
@@ -501,6 +473,7 @@ export default function ExerciseDetailPage() {
       setError(error instanceof Error ? error.message : 'Analysis failed')
       setCurrentStep('idle')
       setStepProgress(0)
+      setStepDetail(null)
     }
   }
 
@@ -947,6 +920,11 @@ export default function ExerciseDetailPage() {
                              currentStep === 'claude_analysis' ? 'AI processing...' :
                              'Generating analysis...'}
                           </p>
+                          {currentStep === 'processing_pose' && stepDetail && (
+                            <p style={{ fontSize: '0.75rem', margin: '4px 0 0', color: '#6b7280' }}>
+                              {stepDetail}
+                            </p>
+                          )}
                           {stepProgress > 0 && (
                             <div style={{
                               width: '100px',
@@ -1,6 +1,7 @@
 'use client'
 
 import React, { useState, useRef, useCallback } from 'react'
+import { watchProcessing, describeProgress } from '@/lib/processingProgress'
 
 interface ProcessingStatus {
   status: 'processing' | 'completed' | 'error' | 'not_found'
@@ -74,7 +75,7 @@ export default function SimplePoseApp() {
         throw new Error('Processing start failed')
       }
 
-      pollProcessingStatus()
+      watchProcessingStatus()
     } catch (error) {
       console.error('Processing error:', error)
       alert('Processing failed. Please try again.')
@@ -82,31 +83,24 @@ export default function SimplePoseApp() {
     }
   }
 
-  const pollProcessingStatus = useCallback(async () => {
+  const watchProcessingStatus = useCallback(async () => {
     if (!videoId) return
 
     try {
-      const response = await fetch(`${API_BASE}/api/status/${videoId}`)
-      const status: ProcessingStatus = await response.json()
-      
-      setProcessingStatus(status)
+      await watchProcessing(API_BASE, videoId, (status) => {
+        setProcessingStatus({ status: status.status, message: describeProgress(status) })
+      })
 
-      if (status.status === 'completed') {
-        setIsProcessing(false)
-        const streamUrl = `${API_BASE}/api/stream/${videoId}`
-        console.log('Processing completed, verifying stream URL:', streamUrl)
-        
-        // CANVAS APPROACH: Show original video with pose overlay using canvas
-        console.log('CANVAS APPROACH: Using original video with canvas overlay')
-        setProcessedVideoUrl(originalVideoUrl) // Use original video as base
-        // We'll add canvas overlay in the UI
-      } else if (status.status === 'error') {
-        setIsProcessing(false)
-      } else if (status.status === 'processing') {
-        setTimeout(pollProcessingStatus, 2000)
-      }
+      setIsProcessing(false)
+      const streamUrl = `${API_BASE}/api/stream/${videoId}`
+      console.log('Processing completed, verifying stream URL:', streamUrl)
+      
+      // CANVAS APPROACH: Show original video with pose overlay using canvas
+      console.log('CANVAS APPROACH: Using original video with canvas overlay')
+      setProcessedVideoUrl(originalVideoUrl) // Use original video as base
+      // We'll add canvas overlay in the UI
     } catch (error) {
-      console.error('Status polling error:', error)
+      console.error('Processing status error:', error)
       setIsProcessing(false)
     }
   }, [videoId, originalVideoUrl])
@@ -1,6 +1,7 @@
 'use client';
 
 import React, { useState, useRef, useCallback } from 'react';
+import { watchProcessing, describeProgress, requestTwoStageAnalysis } from '@/lib/processingProgress';
 
 interface InputPreviewTabProps {
   videoId: string;
@@ -13,6 +14,7 @@ const InputPreviewTab: React.FC<InputPreviewTabProps> = ({ videoId, onVideoProce
   const [previewUrl, setPreviewUrl] = useState<string | null>(null);
   const [analysisResult, setAnalysisResult] = useState<any>(null);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
+  const [progressText, setProgressText] = useState<string | null>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
 
   const handleFileUpload = useCallback(async (event: React.ChangeEvent<HTMLInputElement>) => {
@@ -72,48 +74,22 @@ const InputPreviewTab: React.FC<InputPreviewTabProps> = ({ videoId, onVideoProce
       const processResult = await processResponse.json();
       console.log('Pose analysis started:', processResult);
 
-      // Poll for processing completion
-      let processingComplete = false;
-      let attempts = 0;
-      const maxAttempts = 30; // 30 seconds max
-
-      while (!processingComplete && attempts < maxAttempts) {
-        await new Promise(resolve => setTimeout(resolve, 1000));
-        
-        const statusResponse = await fetch(`http://localhost:8001/api/status/${videoId}`);
-        if (statusResponse.ok) {
-          const status = await statusResponse.json();
-          console.log('Processing status:', status);
-          
-          if (status.status === 'completed') {
-            processingComplete = true;
-          } else if (status.status === 'error') {
-            throw new Error(`Processing failed: ${status.message}`);
-          }
-        }
-        attempts++;
-      }
-
-      if (!processingComplete) {
-        throw new Error('Processing timed out. Please try again.');
-      }
+      // Follow processing progress as the backend pushes it
+      await watchProcessing('http://localhost:8001', videoId, (status) => {
+        console.log('Processing status:', status);
+        setProgressText(describeProgress(status));
+      });
+      setProgressText(null);
 
       // Try two-stage analysis (optional - might fail if no API key)
       try {
         console.log('Starting two-stage analysis...');
-        const analysisResponse = await fetch(`http://localhost:8001/api/two-stage-analysis/${videoId}`, {
-          method: 'POST',
+        const result = await requestTwoStageAnalysis('http://localhost:8001', videoId, (status) => {
+          setProgressText(describeProgress(status));
         });
-
-        if (analysisResponse.ok) {
-          const result = await analysisResponse.json();
-          console.log('Analysis result:', result);
-          // Extract the analysis from the response object
-          setAnalysisResult(result.analysis || result);
-        } else {
-          console.log('Two-stage analysis not available (API key may be missing)');
-          setAnalysisResult({ message: 'Pose analysis completed. Two-stage analysis requires API key.' });
-        }
+        console.log('Analysis result:', result);
+        // Extract the analysis from the response object
+        setAnalysisResult(result.analysis || result);
       } catch (analysisError) {
         console.log('Two-stage analysis failed:', analysisError);
         setAnalysisResult({ message: 'Pose analysis completed. Two-stage analysis failed.' });
@@ -125,6 +101,7 @@ const InputPreviewTab: React.FC<InputPreviewTabProps> = ({ videoId, onVideoProce
       alert(`Analysis failed: ${errorMessage}`);
     } finally {
       setIsAnalyzing(false);
+      setProgressText(null);
     }
   };
 
@@ -197,6 +174,9 @@ const InputPreviewTab: React.FC<InputPreviewTabProps> = ({ videoId, onVideoProce
               >
                 {isAnalyzing ? 'Analyzing...' : 'Start Analysis'}
               </button>
+              {progressText && (
+                <p className="mt-2 text-sm text-gray-600">{progressText}</p>
+              )}
             </div>
           )}
 
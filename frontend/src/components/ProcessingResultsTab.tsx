@@ -2,6 +2,7 @@
 
 import React, { useState, useEffect, useRef } from 'react';
 import VideoEditor from './VideoEditor';
+import { requestTwoStageAnalysis } from '@/lib/processingProgress';
 
 interface ProcessingResultsTabProps {
   videoId: string;
@@ -121,10 +122,8 @@ const ProcessingResultsTab: React.FC<ProcessingResultsTabProps> = ({ videoId })
       setCurrentStep('generating_report');
       setStepProgress(0);
       
-      // Start the actual API call
-      const responsePromise = fetch(`http://localhost:8001/api/two-stage-analysis/${videoId}`, {
-        method: 'POST',
-      });
+      // Start the actual API call (runs as a background job on the backend)
+      const resultPromise = requestTwoStageAnalysis('http://localhost:8001', videoId);
 
       // Simulate progress while API call is running
       const progressInterval = setInterval(() => {
@@ -134,14 +133,13 @@ const ProcessingResultsTab: React.FC<ProcessingResultsTabProps> = ({ videoId })
         });
       }, 500);
 
-      const response = await responsePromise;
-      clearInterval(progressInterval);
-
-      if (!response.ok) {
-        throw new Error('Analysis failed');
+      let result;
+      try {
+        result = await resultPromise;
+      } finally {
+        clearInterval(progressInterval);
       }
 
-      const result = await response.json();
       // Extract the analysis from the response object
       setAnalysisResult(result.analysis || result);
       setCurrentStep('complete');
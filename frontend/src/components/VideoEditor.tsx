@@ -1,5 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { VideoRotationInfo, getVideoRotationInfo, applyVideoRotationCorrection } from '@/utils/videoRotation';
+import { config } from '@/lib/config';
 
 interface VideoEditorProps {
   videoUrl: string;
@@ -9,6 +10,7 @@ interface VideoEditorProps {
     timestamp: number;
     filename: string;
     image_base64?: string;
+    image_url?: string;
     pose_data?: any;
   }>;
   onFrameSelect?: (frameNumber: number) => void;
@@ -241,9 +243,11 @@ const VideoEditor: React.FC<VideoEditorProps> = ({
                 onClick={() => goToKeyFrame(keyFrame)}
               >
                 <div className="w-20 h-16 bg-gray-200 rounded-lg overflow-hidden border-2 border-blue-500">
-                  {keyFrame.image_base64 ? (
+                  {keyFrame.image_base64 || keyFrame.image_url ? (
                     <img
-                      src={`data:image/jpeg;base64,${keyFrame.image_base64}`}
+                      src={keyFrame.image_base64
+                        ? `data:image/jpeg;base64,${keyFrame.image_base64}`
+                        : `${config.api.baseUrl}${keyFrame.image_url}`}
                       alt={`Key frame ${index + 1}`}
                       className="w-full h-full object-cover"
                     />
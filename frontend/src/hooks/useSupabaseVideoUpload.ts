@@ -1,6 +1,7 @@
 import { useState, useCallback } from 'react';
 import { supabase } from '@/lib/supabase';
 import { config } from '@/lib/config';
+import { watchProcessing, describeProgress, ProcessingProgress } from '@/lib/processingProgress';
 
 interface VideoUploadOptions {
   sessionId?: string;
@@ -22,6 +23,7 @@ interface ProcessingStatus {
   status: 'uploading' | 'uploaded' | 'processing' | 'completed' | 'failed';
   message: string;
   videoUrl?: string;
+  progress?: ProcessingProgress;
 }
 
 interface UseSupabaseVideoUploadReturn {
@@ -351,8 +353,8 @@ export function useSupabaseVideoUpload(options: VideoUploadOptions = {}): UseSup
 
       console.log('✅ Processing request sent successfully');
 
-      // Poll for completion
-      pollProcessingStatus(uploadedVideo.id);
+      // Follow progress until processing finishes
+      watchProcessingStatus(uploadedVideo.id);
 
     } catch (error) {
       console.error('❌ Processing start failed:', error);
@@ -365,42 +367,28 @@ export function useSupabaseVideoUpload(options: VideoUploadOptions = {}): UseSup
     }
   }, [uploadedVideo, options.sessionId]);
 
-  const pollProcessingStatus = useCallback(async (videoId: string) => {
+  const watchProcessingStatus = useCallback(async (videoId: string) => {
     try {
-      console.log('📊 Polling processing status for:', videoId);
-      const response = await fetch(`${config.api.baseUrl}/api/status/${videoId}`);
-      
-      if (!response.ok) {
-        throw new Error(`Status check failed with status ${response.status}`);
-      }
-
-      const status = await response.json();
-      console.log('📈 Processing status:', status);
-      
-      setProcessingStatus({
-        status: status.status,
-        message: status.message || 'Processing...',
-        videoUrl: status.output_path ? `${config.api.baseUrl}/api/stream/${videoId}` : undefined
+      console.log('📊 Watching processing status for:', videoId);
+      await watchProcessing(config.api.baseUrl, videoId, (status) => {
+        console.log('📈 Processing status:', status);
+        setProcessingStatus({
+          status: status.status === 'error' ? 'failed' : status.status,
+          message: describeProgress(status) || 'Processing...',
+          videoUrl: status.output_path ? `${config.api.baseUrl}/api/stream/${videoId}` : undefined,
+          progress: status.progress
+        });
       });
 
-      if (status.status === 'completed') {
-        console.log('✅ Processing completed successfully');
-        setIsProcessing(false);
-        setProcessedVideoUrl(`${config.api.baseUrl}/api/stream/${videoId}`);
-      } else if (status.status === 'failed' || status.status === 'error') {
-        console.error('❌ Processing failed with status:', status.status);
-        setIsProcessing(false);
-      } else if (status.status === 'processing') {
-        // Continue polling
-        console.log('⏳ Still processing, will check again in', config.processing.pollInterval, 'ms');
-        setTimeout(() => pollProcessingStatus(videoId), config.processing.pollInterval);
-      }
+      console.log('✅ Processing completed successfully');
+      setIsProcessing(false);
+      setProcessedVideoUrl(`${config.api.baseUrl}/api/stream/${videoId}`);
     } catch (error) {
-      console.error('❌ Status polling error:', error);
+      console.error('❌ Processing failed:', error);
       setIsProcessing(false);
       setProcessingStatus({ 
         status: 'failed', 
-        message: 'Failed to check processing status' 
+        message: error instanceof Error ? error.message : 'Failed to check processing status' 
       });
     }
   }, []);
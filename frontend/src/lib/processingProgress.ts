@@ -0,0 +1,123 @@
+// Live processing status pushed by the backend's /api/progress/{videoId} event stream
+
+export interface ProcessingProgress {
+  stage: string | null;
+  frames_processed?: number;
+  total_frames?: number;
+  fps?: number | null;
+  eta_seconds?: number | null;
+}
+
+export interface ProcessingStatusUpdate {
+  status: 'processing' | 'completed' | 'error';
+  message: string;
+  progress?: ProcessingProgress;
+  [key: string]: any;
+}
+
+const STAGE_LABELS: Record<string, string> = {
+  downloading: 'Downloading video',
+  pose_detection: 'Detecting poses',
+  rendering_overlay: 'Rendering overlay',
+  encoding: 'Encoding video',
+  saving_data: 'Saving analysis data',
+  uploading: 'Uploading results',
+  extracting_key_frames: 'Extracting key frames',
+  analyzing: 'Generating AI analysis',
+};
+
+// Which of a video's background jobs a progress stream follows
+export type JobKind = 'processing' | 'analysis' | 'overlay';
+
+/**
+ * Subscribe to a video's processing status. onUpdate is called for every
+ * change (stage, frames processed, fps, ETA); the promise resolves with the
+ * final status once processing completed and rejects if it failed.
+ */
+export function watchProcessing(
+  baseUrl: string,
+  videoId: string,
+  onUpdate?: (update: ProcessingStatusUpdate) => void,
+  kind: JobKind = 'processing'
+): Promise<ProcessingStatusUpdate> {
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${baseUrl}/api/progress/${videoId}?kind=${kind}`);
+
+    source.onmessage = (event) => {
+      const update: ProcessingStatusUpdate = JSON.parse(event.data);
+      onUpdate?.(update);
+
+      if (update.status === 'completed') {
+        source.close();
+        resolve(update);
+      } else if (update.status === 'error') {
+        source.close();
+        reject(new Error(`Processing failed: ${update.message}`));
+      }
+    };
+
+    source.onerror = () => {
+      // EventSource reconnects by itself after dropped connections; CLOSED means it gave up (e.g. 404)
+      if (source.readyState === EventSource.CLOSED) {
+        reject(new Error('Lost connection to the processing status stream'));
+      }
+    };
+  });
+}
+
+/**
+ * Run (or join) the two-stage analysis of a processed video and return its
+ * result ({ analysis, key_frames }). The backend answers 202 while the
+ * analysis runs in the background; the result is fetched once it finished.
+ */
+export async function requestTwoStageAnalysis(
+  baseUrl: string,
+  videoId: string,
+  onUpdate?: (update: ProcessingStatusUpdate) => void
+): Promise<any> {
+  const response = await fetch(`${baseUrl}/api/two-stage-analysis/${videoId}`, {
+    method: 'POST',
+  });
+  if (!response.ok) {
+    const errorText = await response.text();
+    throw new Error(`AI analysis failed: ${response.status} - ${errorText}`);
+  }
+  if (response.status !== 202) {
+    return response.json();
+  }
+
+  await watchProcessing(baseUrl, videoId, onUpdate, 'analysis');
+
+  const resultResponse = await fetch(`${baseUrl}/api/two-stage-analysis/${videoId}`);
+  if (!resultResponse.ok) {
+    const errorText = await resultResponse.text();
+    throw new Error(`AI analysis failed: ${resultResponse.status} - ${errorText}`);
+  }
+  return resultResponse.json();
+}
+
+/** Percentage of frames processed, or null before frame counts are known */
+export function progressPercent(progress?: ProcessingProgress): number | null {
+  if (!progress?.total_frames || progress.frames_processed === undefined) return null;
+  return Math.min(100, Math.round((progress.frames_processed / progress.total_frames) * 100));
+}
+
+/** Human-readable progress line, e.g. "Detecting poses: 120/287 frames · 17 fps · ~8s left" */
+export function describeProgress(update: ProcessingStatusUpdate): string {
+  const progress = update.progress;
+  if (!progress?.stage) return update.message;
+
+  let text = STAGE_LABELS[progress.stage] || progress.stage;
+  if (progress.stage === 'pose_detection' || progress.stage === 'rendering_overlay') {
+    if (progress.total_frames) {
+      text += `: ${progress.frames_processed ?? 0}/${progress.total_frames} frames`;
+    }
+    if (progress.fps) {
+      text += ` · ${Math.round(progress.fps)} fps`;
+    }
+    if (progress.eta_seconds !== null && progress.eta_seconds !== undefined) {
+      text += ` · ~${Math.ceil(progress.eta_seconds)}s left`;
+    }
+  }
+  return text;
+}